@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from beneficiarios.obstetricia import actualizar_obstetricos
+
+
+class Command(BaseCommand):
+    help = (
+        "Pasa a lactantes las gestantes con parto registrado y cierra las lactancias vencidas; "
+        "se puede repetir sin duplicar periodos"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fecha",
+            help="Fecha de referencia, en formato AAAA-MM-DD (por defecto, hoy)",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=2000,
+            help="Numero de periodos procesados por transaccion",
+        )
+
+    def handle(self, *args, **options):
+        hoy = None
+        if options["fecha"]:
+            try:
+                hoy = datetime.strptime(options["fecha"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("La fecha debe tener el formato AAAA-MM-DD")
+        try:
+            resultado = actualizar_obstetricos(hoy, lote=options["lote"])
+        except ValidationError as error:
+            raise CommandError(" ".join(error.messages))
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado.lactantes} gestantes pasaron a lactantes; {resultado.finalizadas} lactancias cerradas"
+        ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from beneficiarios.models import Beneficiario
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el periodo vigente (codHistoricoActual) de cada beneficiario desde HistoricoBeneficiarios; "
+        "necesario tras cargas o correcciones masivas hechas fuera del ORM"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=5000,
+            help="Numero de beneficiarios actualizados por transaccion",
+        )
+
+    def handle(self, *args, **options):
+        lote = options["lote"]
+        ultimo = 0
+        revisados = 0
+        while True:
+            ids = list(
+                Beneficiario.objects.filter(cod_beneficiario__gt=ultimo)
+                .order_by("cod_beneficiario")
+                .values_list("cod_beneficiario", flat=True)[:lote]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                Beneficiario.objects.filter(
+                    cod_beneficiario__gte=ids[0], cod_beneficiario__lte=ids[-1]
+                ).actualizar_historico_actual()
+            ultimo = ids[-1]
+            revisados += len(ids)
+            self.stdout.write(f"{revisados} beneficiarios revisados...")
+
+        self.stdout.write(self.style.SUCCESS(f"Periodo vigente recalculado para {revisados} beneficiarios"))
@@ -0,0 +1,55 @@
+from datetime import datetime
+from time import perf_counter
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from beneficiarios.reclasificacion import reclasificar
+
+
+class Command(BaseCommand):
+    help = (
+        "Cierra los periodos activos de beneficiarios que superaron la edad maxima de su tipo de beneficio "
+        "y abre el del tipo que corresponde a su edad; se puede reanudar si se interrumpe"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fecha",
+            help="Fecha de referencia para la edad, en formato AAAA-MM-DD (por defecto, hoy)",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=2000,
+            help="Numero de periodos procesados por transaccion",
+        )
+        parser.add_argument(
+            "--simular",
+            action="store_true",
+            help="Solo informa cuantos periodos se reclasificarian, sin modificar nada",
+        )
+
+    def handle(self, *args, **options):
+        hoy = None
+        if options["fecha"]:
+            try:
+                hoy = datetime.strptime(options["fecha"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("La fecha debe tener el formato AAAA-MM-DD")
+
+        inicio = perf_counter()
+        try:
+            resultado = reclasificar(hoy, lote=options["lote"], simular=options["simular"])
+        except ValidationError as error:
+            raise CommandError(" ".join(error.messages))
+        segundos = perf_counter() - inicio
+
+        resumen = (
+            f"{resultado.revisados} periodos fuera de rango: {resultado.reclasificados} reclasificados, "
+            f"{resultado.cerrados} cerrados sin tipo de beneficio para su edad ({segundos:.1f} s)"
+        )
+        if options["simular"]:
+            self.stdout.write(self.style.WARNING(f"Simulacion: {resumen}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(resumen))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def poblar_historico_actual(apps, schema_editor):
+    """Apunta cada beneficiario a su período abierto más reciente."""
+    Beneficiario = apps.get_model('beneficiarios', 'Beneficiario')
+    HistoricoBeneficiario = apps.get_model('beneficiarios', 'HistoricoBeneficiario')
+    vigente = HistoricoBeneficiario.objects.filter(
+        beneficiario=models.OuterRef('pk'), fecha_termino__isnull=True
+    ).order_by('-fecha_inicio', '-cod_historico_beneficiario')
+    Beneficiario.objects.update(historico_actual=models.Subquery(vigente.values('pk')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('beneficiarios', '0001_initial'),
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='beneficiario',
+            name='historico_actual',
+            field=models.ForeignKey(blank=True, db_column='codHistoricoActual', editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='beneficiarios.historicobeneficiario'),
+        ),
+        migrations.AddIndex(
+            model_name='historicobeneficiario',
+            index=models.Index(condition=models.Q(('fecha_termino__isnull', True)), fields=['beneficiario', 'fecha_inicio', 'cod_historico_beneficiario'], name='IX_Historico_vigentes'),
+        ),
+        migrations.RunPython(poblar_historico_actual, migrations.RunPython.noop),
+    ]
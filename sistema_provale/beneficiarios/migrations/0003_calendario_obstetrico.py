@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('beneficiarios', '0002_historico_actual'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='datosobstetricos',
+            index=models.Index(condition=models.Q(('fecha_de_parto__isnull', True)), fields=['fecha_probable_parto', 'cod_dato_obstetrico'], name='IX_DatosObstetricos_partos'),
+        ),
+        migrations.AddIndex(
+            model_name='datosobstetricos',
+            index=models.Index(condition=models.Q(('fecha_fin_lactancia__isnull', False)), fields=['fecha_fin_lactancia', 'cod_dato_obstetrico'], name='IX_DatosObstetricos_lactancia'),
+        ),
+    ]
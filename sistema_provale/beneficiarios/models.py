@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from core.models import Estado
 from personas.models import Socio, Persona
 
@@ -68,11 +68,33 @@ class MotivoInhabilitacion(models.Model):
         return self.descripcion
 
 
+class BeneficiarioQuerySet(models.QuerySet):
+
+    def actualizar_historico_actual(self):
+        """
+        Recalcula codHistoricoActual de los beneficiarios del queryset con
+        un solo UPDATE: apunta al período abierto (sin fechaTermino) más
+        reciente, o queda NULL si no hay ninguno. Devuelve las filas
+        actualizadas.
+        """
+        vigente = HistoricoBeneficiario.objects.filter(
+            beneficiario=models.OuterRef('pk'), fecha_termino__isnull=True
+        ).order_by('-fecha_inicio', '-cod_historico_beneficiario')
+        return self.update(historico_actual=models.Subquery(vigente.values('pk')[:1]))
+
+
 class Beneficiario(models.Model):
     """
     Tabla: Beneficiarios
     Persona que recibe los beneficios del programa, vinculada
     a un socio titular mediante un parentesco.
+
+    codHistoricoActual apunta al período vigente (el HistoricoBeneficiario
+    abierto más reciente) para leer tipo de beneficio, estado y medidas
+    actuales con un JOIN. Lo mantienen HistoricoBeneficiario.save() y
+    delete(); tras escrituras masivas sobre HistoricoBeneficiarios hay que
+    llamar a actualizar_historico_actual() (o al comando
+    recalcular_historico_actual).
     """
     cod_beneficiario = models.AutoField(primary_key=True, db_column='codBeneficiario')
     persona = models.ForeignKey(
@@ -93,8 +115,19 @@ class Beneficiario(models.Model):
         db_column='codParentesco',
         related_name='beneficiarios'
     )
+    historico_actual = models.ForeignKey(
+        'HistoricoBeneficiario',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        db_column='codHistoricoActual',
+        related_name='+'
+    )
     fecha_registro = models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')
 
+    objects = BeneficiarioQuerySet.as_manager()
+
     class Meta:
         db_table = 'Beneficiarios'
         verbose_name = 'Beneficiario'
@@ -153,10 +186,30 @@ class HistoricoBeneficiario(models.Model):
         verbose_name = 'Histórico de Beneficiario'
         verbose_name_plural = 'Históricos de Beneficiarios'
         ordering = ['-fecha_inicio']
+        indexes = [
+            # Períodos abiertos por beneficiario: actualizar_historico_actual().
+            models.Index(
+                fields=['beneficiario', 'fecha_inicio', 'cod_historico_beneficiario'],
+                name='IX_Historico_vigentes',
+                condition=models.Q(fecha_termino__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         return f'{self.beneficiario} | {self.tipo_beneficio} ({self.fecha_inicio:%Y-%m-%d})'
 
+    def save(self, *args, **kwargs):
+        """Mantiene Beneficiario.historico_actual al abrir o cerrar el período."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Beneficiario.objects.filter(pk=self.beneficiario_id).actualizar_historico_actual()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            Beneficiario.objects.filter(pk=self.beneficiario_id).actualizar_historico_actual()
+            return resultado
+
 
 class DatosObstetricos(models.Model):
     """
@@ -197,6 +250,19 @@ class DatosObstetricos(models.Model):
         db_table = 'DatosObstetricos'
         verbose_name = 'Dato Obstétrico'
         verbose_name_plural = 'Datos Obstétricos'
+        indexes = [
+            # Listas de trabajo de beneficiarios.obstetricia: partos pendientes y fin de lactancia.
+            models.Index(
+                fields=['fecha_probable_parto', 'cod_dato_obstetrico'],
+                name='IX_DatosObstetricos_partos',
+                condition=models.Q(fecha_de_parto__isnull=True),
+            ),
+            models.Index(
+                fields=['fecha_fin_lactancia', 'cod_dato_obstetrico'],
+                name='IX_DatosObstetricos_lactancia',
+                condition=models.Q(fecha_fin_lactancia__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return f'Obstétrico → {self.historico}'
\ No newline at end of file
@@ -0,0 +1,163 @@
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
+
+from .models import Beneficiario, DatosObstetricos, HistoricoBeneficiario, MotivoInhabilitacion, TipoBeneficio
+from .reclasificacion import ESTADO_ACTIVO
+
+TIPO_GESTANTE = 'GESTANTE'
+TIPO_LACTANTE = 'LACTANTE'
+MOTIVO_FIN_LACTANCIA = 'Fin del período de lactancia'
+
+
+def _vigentes(asociacion_id=None, zona_id=None):
+    datos = DatosObstetricos.objects.filter(
+        historico__fecha_termino__isnull=True, historico__estado__abreviatura=ESTADO_ACTIVO
+    )
+    if asociacion_id:
+        datos = datos.filter(historico__beneficiario__socio__asociacion_id=asociacion_id)
+    if zona_id:
+        datos = datos.filter(historico__beneficiario__socio__asociacion__sector_zona__zona_id=zona_id)
+    return datos.select_related(
+        'historico__tipo_beneficio', 'historico__beneficiario__persona', 'historico__beneficiario__socio__asociacion'
+    )
+
+
+def partos_proximos(desde, hasta, asociacion_id=None, zona_id=None):
+    """
+    Gestantes con período vigente y fecha probable de parto entre `desde`
+    y `hasta` que aún no registran parto, por asociación o zona. Usa el
+    índice filtrado IX_DatosObstetricos_partos; ordenar por
+    (fecha_probable_parto, cod_dato_obstetrico).
+    """
+    return _vigentes(asociacion_id, zona_id).filter(
+        fecha_de_parto__isnull=True, fecha_probable_parto__range=(desde, hasta)
+    )
+
+
+def lactancias_por_terminar(desde, hasta, asociacion_id=None, zona_id=None):
+    """
+    Lactantes con período vigente cuya lactancia termina entre `desde` y
+    `hasta`, por asociación o zona (índice IX_DatosObstetricos_lactancia);
+    ordenar por (fecha_fin_lactancia, cod_dato_obstetrico).
+    """
+    return _vigentes(asociacion_id, zona_id).filter(fecha_fin_lactancia__range=(desde, hasta))
+
+
+@dataclass
+class ResultadoObstetrico:
+    lactantes: int = 0      # gestantes que pasaron a lactantes
+    finalizadas: int = 0    # lactancias cerradas
+
+
+def actualizar_obstetricos(hoy=None, lote=2000):
+    """
+    Aplica las transiciones que vencen a la fecha `hoy`:
+
+    - gestante con fecha de parto registrada: se cierra su período y se
+      abre uno de lactante con los mismos datos obstétricos;
+    - lactante con fecha de fin de lactancia vencida: se cierra su
+      período con el motivo MOTIVO_FIN_LACTANCIA.
+
+    Los tipos se reconocen por su descripción (TIPO_GESTANTE,
+    TIPO_LACTANTE). Cada bloque de `lote` períodos se procesa en su
+    propia transacción con UPDATEs y bulk_create, y como solo se
+    seleccionan períodos aún abiertos, el proceso se puede repetir.
+    """
+    hoy = hoy or timezone.now().date()
+    tipos = {
+        descripcion.upper(): pk
+        for descripcion, pk in TipoBeneficio.objects.filter(
+            models.Q(descripcion__iexact=TIPO_GESTANTE) | models.Q(descripcion__iexact=TIPO_LACTANTE)
+        ).values_list('descripcion', 'cod_tipo_beneficio')
+    }
+    if TIPO_GESTANTE not in tipos or TIPO_LACTANTE not in tipos:
+        raise ValidationError(f'Registre los tipos de beneficio {TIPO_GESTANTE} y {TIPO_LACTANTE}.')
+    abiertos = HistoricoBeneficiario.objects.filter(fecha_termino__isnull=True, estado__abreviatura=ESTADO_ACTIVO)
+    resultado = ResultadoObstetrico()
+
+    # Gestante -> lactante.
+    partos = abiertos.filter(tipo_beneficio_id=tipos[TIPO_GESTANTE], datos_obstetricos__fecha_de_parto__lte=hoy)
+    for historicos in _bloques(partos, lote):
+        with transaction.atomic():
+            historicos = list(
+                HistoricoBeneficiario.objects.select_for_update()
+                .filter(pk__in=historicos, fecha_termino__isnull=True)
+                .select_related('datos_obstetricos')
+            )
+            HistoricoBeneficiario.objects.filter(pk__in=[h.pk for h in historicos]).update(fecha_termino=timezone.now())
+            nuevos = HistoricoBeneficiario.objects.bulk_create(
+                [
+                    HistoricoBeneficiario(
+                        beneficiario_id=h.beneficiario_id, tipo_beneficio_id=tipos[TIPO_LACTANTE], estado_id=h.estado_id
+                    )
+                    for h in historicos
+                ],
+                batch_size=1000,
+            )
+            if nuevos and nuevos[0].pk is None:
+                # El motor no devolvió las PKs: los períodos nuevos son los
+                # de lactante abiertos que aún no tienen datos obstétricos.
+                codigos = dict(
+                    HistoricoBeneficiario.objects.filter(
+                        beneficiario_id__in={h.beneficiario_id for h in historicos},
+                        tipo_beneficio_id=tipos[TIPO_LACTANTE],
+                        fecha_termino__isnull=True,
+                        datos_obstetricos__isnull=True,
+                    )
+                    .order_by('cod_historico_beneficiario')
+                    .values_list('beneficiario_id', 'cod_historico_beneficiario')
+                )
+                for nuevo in nuevos:
+                    nuevo.pk = codigos[nuevo.beneficiario_id]
+            DatosObstetricos.objects.bulk_create(
+                [
+                    DatosObstetricos(
+                        historico=nuevo,
+                        fecha_ultima_menstruacion=h.datos_obstetricos.fecha_ultima_menstruacion,
+                        fecha_probable_parto=h.datos_obstetricos.fecha_probable_parto,
+                        fecha_de_parto=h.datos_obstetricos.fecha_de_parto,
+                        fecha_fin_lactancia=h.datos_obstetricos.fecha_fin_lactancia,
+                    )
+                    for h, nuevo in zip(historicos, nuevos)
+                ],
+                batch_size=1000,
+            )
+            Beneficiario.objects.filter(pk__in={h.beneficiario_id for h in historicos}).actualizar_historico_actual()
+        resultado.lactantes += len(historicos)
+
+    # Fin de lactancia.
+    motivo = None
+    vencidas = abiertos.filter(tipo_beneficio_id=tipos[TIPO_LACTANTE], datos_obstetricos__fecha_fin_lactancia__lt=hoy)
+    for historicos in _bloques(vencidas, lote):
+        if motivo is None:
+            motivo, _ = MotivoInhabilitacion.objects.get_or_create(descripcion=MOTIVO_FIN_LACTANCIA)
+        with transaction.atomic():
+            cerrados = dict(
+                HistoricoBeneficiario.objects.select_for_update()
+                .filter(pk__in=historicos, fecha_termino__isnull=True)
+                .values_list('pk', 'beneficiario_id')
+            )
+            HistoricoBeneficiario.objects.filter(pk__in=cerrados).update(
+                fecha_termino=timezone.now(), motivo_inhabilitacion=motivo
+            )
+            Beneficiario.objects.filter(pk__in=set(cerrados.values())).actualizar_historico_actual()
+        resultado.finalizadas += len(cerrados)
+    return resultado
+
+
+def _bloques(historicos, lote):
+    """Códigos de `historicos` en bloques de `lote`, por keyset sobre la PK."""
+    ultimo = 0
+    while True:
+        ids = list(
+            historicos.filter(cod_historico_beneficiario__gt=ultimo)
+            .order_by('cod_historico_beneficiario')
+            .values_list('cod_historico_beneficiario', flat=True)[:lote]
+        )
+        if not ids:
+            return
+        ultimo = ids[-1]
+        yield ids
@@ -0,0 +1,135 @@
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
+
+from core.models import Estado
+from personas.models import filtro_edad
+
+from .models import Beneficiario, HistoricoBeneficiario, MotivoInhabilitacion, TipoBeneficio
+
+ESTADO_ACTIVO = 'ACT'
+MOTIVO_EDAD = 'Superó la edad máxima del beneficio'
+
+
+@dataclass
+class ResultadoReclasificacion:
+    revisados: int = 0        # períodos fuera de su rango de edad
+    reclasificados: int = 0   # cerrados con un período sucesor
+    cerrados: int = 0         # cerrados sin tipo de beneficio para su edad
+
+
+def fuera_de_rango(hoy=None):
+    """
+    Períodos activos y abiertos cuyo beneficiario superó la edad máxima
+    de su tipo de beneficio. Es un OR de rangos sobre fechaNacimiento, uno
+    por tipo con edad máxima, de modo que la selección ocurre en la base
+    de datos con los índices de períodos vigentes y de fechaNacimiento.
+    """
+    hoy = hoy or timezone.now().date()
+    condicion = models.Q()
+    for tipo_id, edad_maxima in TipoBeneficio.objects.filter(edad_maxima__isnull=False).values_list(
+        'cod_tipo_beneficio', 'edad_maxima'
+    ):
+        # Fuera de rango = no tiene "como máximo edad_maxima años".
+        condicion |= models.Q(tipo_beneficio_id=tipo_id) & ~filtro_edad(
+            maximo=edad_maxima, hoy=hoy, campo='beneficiario__persona__fecha_nacimiento'
+        )
+    if not condicion:
+        return HistoricoBeneficiario.objects.none()
+    return HistoricoBeneficiario.objects.filter(
+        condicion, fecha_termino__isnull=True, estado__abreviatura=ESTADO_ACTIVO
+    )
+
+
+def _sucesor(hoy):
+    """
+    Expresión con el tipo de beneficio que corresponde a la edad del
+    beneficiario (el de mejor prioridad entre los que tienen rango de
+    edad y lo contienen), o NULL si ninguno.
+    """
+    casos = [
+        models.When(
+            filtro_edad(edad_minima, edad_maxima, hoy, campo='beneficiario__persona__fecha_nacimiento'),
+            then=models.Value(tipo_id),
+        )
+        for tipo_id, edad_minima, edad_maxima in TipoBeneficio.objects.filter(
+            models.Q(edad_minima__isnull=False) | models.Q(edad_maxima__isnull=False)
+        )
+        .order_by('prioridad', 'cod_tipo_beneficio')
+        .values_list('cod_tipo_beneficio', 'edad_minima', 'edad_maxima')
+    ]
+    if not casos:
+        return models.Value(None, output_field=models.IntegerField())
+    return models.Case(*casos, default=models.Value(None), output_field=models.IntegerField())
+
+
+def reclasificar(hoy=None, lote=2000, simular=False):
+    """
+    Cierra (fechaTermino) los períodos de fuera_de_rango() y abre en su
+    lugar un período activo del tipo que corresponde a la edad actual;
+    si no hay ninguno, el período se cierra con el motivo MOTIVO_EDAD.
+    Recorre los períodos por código en bloques de `lote`, cada uno en su
+    propia transacción: UPDATE de cierre, bulk_create de sucesores y
+    actualización de Beneficiario.historico_actual. Como la selección
+    solo devuelve períodos aún abiertos y fuera de rango, un proceso
+    interrumpido puede volver a ejecutarse sin repetir trabajo.
+    Con `simular` solo cuenta, sin modificar nada.
+    """
+    hoy = hoy or timezone.now().date()
+    resultado = ResultadoReclasificacion()
+    pendientes = fuera_de_rango(hoy).annotate(sucesor=_sucesor(hoy))
+    if simular:
+        for sucesor, numero in pendientes.order_by().values('sucesor').annotate(numero=models.Count('pk')).values_list(
+            'sucesor', 'numero'
+        ):
+            resultado.revisados += numero
+            if sucesor is None:
+                resultado.cerrados += numero
+            else:
+                resultado.reclasificados += numero
+        return resultado
+
+    estado = Estado.objects.filter(abreviatura=ESTADO_ACTIVO).first()
+    if estado is None:
+        raise ValidationError(f'No existe el estado {ESTADO_ACTIVO}; ejecute manage.py seed.')
+    motivo, _ = MotivoInhabilitacion.objects.get_or_create(descripcion=MOTIVO_EDAD)
+
+    ultimo = 0
+    while True:
+        filas = list(
+            pendientes.filter(cod_historico_beneficiario__gt=ultimo)
+            .order_by('cod_historico_beneficiario')
+            .values_list('cod_historico_beneficiario', 'beneficiario_id', 'sucesor')[:lote]
+        )
+        if not filas:
+            break
+        ultimo = filas[-1][0]
+        ids = [pk for pk, _, _ in filas]
+        sin_sucesor = {pk for pk, _, sucesor in filas if sucesor is None}
+        ahora = timezone.now()
+
+        with transaction.atomic():
+            # Otro proceso pudo cerrar alguno desde la selección.
+            cerrados = set(
+                HistoricoBeneficiario.objects.select_for_update()
+                .filter(pk__in=ids, fecha_termino__isnull=True)
+                .values_list('pk', flat=True)
+            )
+            HistoricoBeneficiario.objects.filter(pk__in=cerrados).update(fecha_termino=ahora)
+            HistoricoBeneficiario.objects.filter(pk__in=cerrados & sin_sucesor).update(motivo_inhabilitacion=motivo)
+            HistoricoBeneficiario.objects.bulk_create(
+                [
+                    HistoricoBeneficiario(beneficiario_id=beneficiario_id, tipo_beneficio_id=sucesor, estado=estado)
+                    for pk, beneficiario_id, sucesor in filas
+                    if pk in cerrados and sucesor is not None
+                ],
+                batch_size=1000,
+            )
+            Beneficiario.objects.filter(pk__in={beneficiario_id for _, beneficiario_id, _ in filas}).actualizar_historico_actual()
+
+        resultado.revisados += len(cerrados)
+        resultado.cerrados += len(cerrados & sin_sucesor)
+        resultado.reclasificados += len(cerrados - sin_sucesor)
+    return resultado
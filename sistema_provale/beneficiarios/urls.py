@@ -7,4 +7,6 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('nuevo/', views.create, name='create'),
     path('<int:id>/editar/', views.edit, name='edit'),
+    path('obstetricia/partos/', views.partos, name='partos'),
+    path('obstetricia/lactancias/', views.lactancias, name='lactancias'),
 ]
@@ -1,75 +1,82 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from django.http import JsonResponse
+from django.db.models import Q
+from django.utils import timezone
+from datetime import timedelta
 import json
 
+from core.paginacion import paginar_keyset
+from .models import Beneficiario
+from .obstetricia import lactancias_por_terminar, partos_proximos
+
+BENEFICIARIOS_POR_PAGINA = 20
+OBSTETRICOS_POR_PAGINA = 50
+DIAS_CALENDARIO_OBSTETRICO = 30
+
 
 @login_required
 def index(request):
-    """Vista de lista de beneficiarios"""
-    # Datos de ejemplo - en producción vendrían de la base de datos
-    beneficiarios = [
-        {
-            'id': 1,
-            'dni': '12345678',
-            'nombre_completo': 'María González Pérez',
-            'fecha_nacimiento': '1990-05-15',
-            'sexo': 'F',
-            'direccion': 'Av. Principal 123',
-            'telefono': '987654321',
-            'club': {'id': 1, 'nombre': 'Club San Luis'},
-            'estado': 'activo',
-            'fecha_registro': '2024-01-15',
-        },
-        {
-            'id': 2,
-            'dni': '87654321',
-            'nombre_completo': 'Juan Carlos Rodríguez',
-            'fecha_nacimiento': '1985-08-22',
-            'sexo': 'M',
-            'direccion': 'Jr. Los Pinos 456',
-            'telefono': '912345678',
-            'club': {'id': 2, 'nombre': 'Club Primavera'},
-            'estado': 'activo',
-            'fecha_registro': '2024-02-10',
-        },
-        {
-            'id': 3,
-            'dni': '45678912',
-            'nombre_completo': 'Ana Lucía Mendoza',
-            'fecha_nacimiento': '1992-11-30',
-            'sexo': 'F',
-            'direccion': 'Calle Las Flores 789',
-            'telefono': '945678123',
-            'club': {'id': 1, 'nombre': 'Club San Luis'},
-            'estado': 'pendiente',
-            'fecha_registro': '2024-03-05',
-        },
-        {
-            'id': 4,
-            'dni': '78912345',
-            'nombre_completo': 'Pedro Antonio Vargas',
-            'fecha_nacimiento': '1978-03-12',
-            'sexo': 'M',
-            'direccion': 'Av. Los Olivos 321',
-            'telefono': '978123456',
-            'club': {'id': 3, 'nombre': 'Club Esperanza'},
-            'estado': 'inactivo',
-            'fecha_registro': '2024-01-20',
-        },
-        {
-            'id': 5,
-            'dni': '32165498',
-            'nombre_completo': 'Carmen Rosa Huamán',
-            'fecha_nacimiento': '1988-07-25',
-            'sexo': 'F',
-            'direccion': 'Jr. Santa Rosa 654',
-            'telefono': '934567891',
-            'club': {'id': 2, 'nombre': 'Club Primavera'},
-            'estado': 'activo',
-            'fecha_registro': '2024-02-28',
-        },
-    ]
+    """
+    Vista de lista de beneficiarios.
+    Persona, asociación, parentesco y el estado del período vigente
+    (Beneficiario.historico_actual) vienen por JOIN con solo las
+    columnas que usa la página; la paginación es por keyset sobre (apellido paterno,
+    apellido materno, nombres, cod_persona), las columnas del índice
+    IX_Personas_apellidos, y cod_beneficiario, que el índice de
+    Beneficiarios.codPersona devuelve ya ordenado: el motor lee en orden
+    del índice sin ordenar el conjunto filtrado, de modo que una página
+    profunda cuesta lo mismo que la primera.
+    """
+    filters = {
+        'search': request.GET.get('search', ''),
+        'club_id': request.GET.get('club_id'),
+        'estado': request.GET.get('estado'),
+    }
+
+    queryset = Beneficiario.objects.all()
+    if filters['search']:
+        queryset = queryset.filter(
+            Q(persona__dni=filters['search'])
+            | Q(persona__apellido_paterno__istartswith=filters['search'])
+            | Q(persona__apellido_materno__istartswith=filters['search'])
+            | Q(persona__nombres__icontains=filters['search'])
+        )
+    if filters['club_id'] and filters['club_id'].isdigit():
+        queryset = queryset.filter(socio__asociacion_id=filters['club_id'])
+    if filters['estado']:
+        queryset = queryset.filter(historico_actual__estado__descripcion__iexact=filters['estado'])
+
+    total = queryset.count()
+    pagina, next_cursor = paginar_keyset(
+        queryset.select_related('persona', 'socio__asociacion', 'parentesco', 'historico_actual__estado').only(
+            'fecha_registro',
+            'persona__dni', 'persona__nombres', 'persona__apellido_paterno', 'persona__apellido_materno',
+            'persona__fecha_nacimiento', 'persona__sexo', 'persona__direccion', 'persona__telefono', 'persona__celular',
+            'socio__asociacion__codigo_asociacion', 'socio__asociacion__nombre_asociacion',
+            'parentesco__descripcion', 'historico_actual__estado__descripcion',
+        ),
+        ['persona__apellido_paterno', 'persona__apellido_materno', 'persona__nombres', 'persona_id', 'cod_beneficiario'],
+        cursor=request.GET.get('cursor'),
+        por_pagina=BENEFICIARIOS_POR_PAGINA,
+    )
+    beneficiarios = []
+    for beneficiario in pagina:
+        persona = beneficiario.persona
+        asociacion = beneficiario.socio.asociacion
+        beneficiarios.append({
+            'id': beneficiario.cod_beneficiario,
+            'dni': persona.dni,
+            'nombre_completo': persona.nombre_completo,
+            'fecha_nacimiento': persona.fecha_nacimiento.isoformat(),
+            'sexo': persona.sexo,
+            'direccion': persona.direccion,
+            'telefono': persona.celular or persona.telefono or '',
+            'club': {'id': asociacion.cod_asociacion, 'nombre': asociacion.nombre_asociacion or asociacion.codigo_asociacion},
+            'parentesco': beneficiario.parentesco.descripcion,
+            'estado': beneficiario.historico_actual.estado.descripcion.lower() if beneficiario.historico_actual else 'inactivo',
+            'fecha_registro': beneficiario.fecha_registro.date().isoformat(),
+        })
 
     context = {
         'page_data': {
@@ -82,19 +89,65 @@ def index(request):
                 'role': getattr(request.user, 'role', 'usuario'),
             },
             'beneficiarios': beneficiarios,
-            'total': 1247,
+            'total': total,
             'page': 1,
-            'per_page': 20,
-            'filters': {
-                'search': request.GET.get('search', ''),
-                'club_id': request.GET.get('club_id'),
-                'estado': request.GET.get('estado'),
-            },
+            'per_page': BENEFICIARIOS_POR_PAGINA,
+            'cursor': request.GET.get('cursor'),
+            'next_cursor': next_cursor,
+            'filters': filters,
         }
     }
     return render(request, 'beneficiarios/beneficiarios_list.html', context)
 
 
+@login_required
+def partos(request):
+    """Lista de trabajo (JSON): partos probables de los próximos días, por club o zona."""
+    return _calendario_obstetrico(request, partos_proximos, 'fecha_probable_parto')
+
+
+@login_required
+def lactancias(request):
+    """Lista de trabajo (JSON): lactancias que terminan en los próximos días, por club o zona."""
+    return _calendario_obstetrico(request, lactancias_por_terminar, 'fecha_fin_lactancia')
+
+
+def _calendario_obstetrico(request, consulta, campo_fecha):
+    """
+    Parámetros: dias (horizonte desde hoy), club_id, zona_id y cursor.
+    Recorre el índice filtrado de la fecha por keyset, así que cada
+    página es una sola consulta aunque el filtro sea una zona completa.
+    """
+    dias = request.GET.get('dias', '')
+    dias = int(dias) if dias.isdigit() else DIAS_CALENDARIO_OBSTETRICO
+    club_id = request.GET.get('club_id', '')
+    zona_id = request.GET.get('zona_id', '')
+    hoy = timezone.localdate()
+    pagina, next_cursor = paginar_keyset(
+        consulta(
+            hoy, hoy + timedelta(days=dias),
+            asociacion_id=int(club_id) if club_id.isdigit() else None,
+            zona_id=int(zona_id) if zona_id.isdigit() else None,
+        ),
+        [campo_fecha, 'cod_dato_obstetrico'],
+        cursor=request.GET.get('cursor'),
+        por_pagina=OBSTETRICOS_POR_PAGINA,
+    )
+    items = []
+    for datos in pagina:
+        beneficiario = datos.historico.beneficiario
+        asociacion = beneficiario.socio.asociacion
+        items.append({
+            'id': beneficiario.cod_beneficiario,
+            'dni': beneficiario.persona.dni,
+            'nombre_completo': beneficiario.persona.nombre_completo,
+            'club': {'id': asociacion.cod_asociacion, 'nombre': asociacion.nombre_asociacion or asociacion.codigo_asociacion},
+            'tipo_beneficio': datos.historico.tipo_beneficio.descripcion,
+            'fecha': getattr(datos, campo_fecha).isoformat(),
+        })
+    return JsonResponse({'items': items, 'desde': hoy.isoformat(), 'dias': dias, 'next_cursor': next_cursor})
+
+
 @login_required
 def create(request):
     """Vista de formulario para nuevo beneficiario"""
@@ -0,0 +1,63 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+
+
+def _codificar_cursor(valores):
+    datos = json.dumps(valores, default=str, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(datos).decode().rstrip('=')
+
+
+def _decodificar_cursor(cursor, campos):
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if not isinstance(valores, list) or len(valores) != len(campos):
+        return None
+    return valores
+
+
+def _valor(fila, campo):
+    if isinstance(fila, dict):
+        return fila[campo]
+    for parte in campo.split('__'):
+        fila = getattr(fila, parte)
+    return fila
+
+
+def paginar_keyset(queryset, campos, cursor=None, por_pagina=20):
+    """
+    Paginación por búsqueda (keyset/seek) sobre `campos`, que deben
+    identificar cada fila de forma única (el último suele ser la PK).
+    Un campo con prefijo '-' se ordena de forma descendente.
+
+    En lugar de OFFSET, cada página filtra las filas posteriores a la
+    última mostrada con una condición sobre los mismos campos del ORDER BY,
+    de modo que una página profunda cuesta lo mismo que la primera si
+    existe un índice sobre `campos`.
+
+    Devuelve (filas, siguiente_cursor); siguiente_cursor es None en la
+    última página. Un cursor inválido se trata como la primera página.
+    """
+    queryset = queryset.order_by(*campos)
+    nombres = [campo.lstrip('-') for campo in campos]
+    valores = _decodificar_cursor(cursor, campos) if cursor else None
+    if valores is not None:
+        # (c1, c2, ..., cn) > (v1, v2, ..., vn) expandido a OR de prefijos iguales.
+        condicion = Q()
+        for i, campo in enumerate(campos):
+            prefijo = {nombres[j]: valores[j] for j in range(i)}
+            operador = 'lt' if campo.startswith('-') else 'gt'
+            condicion |= Q(**prefijo, **{f'{nombres[i]}__{operador}': valores[i]})
+        queryset = queryset.filter(condicion)
+
+    filas = list(queryset[:por_pagina + 1])
+    siguiente = None
+    if len(filas) > por_pagina:
+        filas = filas[:por_pagina]
+        siguiente = _codificar_cursor([_valor(filas[-1], nombre) for nombre in nombres])
+    return filas, siguiente
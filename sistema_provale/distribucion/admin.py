@@ -1,5 +1,44 @@
-from django.contrib import admin
-from .models import Pecosa, DetallePecosa
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import transaction
+from core.models import Estado
+from inventario.services import reintentar_interbloqueo
+from .models import (
+    Pecosa, DetallePecosa, AsignacionLote, RondaDistribucion, SeriePecosa, BloqueNumeracion, TransicionPecosa,
+    ConciliacionEntrega, MarcaConciliacion,
+)
+from .services import (
+    ESTADO_APROBADA, ESTADO_CANCELADA, ESTADO_ENTREGADA, ESTADO_PENDIENTE, asignar_lotes, cambiar_estado, liberar_reservas,
+)
+
+
+def _pendiente(pecosa):
+    """Solo las PECOSAs pendientes (o aún no creadas) admiten cambios en sus líneas."""
+    return pecosa is None or pecosa.estado.abreviatura == ESTADO_PENDIENTE
+
+
+class ReservasAdminMixin:
+    """
+    Vistas de admin que reservan o liberan stock: cada petición es una
+    transacción que se repite completa ante un interbloqueo, y el
+    borrado masivo libera las reservas (QuerySet.delete() no llama a
+    delete() de cada objeto).
+    """
+
+    def changeform_view(self, *args, **kwargs):
+        return reintentar_interbloqueo(super().changeform_view)(*args, **kwargs)
+
+    def changelist_view(self, *args, **kwargs):
+        # Las acciones (aprobar, cancelar, borrado masivo...) se ejecutan desde aquí.
+        return reintentar_interbloqueo(super().changelist_view)(*args, **kwargs)
+
+    def delete_view(self, *args, **kwargs):
+        return reintentar_interbloqueo(super().delete_view)(*args, **kwargs)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            liberar_reservas(self.detalles_de(queryset))
+            super().delete_queryset(request, queryset)
 
 
 class DetallePecosaInline(admin.TabularInline):
@@ -8,19 +47,168 @@ class DetallePecosaInline(admin.TabularInline):
     fields = ('producto', 'prioridad', 'cantidad', 'precio_unitario', 'fecha_desde', 'fecha_hasta')
     readonly_fields = ('fecha_registro',)
 
+    def has_add_permission(self, request, obj=None):
+        return _pendiente(obj) and super().has_add_permission(request, obj)
+
+    def has_change_permission(self, request, obj=None):
+        return _pendiente(obj) and super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return _pendiente(obj) and super().has_delete_permission(request, obj)
+
+
+@admin.register(RondaDistribucion)
+class RondaDistribucionAdmin(admin.ModelAdmin):
+    list_display = ('cod_ronda', 'periodo', 'observacion', 'fecha_registro')
+    ordering = ('-periodo',)
+
 
 @admin.register(Pecosa)
-class PecosaAdmin(admin.ModelAdmin):
-    list_display = ('cod_pecosa', 'numero_pecosa', 'asociacion', 'socio_presidenta', 'estado', 'fecha_reparto', 'fecha_registro')
+class PecosaAdmin(ReservasAdminMixin, admin.ModelAdmin):
+    list_display = ('cod_pecosa', 'numero_pecosa', 'ronda', 'asociacion', 'socio_presidenta', 'almacen', 'estado', 'fecha_reparto', 'fecha_registro')
     search_fields = ('numero_pecosa', 'asociacion__nombre_asociacion')
-    list_filter = ('estado', 'asociacion')
+    list_filter = ('estado', 'ronda', 'asociacion')
     ordering = ('-fecha_registro',)
     inlines = [DetallePecosaInline]
+    actions = ['asignar_lotes_fefo', 'aprobar', 'entregar', 'cancelar']
+    # El estado solo cambia con las acciones (cambiar_estado), que contabilizan y liberan reservas.
+    readonly_fields = ('estado',)
+
+    def get_readonly_fields(self, request, obj=None):
+        # Las SALIDAs de una PECOSA aprobada ya se registraron en su almacén.
+        if not _pendiente(obj):
+            return self.readonly_fields + ('almacen',)
+        return self.readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.estado = Estado.objects.get(abreviatura=ESTADO_PENDIENTE)
+        super().save_model(request, obj, form, change)
+
+    def has_delete_permission(self, request, obj=None):
+        # También la consulta el borrado masivo para cada PECOSA seleccionada.
+        return _pendiente(obj) and super().has_delete_permission(request, obj)
+
+    def delete_model(self, request, obj):
+        if not _pendiente(obj):
+            raise PermissionDenied
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        if queryset.exclude(estado__abreviatura=ESTADO_PENDIENTE).exists():
+            raise PermissionDenied
+        super().delete_queryset(request, queryset)
+
+    @admin.action(description='Asignar lotes por vencimiento (FEFO)')
+    def asignar_lotes_fefo(self, request, queryset):
+        try:
+            asignaciones = asignar_lotes(DetallePecosa.objects.filter(pecosa__in=queryset))
+        except ValidationError as error:
+            self.message_user(request, ' '.join(error.messages), messages.ERROR)
+            return
+        self.message_user(request, f'{len(asignaciones)} asignaciones de lote registradas.')
+
+    @admin.action(description='Aprobar PECOSAs seleccionadas')
+    def aprobar(self, request, queryset):
+        self._cambiar_estado(request, queryset, ESTADO_APROBADA)
+
+    @admin.action(description='Marcar PECOSAs seleccionadas como entregadas')
+    def entregar(self, request, queryset):
+        self._cambiar_estado(request, queryset, ESTADO_ENTREGADA)
+
+    @admin.action(description='Cancelar PECOSAs seleccionadas')
+    def cancelar(self, request, queryset):
+        self._cambiar_estado(request, queryset, ESTADO_CANCELADA)
+
+    def detalles_de(self, queryset):
+        return DetallePecosa.objects.filter(pecosa__in=queryset.values('pk'))
+
+    def _cambiar_estado(self, request, queryset, destino):
+        try:
+            cambiadas = cambiar_estado(queryset, destino, usuario=request.user)
+        except ValidationError as error:
+            self.message_user(request, ' '.join(error.messages), messages.ERROR)
+            return
+        self.message_user(request, f'{cambiadas} PECOSAs actualizadas.')
+
+
+@admin.register(TransicionPecosa)
+class TransicionPecosaAdmin(admin.ModelAdmin):
+    list_display = ('cod_transicion', 'pecosa', 'estado_origen', 'estado_destino', 'usuario', 'fecha_registro')
+    search_fields = ('pecosa__numero_pecosa',)
+    list_filter = ('estado_destino',)
+    ordering = ('-fecha_registro',)
+    readonly_fields = ('pecosa', 'estado_origen', 'estado_destino', 'usuario', 'observacion', 'fecha_registro')
+
+    def has_add_permission(self, request):
+        return False
 
 
 @admin.register(DetallePecosa)
-class DetallePecosaAdmin(admin.ModelAdmin):
-    list_display = ('cod_detalle_pecosa', 'pecosa', 'producto', 'cantidad', 'precio_unitario', 'prioridad')
+class DetallePecosaAdmin(ReservasAdminMixin, admin.ModelAdmin):
+    list_display = ('cod_detalle_pecosa', 'pecosa', 'producto', 'cantidad', 'precio_unitario', 'prioridad', 'movimiento')
     search_fields = ('producto__descripcion', 'pecosa__numero_pecosa')
     list_filter = ('producto',)
-    ordering = ('pecosa', 'prioridad')
\ No newline at end of file
+    ordering = ('pecosa', 'prioridad')
+
+    def detalles_de(self, queryset):
+        return DetallePecosa.objects.filter(pk__in=queryset.values('pk'))
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'pecosa':
+            kwargs['queryset'] = Pecosa.objects.filter(estado__abreviatura=ESTADO_PENDIENTE)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def has_change_permission(self, request, obj=None):
+        return (obj is None or _pendiente(obj.pecosa)) and super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return (obj is None or _pendiente(obj.pecosa)) and super().has_delete_permission(request, obj)
+
+
+@admin.register(AsignacionLote)
+class AsignacionLoteAdmin(admin.ModelAdmin):
+    list_display = ('cod_asignacion_lote', 'detalle_pecosa', 'lote', 'cantidad', 'fecha_registro')
+    search_fields = ('lote__codigo_lote', 'detalle_pecosa__pecosa__numero_pecosa')
+    ordering = ('-fecha_registro',)
+    readonly_fields = ('detalle_pecosa', 'lote', 'cantidad', 'fecha_registro')
+
+
+@admin.register(SeriePecosa)
+class SeriePecosaAdmin(admin.ModelAdmin):
+    list_display = ('serie', 'ultimo_numero', 'fecha_actualizacion')
+    ordering = ('-serie',)
+    readonly_fields = ('ultimo_numero', 'fecha_actualizacion')
+
+
+@admin.register(BloqueNumeracion)
+class BloqueNumeracionAdmin(admin.ModelAdmin):
+    list_display = ('cod_bloque', 'serie', 'numero_desde', 'numero_hasta', 'fecha_registro')
+    list_filter = ('serie',)
+    ordering = ('-fecha_registro',)
+    readonly_fields = ('serie', 'numero_desde', 'numero_hasta', 'fecha_registro')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ConciliacionEntrega)
+class ConciliacionEntregaAdmin(admin.ModelAdmin):
+    list_display = ('detalle_pecosa', 'periodo', 'producto', 'cantidad_prometida', 'cantidad_despachada', 'motivo', 'fecha_revision')
+    search_fields = ('detalle_pecosa__pecosa__numero_pecosa', 'producto__descripcion')
+    list_filter = ('motivo', 'periodo', 'producto')
+    ordering = ('-periodo', 'producto')
+    readonly_fields = ('detalle_pecosa', 'producto', 'periodo', 'cantidad_prometida', 'cantidad_despachada', 'motivo', 'fecha_revision')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(MarcaConciliacion)
+class MarcaConciliacionAdmin(admin.ModelAdmin):
+    list_display = ('proceso', 'ultima_fecha', 'ultimo_codigo', 'fecha_ejecucion')
+    ordering = ('proceso',)
+    readonly_fields = ('proceso', 'ultima_fecha', 'ultimo_codigo', 'fecha_ejecucion')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,141 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+
+from inventario.models import TipoMovimiento
+
+from .models import AsignacionLote, ConciliacionEntrega, DetallePecosa, MarcaConciliacion
+from .services import ESTADO_APROBADA, ESTADO_ENTREGADA
+
+PROCESO = 'conciliacion_entregas'
+# Las filas modificadas en los últimos minutos pueden pertenecer a
+# transacciones aún abiertas con una fechaModificacion anterior a la de
+# filas ya confirmadas; se dejan para la siguiente ejecución.
+MARGEN_SEGURIDAD = timedelta(minutes=5)
+# Cada bloque filtra por sus códigos con IN (prefetch de asignaciones y
+# borrado de las diferencias previas): SQL Server admite 2100 parámetros.
+LOTE_MAXIMO = 2000
+
+
+@dataclass
+class ResultadoConciliacion:
+    revisadas: int = 0
+    diferencias: int = 0
+    # {(periodo, cod_producto): [prometida, despachada, líneas con diferencia]}
+    resumen: dict = field(default_factory=lambda: defaultdict(lambda: [0, 0, 0]))
+
+
+def conciliar_entregas(lote=1000, completo=False):
+    """
+    Compara lo que promete cada DetallePecosa con las SALIDAs registradas
+    para ella (la de la línea o, si salió por lotes, las de sus
+    AsignacionLote) y deja en ConciliacionEntrega solo las líneas que no
+    cuadran. Es incremental: recorre DetallePecosa por
+    (fechaModificacion, codDetallePecosa) desde la marca de la última
+    ejecución, en bloques de `lote` líneas; cada bloque y el avance de la
+    marca se confirman juntos, así que un proceso interrumpido retoma
+    donde quedó. Movimiento.save() marca como modificadas las líneas de
+    las SALIDAs que cambia. `lote` se limita a LOTE_MAXIMO. `completo`
+    revisa todo desde el inicio, por ejemplo tras corregir Movimientos
+    con un UPDATE directo.
+    """
+    lote = min(lote, LOTE_MAXIMO)
+    hasta = timezone.now() - MARGEN_SEGURIDAD
+    marca, _ = MarcaConciliacion.objects.get_or_create(proceso=PROCESO)
+    if completo:
+        marca.ultima_fecha, marca.ultimo_codigo = None, 0
+    ultima_fecha, ultimo_codigo = marca.ultima_fecha, marca.ultimo_codigo
+    ids_entrada = set(TipoMovimiento.ids_entrada())
+    asignaciones = AsignacionLote.objects.filter(movimiento__isnull=False).select_related('movimiento')
+    resultado = ResultadoConciliacion()
+
+    while True:
+        detalles = DetallePecosa.objects.filter(fecha_modificacion__lt=hasta)
+        if ultima_fecha is not None:
+            detalles = detalles.filter(
+                Q(fecha_modificacion__gt=ultima_fecha)
+                | Q(fecha_modificacion=ultima_fecha, cod_detalle_pecosa__gt=ultimo_codigo)
+            )
+        detalles = list(
+            detalles.select_related('pecosa__ronda', 'pecosa__estado', 'movimiento')
+            .prefetch_related(Prefetch('asignaciones_lote', queryset=asignaciones, to_attr='salidas_lote'))
+            .order_by('fecha_modificacion', 'cod_detalle_pecosa')[:lote]
+        )
+        if not detalles:
+            break
+
+        ahora = timezone.now()
+        diferencias = []
+        for detalle in detalles:
+            diferencia = _conciliar(detalle, ids_entrada, ahora)
+            periodo, prometida, despachada = _periodo(detalle), detalle.cantidad, 0
+            if diferencia is not None:
+                diferencias.append(diferencia)
+                despachada = diferencia.cantidad_despachada
+            elif detalle.movimiento_id is not None:
+                despachada = prometida
+            totales = resultado.resumen[(periodo, detalle.producto_id)]
+            totales[0] += prometida
+            totales[1] += despachada
+            totales[2] += diferencia is not None
+
+        ultima_fecha, ultimo_codigo = detalles[-1].fecha_modificacion, detalles[-1].pk
+        with transaction.atomic():
+            ConciliacionEntrega.objects.filter(detalle_pecosa__in=detalles).delete()
+            ConciliacionEntrega.objects.bulk_create(diferencias)
+            marca.ultima_fecha, marca.ultimo_codigo = ultima_fecha, ultimo_codigo
+            marca.save()
+        resultado.revisadas += len(detalles)
+        resultado.diferencias += len(diferencias)
+
+    if completo and not resultado.revisadas:
+        marca.save()
+    return resultado
+
+
+def _periodo(detalle):
+    pecosa = detalle.pecosa
+    if pecosa.ronda_id is not None:
+        return pecosa.ronda.periodo
+    return timezone.localtime(pecosa.fecha_registro).date().replace(day=1)
+
+
+def _conciliar(detalle, ids_entrada, ahora):
+    """Devuelve la ConciliacionEntrega de la línea, o None si cuadra."""
+    salidas = [asignacion.movimiento for asignacion in detalle.salidas_lote]
+    if not salidas and detalle.movimiento is not None:
+        salidas = [detalle.movimiento]
+    despachada = sum(
+        movimiento.cantidad for movimiento in salidas if movimiento.tipo_movimiento_id not in ids_entrada
+    )
+    abreviatura = detalle.pecosa.estado.abreviatura
+
+    if abreviatura not in (ESTADO_APROBADA, ESTADO_ENTREGADA):
+        motivo = ConciliacionEntrega.NO_APROBADA if salidas else None
+    elif not salidas:
+        motivo = ConciliacionEntrega.SIN_SALIDA
+    elif any(
+        movimiento.producto_id != detalle.producto_id or movimiento.tipo_movimiento_id in ids_entrada
+        for movimiento in salidas
+    ):
+        motivo = ConciliacionEntrega.PRODUCTO
+    elif despachada != detalle.cantidad:
+        motivo = ConciliacionEntrega.CANTIDAD
+    else:
+        motivo = None
+
+    if motivo is None:
+        return None
+    return ConciliacionEntrega(
+        detalle_pecosa=detalle,
+        producto_id=detalle.producto_id,
+        periodo=_periodo(detalle),
+        cantidad_prometida=detalle.cantidad,
+        cantidad_despachada=despachada,
+        motivo=motivo,
+        fecha_revision=ahora,
+    )
@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import django
+from django.db import connections
+from django.db.models import Prefetch
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import DetallePecosa
+
+try:
+    from weasyprint import HTML
+except ImportError:  # sin weasyprint se generan HTML listos para imprimir desde el navegador
+    HTML = None
+
+PLANTILLA = 'distribucion/pecosa_impresion.html'
+
+
+def datos_impresion(pecosas):
+    """
+    Lee los datos de impresión de `pecosas` (queryset) con una consulta
+    para las cabeceras (with_totals) y un prefetch para las líneas, y los
+    devuelve como diccionarios simples: los procesos que renderizan no
+    tocan la base de datos.
+    """
+    pecosas = (
+        pecosas.with_totals()
+        .select_related('asociacion__sector_zona__zona', 'asociacion__sector_zona__sector', 'ronda')
+        .prefetch_related(
+            Prefetch('detalles', queryset=DetallePecosa.objects.select_related('producto__unidad_medida'))
+        )
+        .order_by('numero_pecosa', 'cod_pecosa')
+    )
+    documentos = []
+    for pecosa in pecosas:
+        presidenta = pecosa.socio_presidenta.persona
+        documentos.append({
+            'cod_pecosa': pecosa.cod_pecosa,
+            'numero_pecosa': pecosa.numero_pecosa or f'SN-{pecosa.cod_pecosa}',
+            'periodo': pecosa.ronda.periodo if pecosa.ronda_id else None,
+            'fecha_emision': timezone.localtime(pecosa.fecha_reparto or pecosa.fecha_registro).date(),
+            'estado': pecosa.estado.descripcion,
+            'asociacion': {
+                'codigo': pecosa.asociacion.codigo_asociacion,
+                'nombre': pecosa.asociacion.nombre_asociacion or pecosa.asociacion.codigo_asociacion,
+                'direccion': pecosa.asociacion.direccion,
+                'sector_zona': str(pecosa.asociacion.sector_zona),
+            },
+            'presidenta': {'nombre_completo': presidenta.nombre_completo, 'dni': presidenta.dni},
+            'lineas': [
+                {
+                    'producto': detalle.producto.descripcion,
+                    'unidad': detalle.producto.unidad_medida.descripcion,
+                    'cantidad': detalle.cantidad,
+                    'precio_unitario': detalle.precio_unitario,
+                    'importe': detalle.cantidad * detalle.precio_unitario,
+                }
+                for detalle in pecosa.detalles.all()
+            ],
+            'cantidad_items': pecosa.cantidad_items,
+            'total': pecosa.monto_total,
+        })
+    return documentos
+
+
+def imprimir_pecosas(pecosas, destino, procesos=None):
+    """
+    Genera un documento por PECOSA de `pecosas` (queryset) en el
+    directorio `destino`: PDF si weasyprint está instalado, si no HTML.
+    Los datos se leen una sola vez (datos_impresion) y el renderizado
+    se reparte entre `procesos` procesos (por defecto, uno por núcleo).
+    Pensado para comandos y tareas en segundo plano, no para una vista.
+    Devuelve las rutas generadas, en el orden de numeración.
+    """
+    documentos = datos_impresion(pecosas)
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    if not documentos:
+        return []
+    procesos = min(procesos or os.cpu_count() or 1, len(documentos))
+    trabajos = [(documento, str(destino)) for documento in documentos]
+    if procesos == 1:
+        return [_renderizar(trabajo) for trabajo in trabajos]
+
+    # Un proceso hijo no debe heredar las conexiones abiertas del padre.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso) as executor:
+        return list(executor.map(_renderizar, trabajos, chunksize=max(1, len(trabajos) // (procesos * 4))))
+
+
+def _iniciar_proceso():
+    # Con el método 'spawn' el proceso arranca sin Django configurado.
+    django.setup()
+
+
+def _renderizar(trabajo):
+    documento, destino = trabajo
+    html = render_to_string(PLANTILLA, {'pecosa': documento})
+    if HTML is None:
+        ruta = Path(destino) / f'{documento["numero_pecosa"]}.html'
+        ruta.write_text(html, encoding='utf-8')
+    else:
+        ruta = Path(destino) / f'{documento["numero_pecosa"]}.pdf'
+        HTML(string=html).write_pdf(ruta)
+    return str(ruta)
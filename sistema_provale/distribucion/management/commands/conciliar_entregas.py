@@ -0,0 +1,48 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from distribucion.conciliacion import conciliar_entregas
+from inventario.models import Producto
+
+
+class Command(BaseCommand):
+    help = (
+        "Concilia las lineas de PECOSA con las SALIDAs registradas para ellas y registra las diferencias; "
+        "solo revisa las lineas modificadas desde la ultima ejecucion"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=1000,
+            help="Numero de lineas de PECOSA procesadas por transaccion (maximo 2000)",
+        )
+        parser.add_argument(
+            "--completo",
+            action="store_true",
+            help="Revisa todas las lineas desde el inicio, no solo las modificadas",
+        )
+
+    def handle(self, *args, **options):
+        inicio = perf_counter()
+        resultado = conciliar_entregas(lote=options["lote"], completo=options["completo"])
+        segundos = perf_counter() - inicio
+
+        productos = Producto.objects.in_bulk({producto_id for _, producto_id in resultado.resumen})
+        for (periodo, producto_id), (prometida, despachada, diferencias) in sorted(resultado.resumen.items()):
+            linea = (
+                f"{periodo:%Y-%m} {productos[producto_id].descripcion}: "
+                f"prometido {prometida}, despachado {despachada}"
+            )
+            if diferencias:
+                self.stdout.write(self.style.WARNING(f"{linea} ({diferencias} lineas con diferencias)"))
+            else:
+                self.stdout.write(linea)
+
+        resumen = f"{resultado.revisadas} lineas revisadas en {segundos:.2f} s"
+        if resultado.diferencias:
+            self.stdout.write(self.style.WARNING(f"{resumen}; {resultado.diferencias} con diferencias"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{resumen}; sin diferencias"))
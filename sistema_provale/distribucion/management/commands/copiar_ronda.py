@@ -0,0 +1,88 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from distribucion.models import RondaDistribucion
+from distribucion.services import copiar_ronda
+from inventario.models import Almacen
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia las PECOSAs de una ronda a otro mes como PECOSAs pendientes, con las cantidades "
+        "escaladas y los precios actuales de los productos"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "origen",
+            help="Mes de la ronda a copiar, en formato AAAA-MM",
+        )
+        parser.add_argument(
+            "periodo",
+            help="Mes de la nueva ronda, en formato AAAA-MM",
+        )
+        parser.add_argument(
+            "--factor",
+            default="1",
+            help="Factor aplicado a cada cantidad (por ejemplo 1.10), redondeado a enteros",
+        )
+        parser.add_argument(
+            "--pecosa",
+            type=int,
+            action="append",
+            help="Codigo de PECOSA de la ronda de origen a copiar (se puede repetir; por defecto, todas)",
+        )
+        parser.add_argument(
+            "--fecha-reparto",
+            help="Fecha de reparto, en formato AAAA-MM-DD",
+        )
+        parser.add_argument(
+            "--almacen",
+            type=int,
+            help="Codigo del almacen de despacho (por defecto, el de cada PECOSA copiada)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            origen = datetime.strptime(options["origen"], "%Y-%m").date()
+            periodo = datetime.strptime(options["periodo"], "%Y-%m").date()
+        except ValueError:
+            raise CommandError("Los periodos deben tener el formato AAAA-MM")
+        try:
+            factor = Decimal(options["factor"])
+        except InvalidOperation:
+            raise CommandError(f"Factor invalido: {options['factor']}")
+        if factor <= 0:
+            raise CommandError("El factor debe ser mayor que cero")
+
+        fecha_reparto = None
+        if options["fecha_reparto"]:
+            try:
+                fecha_reparto = timezone.make_aware(datetime.strptime(options["fecha_reparto"], "%Y-%m-%d"))
+            except ValueError:
+                raise CommandError("La fecha de reparto debe tener el formato AAAA-MM-DD")
+
+        almacen = None
+        if options["almacen"] is not None:
+            almacen = Almacen.objects.filter(pk=options["almacen"]).first()
+            if almacen is None:
+                raise CommandError(f"No existe el almacen {options['almacen']}")
+
+        ronda = RondaDistribucion.objects.filter(periodo=origen).first()
+        if ronda is None:
+            raise CommandError(f"No existe la ronda {origen:%Y-%m}")
+        pecosas = ronda.pecosas.filter(pk__in=options["pecosa"]) if options["pecosa"] else None
+        try:
+            resultado = copiar_ronda(
+                ronda, periodo, pecosas, factor=factor, fecha_reparto=fecha_reparto, almacen=almacen
+            )
+        except ValidationError as error:
+            raise CommandError(" ".join(error.messages))
+
+        for asociacion, motivo in resultado.omitidas:
+            self.stdout.write(self.style.WARNING(f"{asociacion}: {motivo}"))
+        self.stdout.write(self.style.SUCCESS(f"{resultado.ronda}: {resultado.creadas} PECOSAs copiadas de {ronda}"))
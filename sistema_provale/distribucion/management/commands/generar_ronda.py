@@ -0,0 +1,87 @@
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from distribucion.services import generar_ronda
+from inventario.models import Almacen, Producto
+
+
+class Command(BaseCommand):
+    help = "Genera la ronda mensual de PECOSAs: una por asociacion activa, con cantidades por socio"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "periodo",
+            help="Mes de la ronda, en formato AAAA-MM",
+        )
+        parser.add_argument(
+            "--linea",
+            action="append",
+            required=True,
+            metavar="PRODUCTO:CANTIDAD",
+            help="Codigo de producto y cantidad por socio activo (se puede repetir)",
+        )
+        parser.add_argument(
+            "--fecha-reparto",
+            help="Fecha de reparto, en formato AAAA-MM-DD",
+        )
+        parser.add_argument(
+            "--sin-salidas",
+            action="store_true",
+            help="Deja las PECOSAs pendientes con el stock reservado, sin aprobarlas ni registrar SALIDAs",
+        )
+        parser.add_argument(
+            "--almacen",
+            type=int,
+            help="Codigo del almacen de despacho, del que salen las SALIDAs al aprobar las PECOSAs",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            periodo = datetime.strptime(options["periodo"], "%Y-%m").date()
+        except ValueError:
+            raise CommandError("El periodo debe tener el formato AAAA-MM")
+
+        fecha_reparto = None
+        if options["fecha_reparto"]:
+            try:
+                fecha_reparto = timezone.make_aware(datetime.strptime(options["fecha_reparto"], "%Y-%m-%d"))
+            except ValueError:
+                raise CommandError("La fecha de reparto debe tener el formato AAAA-MM-DD")
+
+        cantidades = {}
+        for linea in options["linea"]:
+            codigo, _, cantidad = linea.partition(":")
+            if not codigo.isdigit() or not cantidad.isdigit():
+                raise CommandError(f"Linea invalida: {linea} (use PRODUCTO:CANTIDAD)")
+            cantidades[int(codigo)] = int(cantidad)
+        productos = Producto.objects.in_bulk(list(cantidades))
+        faltantes = sorted(set(cantidades) - set(productos))
+        if faltantes:
+            raise CommandError(f"Productos inexistentes: {', '.join(map(str, faltantes))}")
+
+        almacen = None
+        if options["almacen"] is not None:
+            almacen = Almacen.objects.filter(pk=options["almacen"]).first()
+            if almacen is None:
+                raise CommandError(f"No existe el almacen {options['almacen']}")
+
+        self.stdout.write(f"Generando ronda {periodo:%Y-%m}...")
+        try:
+            resultado = generar_ronda(
+                periodo,
+                [(productos[codigo], cantidad) for codigo, cantidad in cantidades.items()],
+                fecha_reparto=fecha_reparto,
+                contabilizar=not options["sin_salidas"],
+                almacen=almacen,
+            )
+        except ValidationError as error:
+            raise CommandError(" ".join(error.messages))
+
+        for asociacion, motivo in resultado.omitidas:
+            self.stdout.write(self.style.WARNING(f"{asociacion}: {motivo}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado.ronda}: {resultado.creadas} PECOSAs creadas, {resultado.aprobadas} aprobadas"
+        ))
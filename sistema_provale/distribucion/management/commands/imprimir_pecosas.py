@@ -0,0 +1,58 @@
+from datetime import datetime
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from distribucion.impresion import HTML, imprimir_pecosas
+from distribucion.models import Pecosa
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera los documentos imprimibles (PDF, o HTML sin weasyprint) de las PECOSAs de una ronda "
+        "o de los codigos indicados, repartiendo el trabajo entre varios procesos"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "destino",
+            help="Directorio donde se escriben los documentos",
+        )
+        parser.add_argument(
+            "--ronda",
+            help="Mes de la ronda, en formato AAAA-MM",
+        )
+        parser.add_argument(
+            "--pecosa",
+            type=int,
+            action="append",
+            help="Codigo de PECOSA (se puede repetir)",
+        )
+        parser.add_argument(
+            "--procesos",
+            type=int,
+            default=None,
+            help="Numero de procesos (por defecto, uno por nucleo)",
+        )
+
+    def handle(self, *args, **options):
+        pecosas = Pecosa.objects.all()
+        if options["ronda"]:
+            try:
+                periodo = datetime.strptime(options["ronda"], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("La ronda debe tener el formato AAAA-MM")
+            pecosas = pecosas.filter(ronda__periodo=periodo)
+        if options["pecosa"]:
+            pecosas = pecosas.filter(pk__in=options["pecosa"])
+        if not options["ronda"] and not options["pecosa"]:
+            raise CommandError("Indique --ronda o al menos un --pecosa")
+
+        if HTML is None:
+            self.stdout.write(self.style.WARNING("weasyprint no esta instalado: se generan documentos HTML"))
+        inicio = perf_counter()
+        rutas = imprimir_pecosas(pecosas, options["destino"], procesos=options["procesos"])
+        segundos = perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(rutas)} documentos generados en {options['destino']} ({segundos:.1f} s)"
+        ))
@@ -0,0 +1,83 @@
+from datetime import datetime
+from time import perf_counter
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from distribucion.planificacion import crear_borradores, planificar
+from inventario.models import Almacen, Producto
+
+
+class Command(BaseCommand):
+    help = (
+        "Planifica el reparto del stock disponible entre las asociaciones segun sus beneficiarios "
+        "y la prioridad de cada tipo de beneficio; con --crear genera las PECOSAs pendientes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "periodo",
+            help="Mes de la ronda, en formato AAAA-MM",
+        )
+        parser.add_argument(
+            "--racion",
+            action="append",
+            required=True,
+            metavar="TIPO:PRODUCTO:CANTIDAD",
+            help="Codigo de tipo de beneficio, codigo de producto y cantidad por beneficiario (se puede repetir)",
+        )
+        parser.add_argument(
+            "--crear",
+            action="store_true",
+            help="Genera las PECOSAs pendientes del plan (sin esta opcion solo se muestra el plan)",
+        )
+        parser.add_argument(
+            "--almacen",
+            type=int,
+            help="Codigo del almacen de despacho, del que salen las SALIDAs al aprobar las PECOSAs",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            periodo = datetime.strptime(options["periodo"], "%Y-%m").date()
+        except ValueError:
+            raise CommandError("El periodo debe tener el formato AAAA-MM")
+
+        almacen = None
+        if options["almacen"] is not None:
+            almacen = Almacen.objects.filter(pk=options["almacen"]).first()
+            if almacen is None:
+                raise CommandError(f"No existe el almacen {options['almacen']}")
+
+        raciones = {}
+        prioridades = {}
+        for racion in options["racion"]:
+            partes = racion.split(":")
+            if len(partes) != 3 or not all(parte.isdigit() for parte in partes):
+                raise CommandError(f"Racion invalida: {racion} (use TIPO:PRODUCTO:CANTIDAD)")
+            tipo_id, producto_id, cantidad = map(int, partes)
+            raciones[(tipo_id, producto_id)] = cantidad
+            prioridades.setdefault(producto_id, len(prioridades) + 1)
+
+        inicio = perf_counter()
+        plan = planificar(raciones)
+        segundos = perf_counter() - inicio
+
+        productos = Producto.objects.in_bulk(plan.productos)
+        demanda = plan.demanda.sum(axis=0)
+        asignado = plan.asignado.sum(axis=0)
+        for j, producto_id in enumerate(plan.productos):
+            self.stdout.write(
+                f"{productos[producto_id].descripcion}: stock {plan.stock[j]}, demanda {demanda[j]}, asignado {asignado[j]}"
+            )
+        self.stdout.write(f"{len(plan.asociaciones)} asociaciones planificadas en {segundos:.3f} s")
+
+        if not options["crear"]:
+            return
+        try:
+            pecosas, omitidas = crear_borradores(plan, periodo, prioridades, almacen=almacen)
+        except ValidationError as error:
+            raise CommandError(" ".join(error.messages))
+        for asociacion, motivo in omitidas:
+            self.stdout.write(self.style.WARNING(f"{asociacion}: {motivo}"))
+        self.stdout.write(self.style.SUCCESS(f"{len(pecosas)} PECOSAs pendientes creadas para {periodo:%Y-%m}"))
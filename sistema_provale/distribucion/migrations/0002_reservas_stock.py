@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distribucion', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detallepecosa',
+            name='cantidad_reservada',
+            field=models.IntegerField(db_column='cantidadReservada', default=0, editable=False),
+        ),
+    ]
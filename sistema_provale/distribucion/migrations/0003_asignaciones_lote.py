@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distribucion', '0002_reservas_stock'),
+        ('inventario', '0007_lotes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AsignacionLote',
+            fields=[
+                ('cod_asignacion_lote', models.AutoField(db_column='codAsignacionLote', primary_key=True, serialize=False)),
+                ('cantidad', models.IntegerField(db_column='cantidad')),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')),
+                ('detalle_pecosa', models.ForeignKey(db_column='codDetallePecosa', on_delete=django.db.models.deletion.CASCADE, related_name='asignaciones_lote', to='distribucion.detallepecosa')),
+                ('lote', models.ForeignKey(db_column='codLote', on_delete=django.db.models.deletion.PROTECT, related_name='asignaciones', to='inventario.lote')),
+            ],
+            options={
+                'verbose_name': 'Asignación de Lote',
+                'verbose_name_plural': 'Asignaciones de Lote',
+                'db_table': 'AsignacionesLote',
+                'ordering': ['detalle_pecosa', 'lote__fecha_vencimiento'],
+            },
+        ),
+    ]
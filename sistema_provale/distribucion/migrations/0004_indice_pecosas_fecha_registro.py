@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asociaciones', '0002_initial'),
+        ('core', '0001_initial'),
+        ('distribucion', '0003_asignaciones_lote'),
+        ('personas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pecosa',
+            index=models.Index(fields=['-fecha_registro', '-cod_pecosa'], name='IX_Pecosas_fecha_registro'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asociaciones', '0002_initial'),
+        ('core', '0001_initial'),
+        ('distribucion', '0004_indice_pecosas_fecha_registro'),
+        ('inventario', '0009_valorizacion_costo_promedio'),
+        ('personas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RondaDistribucion',
+            fields=[
+                ('cod_ronda', models.AutoField(db_column='codRonda', primary_key=True, serialize=False)),
+                ('periodo', models.DateField(db_column='periodo', unique=True)),
+                ('observacion', models.CharField(blank=True, db_column='observacion', max_length=255, null=True)),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')),
+            ],
+            options={
+                'verbose_name': 'Ronda de Distribución',
+                'verbose_name_plural': 'Rondas de Distribución',
+                'db_table': 'RondasDistribucion',
+                'ordering': ['-periodo'],
+            },
+        ),
+        migrations.AddField(
+            model_name='detallepecosa',
+            name='movimiento',
+            field=models.ForeignKey(blank=True, db_column='codMovimiento', editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='detalles_pecosa', to='inventario.movimiento'),
+        ),
+        migrations.AddField(
+            model_name='pecosa',
+            name='ronda',
+            field=models.ForeignKey(blank=True, db_column='codRonda', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='pecosas', to='distribucion.rondadistribucion'),
+        ),
+        migrations.AddConstraint(
+            model_name='pecosa',
+            constraint=models.UniqueConstraint(condition=models.Q(('ronda__isnull', False)), fields=('ronda', 'asociacion'), name='UQ_Pecosas_ronda_asociacion'),
+        ),
+    ]
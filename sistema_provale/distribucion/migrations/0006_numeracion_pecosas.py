@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('asociaciones', '0002_initial'),
+        ('core', '0001_initial'),
+        ('distribucion', '0005_rondas_distribucion'),
+        ('personas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BloqueNumeracion',
+            fields=[
+                ('cod_bloque', models.AutoField(db_column='codBloque', primary_key=True, serialize=False)),
+                ('numero_desde', models.IntegerField(db_column='numeroDesde')),
+                ('numero_hasta', models.IntegerField(db_column='numeroHasta')),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')),
+            ],
+            options={
+                'verbose_name': 'Bloque de Numeración',
+                'verbose_name_plural': 'Bloques de Numeración',
+                'db_table': 'BloquesNumeracion',
+                'ordering': ['serie', 'numero_desde'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SeriePecosa',
+            fields=[
+                ('cod_serie', models.AutoField(db_column='codSerie', primary_key=True, serialize=False)),
+                ('serie', models.CharField(db_column='serie', max_length=4, unique=True)),
+                ('ultimo_numero', models.IntegerField(db_column='ultimoNumero', default=0)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, db_column='fechaActualizacion')),
+            ],
+            options={
+                'verbose_name': 'Serie de PECOSA',
+                'verbose_name_plural': 'Series de PECOSA',
+                'db_table': 'SeriesPecosa',
+                'ordering': ['-serie'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='pecosa',
+            constraint=models.UniqueConstraint(condition=models.Q(('numero_pecosa__isnull', False)), fields=('numero_pecosa',), name='UQ_Pecosas_numero'),
+        ),
+        migrations.AddField(
+            model_name='bloquenumeracion',
+            name='serie',
+            field=models.ForeignKey(db_column='codSerie', on_delete=django.db.models.deletion.PROTECT, related_name='bloques', to='distribucion.seriepecosa'),
+        ),
+    ]
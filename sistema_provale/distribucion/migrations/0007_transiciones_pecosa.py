@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('distribucion', '0006_numeracion_pecosas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransicionPecosa',
+            fields=[
+                ('cod_transicion', models.AutoField(db_column='codTransicion', primary_key=True, serialize=False)),
+                ('observacion', models.CharField(blank=True, db_column='observacion', max_length=255, null=True)),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')),
+                ('estado_destino', models.ForeignKey(db_column='codEstadoDestino', on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.estado')),
+                ('estado_origen', models.ForeignKey(db_column='codEstadoOrigen', on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.estado')),
+                ('pecosa', models.ForeignKey(db_column='codPecosa', on_delete=django.db.models.deletion.CASCADE, related_name='transiciones', to='distribucion.pecosa')),
+                ('usuario', models.ForeignKey(blank=True, db_column='codUsuario', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='transiciones_pecosa', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Transición de PECOSA',
+                'verbose_name_plural': 'Transiciones de PECOSA',
+                'db_table': 'TransicionesPecosa',
+                'ordering': ['pecosa', 'fecha_registro'],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distribucion', '0007_transiciones_pecosa'),
+        ('inventario', '0009_valorizacion_costo_promedio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asignacionlote',
+            name='movimiento',
+            field=models.ForeignKey(blank=True, db_column='codMovimiento', editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='asignaciones_lote', to='inventario.movimiento'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distribucion', '0008_salidas_por_lote'),
+        ('inventario', '0009_valorizacion_costo_promedio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConciliacionEntrega',
+            fields=[
+                ('cod_conciliacion', models.AutoField(db_column='codConciliacion', primary_key=True, serialize=False)),
+                ('periodo', models.DateField(db_column='periodo')),
+                ('cantidad_prometida', models.IntegerField(db_column='cantidadPrometida')),
+                ('cantidad_despachada', models.IntegerField(db_column='cantidadDespachada')),
+                ('motivo', models.CharField(choices=[('SIN_SALIDA', 'PECOSA aprobada sin SALIDA'), ('CANTIDAD', 'Cantidad despachada distinta'), ('PRODUCTO', 'SALIDA de otro producto'), ('NO_APROBADA', 'SALIDA de PECOSA no aprobada')], db_column='motivo', max_length=12)),
+                ('fecha_revision', models.DateTimeField(db_column='fechaRevision')),
+            ],
+            options={
+                'verbose_name': 'Conciliación de Entrega',
+                'verbose_name_plural': 'Conciliaciones de Entrega',
+                'db_table': 'ConciliacionesEntrega',
+                'ordering': ['-periodo', 'producto'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MarcaConciliacion',
+            fields=[
+                ('cod_marca', models.AutoField(db_column='codMarca', primary_key=True, serialize=False)),
+                ('proceso', models.CharField(db_column='proceso', max_length=50, unique=True)),
+                ('ultima_fecha', models.DateTimeField(blank=True, db_column='ultimaFecha', null=True)),
+                ('ultimo_codigo', models.IntegerField(db_column='ultimoCodigo', default=0)),
+                ('fecha_ejecucion', models.DateTimeField(auto_now=True, db_column='fechaEjecucion')),
+            ],
+            options={
+                'verbose_name': 'Marca de Conciliación',
+                'verbose_name_plural': 'Marcas de Conciliación',
+                'db_table': 'MarcasConciliacion',
+                'ordering': ['proceso'],
+            },
+        ),
+        migrations.AddField(
+            model_name='detallepecosa',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, db_column='fechaModificacion'),
+        ),
+        migrations.AddIndex(
+            model_name='detallepecosa',
+            index=models.Index(fields=['fecha_modificacion', 'cod_detalle_pecosa'], name='IX_DetallePecosa_modificacion'),
+        ),
+        migrations.AddField(
+            model_name='conciliacionentrega',
+            name='detalle_pecosa',
+            field=models.OneToOneField(db_column='codDetallePecosa', on_delete=django.db.models.deletion.CASCADE, related_name='conciliacion', to='distribucion.detallepecosa'),
+        ),
+        migrations.AddField(
+            model_name='conciliacionentrega',
+            name='producto',
+            field=models.ForeignKey(db_column='codProducto', on_delete=django.db.models.deletion.PROTECT, related_name='conciliaciones_entrega', to='inventario.producto'),
+        ),
+        migrations.AddIndex(
+            model_name='conciliacionentrega',
+            index=models.Index(fields=['periodo', 'producto'], name='IX_Conciliaciones_periodo'),
+        ),
+    ]
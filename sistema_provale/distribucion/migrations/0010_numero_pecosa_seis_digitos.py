@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distribucion', '0009_conciliacion_entregas'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pecosa',
+            name='numero_pecosa',
+            field=models.CharField(blank=True, db_column='numeroPecosa', max_length=10, null=True),
+        ),
+    ]
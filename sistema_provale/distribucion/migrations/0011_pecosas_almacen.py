@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distribucion', '0010_numero_pecosa_seis_digitos'),
+        ('inventario', '0011_movimientos_transferencia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pecosa',
+            name='almacen',
+            field=models.ForeignKey(blank=True, db_column='codAlmacen', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='pecosas', to='inventario.almacen'),
+        ),
+    ]
@@ -1,15 +1,116 @@
-from django.db import models
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from core.models import Estado
 from asociaciones.models import Asociacion
 from personas.models import Socio
-from inventario.models import Producto
+from inventario.models import Almacen, Lote, Movimiento, Producto
+
+
+class RondaDistribucion(models.Model):
+    """
+    Tabla: RondasDistribucion
+    Reparto mensual: agrupa las PECOSAs emitidas para un período
+    (primer día del mes) con distribucion.services.generar_ronda.
+    """
+    cod_ronda = models.AutoField(primary_key=True, db_column='codRonda')
+    periodo = models.DateField(unique=True, db_column='periodo')
+    observacion = models.CharField(max_length=255, null=True, blank=True, db_column='observacion')
+    fecha_registro = models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')
+
+    class Meta:
+        db_table = 'RondasDistribucion'
+        verbose_name = 'Ronda de Distribución'
+        verbose_name_plural = 'Rondas de Distribución'
+        ordering = ['-periodo']
+
+    def __str__(self):
+        return f'Ronda {self.periodo:%Y-%m}'
+
+
+class SeriePecosa(models.Model):
+    """
+    Tabla: SeriesPecosa
+    Correlativo de numeroPecosa por serie (el año, AAAA). ultimoNumero
+    se incrementa con distribucion.services.reservar_numeros dentro de la
+    transacción que usa los números, de modo que la numeración no deja
+    huecos ni repite valores.
+    """
+    cod_serie = models.AutoField(primary_key=True, db_column='codSerie')
+    serie = models.CharField(max_length=4, unique=True, db_column='serie')
+    ultimo_numero = models.IntegerField(default=0, db_column='ultimoNumero')
+    fecha_actualizacion = models.DateTimeField(auto_now=True, db_column='fechaActualizacion')
+
+    class Meta:
+        db_table = 'SeriesPecosa'
+        verbose_name = 'Serie de PECOSA'
+        verbose_name_plural = 'Series de PECOSA'
+        ordering = ['-serie']
+
+    def __str__(self):
+        return f'{self.serie} (último {self.ultimo_numero})'
+
+
+class BloqueNumeracion(models.Model):
+    """
+    Tabla: BloquesNumeracion
+    Auditoría de los rangos de numeroPecosa entregados por
+    reservar_numeros. Se inserta en la misma transacción que los usa:
+    un bloque revertido no queda registrado ni consumido.
+    """
+    cod_bloque = models.AutoField(primary_key=True, db_column='codBloque')
+    serie = models.ForeignKey(
+        SeriePecosa,
+        on_delete=models.PROTECT,
+        db_column='codSerie',
+        related_name='bloques'
+    )
+    numero_desde = models.IntegerField(db_column='numeroDesde')
+    numero_hasta = models.IntegerField(db_column='numeroHasta')
+    fecha_registro = models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')
+
+    class Meta:
+        db_table = 'BloquesNumeracion'
+        verbose_name = 'Bloque de Numeración'
+        verbose_name_plural = 'Bloques de Numeración'
+        ordering = ['serie', 'numero_desde']
+
+    def __str__(self):
+        return f'{self.serie.serie}: {self.numero_desde}-{self.numero_hasta}'
+
+
+class PecosaQuerySet(models.QuerySet):
+
+    def with_totals(self):
+        """
+        Anota monto_total, numero_lineas y cantidad_items de cada PECOSA
+        con una sola consulta agrupada sobre DetallePecosa (LEFT JOIN +
+        GROUP BY) y trae asociacion, presidenta y estado por JOIN, de modo
+        que un listado no ejecuta consultas adicionales por fila.
+        """
+        return self.select_related('asociacion', 'socio_presidenta__persona', 'estado').annotate(
+            monto_total=Coalesce(
+                models.Sum(
+                    models.F('detalles__cantidad') * models.F('detalles__precio_unitario'),
+                    output_field=models.DecimalField(max_digits=14, decimal_places=2)
+                ),
+                models.Value(0),
+                output_field=models.DecimalField(max_digits=14, decimal_places=2)
+            ),
+            numero_lineas=models.Count('detalles'),
+            cantidad_items=Coalesce(models.Sum('detalles__cantidad'), models.Value(0)),
+        )
 
 
 class Pecosa(models.Model):
     """
     Tabla: Pecosas
     Documento de distribución (PECOSA = Pedido de Comprobante de Salida)
-    emitido por asociación, con la presidenta responsable.
+    emitido por asociación, con la presidenta responsable. Las SALIDAs
+    de sus líneas se registran en el almacén de despacho al aprobarla.
     CORRECCIÓN 3FN: FK a Estado ahora declarada explícitamente.
     """
     cod_pecosa = models.AutoField(primary_key=True, db_column='codPecosa')
@@ -19,13 +120,29 @@ class Pecosa(models.Model):
         db_column='codAsociacion',
         related_name='pecosas'
     )
-    numero_pecosa = models.CharField(max_length=8, null=True, blank=True, db_column='numeroPecosa')
+    ronda = models.ForeignKey(
+        RondaDistribucion,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_column='codRonda',
+        related_name='pecosas'
+    )
+    numero_pecosa = models.CharField(max_length=10, null=True, blank=True, db_column='numeroPecosa')
     socio_presidenta = models.ForeignKey(
         Socio,
         on_delete=models.PROTECT,
         db_column='codSocioPresidenta',
         related_name='pecosas_como_presidenta'
     )
+    almacen = models.ForeignKey(
+        Almacen,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_column='codAlmacen',
+        related_name='pecosas'
+    )
     fecha_reparto = models.DateTimeField(null=True, blank=True, db_column='fechaReparto')
     fecha_registro = models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')
     observacion = models.CharField(max_length=255, null=True, blank=True, db_column='observacion')
@@ -36,18 +153,72 @@ class Pecosa(models.Model):
         related_name='pecosas'
     )
 
+    objects = PecosaQuerySet.as_manager()
+
     class Meta:
         db_table = 'Pecosas'
         verbose_name = 'PECOSA'
         verbose_name_plural = 'PECOSAS'
         ordering = ['-fecha_registro']
+        indexes = [
+            models.Index(fields=['-fecha_registro', '-cod_pecosa'], name='IX_Pecosas_fecha_registro'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['numero_pecosa'],
+                condition=models.Q(numero_pecosa__isnull=False),
+                name='UQ_Pecosas_numero'
+            ),
+            # Una PECOSA por asociación y ronda: generar_ronda puede repetirse.
+            models.UniqueConstraint(
+                fields=['ronda', 'asociacion'],
+                condition=models.Q(ronda__isnull=False),
+                name='UQ_Pecosas_ronda_asociacion'
+            ),
+        ]
 
     def __str__(self):
         return f'PECOSA {self.numero_pecosa or self.cod_pecosa} - {self.asociacion}'
 
+    def save(self, *args, **kwargs):
+        """Numera la PECOSA en la serie del año si aún no tiene número."""
+        from .services import numerar_pecosas
+        with transaction.atomic():
+            if not self.numero_pecosa:
+                self.numero_pecosa = None
+                numerar_pecosas([self])
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """
+        Libera el stock y los lotes reservados por sus líneas
+        (el CASCADE no llama a DetallePecosa.delete()). Solo se eliminan
+        PECOSAs pendientes: las aprobadas o entregadas ya tienen SALIDAs
+        registradas y las canceladas se conservan como historial.
+        """
+        from inventario.services import reservar_stock
+        from .services import ESTADO_PENDIENTE, liberar_asignaciones
+        with transaction.atomic():
+            estado = Pecosa.objects.select_for_update().filter(pk=self.pk).values_list(
+                'estado__abreviatura', flat=True
+            ).first()
+            if estado != ESTADO_PENDIENTE:
+                raise ValidationError('Solo se pueden eliminar PECOSAs pendientes.')
+            liberar = defaultdict(int)
+            for producto_id, reservada in self.detalles.values_list('producto_id', 'cantidad_reservada'):
+                liberar[producto_id] -= reservada
+            reservar_stock(liberar)
+            liberar_asignaciones(AsignacionLote.objects.filter(detalle_pecosa__pecosa=self))
+            return super().delete(*args, **kwargs)
+
     @property
     def total(self):
-        """Suma del valor total de todos los productos en esta PECOSA."""
+        """
+        Suma del valor total de todos los productos en esta PECOSA.
+        Usa la anotación de Pecosa.objects.with_totals() si está presente.
+        """
+        if hasattr(self, 'monto_total'):
+            return self.monto_total
         return self.detalles.aggregate(
             total=models.Sum(
                 models.ExpressionWrapper(
@@ -58,6 +229,127 @@ class Pecosa(models.Model):
         )['total'] or 0
 
 
+class ConciliacionEntrega(models.Model):
+    """
+    Tabla: ConciliacionesEntrega
+    Diferencias entre lo que promete cada línea de PECOSA y las SALIDAs
+    registradas para ella, según la última conciliación
+    (distribucion.conciliacion). Una línea que vuelve a cuadrar deja de
+    tener fila.
+    """
+    SIN_SALIDA = 'SIN_SALIDA'
+    CANTIDAD = 'CANTIDAD'
+    PRODUCTO = 'PRODUCTO'
+    NO_APROBADA = 'NO_APROBADA'
+    MOTIVO_CHOICES = [
+        (SIN_SALIDA, 'PECOSA aprobada sin SALIDA'),
+        (CANTIDAD, 'Cantidad despachada distinta'),
+        (PRODUCTO, 'SALIDA de otro producto'),
+        (NO_APROBADA, 'SALIDA de PECOSA no aprobada'),
+    ]
+
+    cod_conciliacion = models.AutoField(primary_key=True, db_column='codConciliacion')
+    detalle_pecosa = models.OneToOneField(
+        'DetallePecosa',
+        on_delete=models.CASCADE,
+        db_column='codDetallePecosa',
+        related_name='conciliacion'
+    )
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.PROTECT,
+        db_column='codProducto',
+        related_name='conciliaciones_entrega'
+    )
+    periodo = models.DateField(db_column='periodo')
+    cantidad_prometida = models.IntegerField(db_column='cantidadPrometida')
+    cantidad_despachada = models.IntegerField(db_column='cantidadDespachada')
+    motivo = models.CharField(max_length=12, choices=MOTIVO_CHOICES, db_column='motivo')
+    fecha_revision = models.DateTimeField(db_column='fechaRevision')
+
+    class Meta:
+        db_table = 'ConciliacionesEntrega'
+        verbose_name = 'Conciliación de Entrega'
+        verbose_name_plural = 'Conciliaciones de Entrega'
+        ordering = ['-periodo', 'producto']
+        indexes = [
+            models.Index(fields=['periodo', 'producto'], name='IX_Conciliaciones_periodo'),
+        ]
+
+    def __str__(self):
+        return f'{self.detalle_pecosa}: {self.get_motivo_display()}'
+
+
+class MarcaConciliacion(models.Model):
+    """
+    Tabla: MarcasConciliacion
+    Hasta dónde llegó cada proceso incremental: la última
+    (fechaModificacion, codigo) procesada. Se actualiza en la misma
+    transacción que cada bloque, de modo que un proceso interrumpido
+    continúa donde quedó.
+    """
+    cod_marca = models.AutoField(primary_key=True, db_column='codMarca')
+    proceso = models.CharField(max_length=50, unique=True, db_column='proceso')
+    ultima_fecha = models.DateTimeField(null=True, blank=True, db_column='ultimaFecha')
+    ultimo_codigo = models.IntegerField(default=0, db_column='ultimoCodigo')
+    fecha_ejecucion = models.DateTimeField(auto_now=True, db_column='fechaEjecucion')
+
+    class Meta:
+        db_table = 'MarcasConciliacion'
+        verbose_name = 'Marca de Conciliación'
+        verbose_name_plural = 'Marcas de Conciliación'
+        ordering = ['proceso']
+
+    def __str__(self):
+        return f'{self.proceso}: {self.ultima_fecha} #{self.ultimo_codigo}'
+
+
+class TransicionPecosa(models.Model):
+    """
+    Tabla: TransicionesPecosa
+    Historial de cambios de estado de las PECOSAs, registrado en bloque
+    por distribucion.services.cambiar_estado.
+    """
+    cod_transicion = models.AutoField(primary_key=True, db_column='codTransicion')
+    pecosa = models.ForeignKey(
+        Pecosa,
+        on_delete=models.CASCADE,
+        db_column='codPecosa',
+        related_name='transiciones'
+    )
+    estado_origen = models.ForeignKey(
+        Estado,
+        on_delete=models.PROTECT,
+        db_column='codEstadoOrigen',
+        related_name='+'
+    )
+    estado_destino = models.ForeignKey(
+        Estado,
+        on_delete=models.PROTECT,
+        db_column='codEstadoDestino',
+        related_name='+'
+    )
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_column='codUsuario',
+        related_name='transiciones_pecosa'
+    )
+    observacion = models.CharField(max_length=255, null=True, blank=True, db_column='observacion')
+    fecha_registro = models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')
+
+    class Meta:
+        db_table = 'TransicionesPecosa'
+        verbose_name = 'Transición de PECOSA'
+        verbose_name_plural = 'Transiciones de PECOSA'
+        ordering = ['pecosa', 'fecha_registro']
+
+    def __str__(self):
+        return f'{self.pecosa}: {self.estado_origen.abreviatura} → {self.estado_destino.abreviatura}'
+
+
 class DetallePecosa(models.Model):
     """
     Tabla: DetallePecosa
@@ -65,6 +357,12 @@ class DetallePecosa(models.Model):
     precio unitario histórico y período de validez del precio.
     El precioUnitario aquí es el precio al momento del reparto
     (dato histórico intencional, no viola 3FN).
+
+    Al guardar, la línea reserva su cantidad en StockProductos
+    (cantidadReservada) para que dos PECOSAs simultáneas no comprometan
+    el mismo stock. codMovimiento apunta a la SALIDA que la despachó
+    (distribucion.services.contabilizar_salidas); si salió de varios
+    lotes, a la primera, y cada AsignacionLote a la suya.
     """
     cod_detalle_pecosa = models.AutoField(primary_key=True, db_column='codDetallePecosa')
     producto = models.ForeignKey(
@@ -84,17 +382,143 @@ class DetallePecosa(models.Model):
     fecha_hasta = models.DateTimeField(null=True, blank=True, db_column='fechaHasta')
     cantidad = models.IntegerField(db_column='cantidad')
     precio_unitario = models.DecimalField(max_digits=9, decimal_places=2, db_column='precioUnitario')
+    cantidad_reservada = models.IntegerField(default=0, editable=False, db_column='cantidadReservada')
+    movimiento = models.ForeignKey(
+        Movimiento,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        editable=False,
+        db_column='codMovimiento',
+        related_name='detalles_pecosa'
+    )
     fecha_registro = models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')
+    # Las actualizaciones masivas (update/bulk_update) deben fijarla a mano.
+    fecha_modificacion = models.DateTimeField(auto_now=True, db_column='fechaModificacion')
 
     class Meta:
         db_table = 'DetallePecosa'
         verbose_name = 'Detalle de PECOSA'
         verbose_name_plural = 'Detalles de PECOSA'
         ordering = ['prioridad']
+        indexes = [
+            models.Index(fields=['fecha_modificacion', 'cod_detalle_pecosa'], name='IX_DetallePecosa_modificacion'),
+        ]
 
     def __str__(self):
         return f'{self.pecosa} | {self.producto} x{self.cantidad}'
 
     @property
     def subtotal(self):
-        return self.cantidad * self.precio_unitario
\ No newline at end of file
+        return self.cantidad * self.precio_unitario
+
+    def pecosa_pendiente(self, bloquear=False):
+        """Indica si la PECOSA de la línea sigue pendiente (la única que admite cambios)."""
+        from .services import ESTADO_PENDIENTE
+        pecosas = Pecosa.objects.filter(pk=self.pecosa_id)
+        if bloquear:
+            pecosas = pecosas.select_for_update()
+        return pecosas.values_list('estado__abreviatura', flat=True).first() == ESTADO_PENDIENTE
+
+    def clean(self):
+        """
+        Avisa en el formulario si la PECOSA ya no está pendiente o si no hay
+        stock disponible (la garantía la da save()).
+        """
+        from inventario.models import StockProducto
+        if self.pecosa_id is not None and not self.pecosa_pendiente():
+            raise ValidationError('Solo se pueden agregar o modificar líneas de PECOSAs pendientes.')
+        if self.producto_id is None or self.cantidad is None:
+            return
+        saldo = StockProducto.objects.filter(producto_id=self.producto_id).first()
+        disponible = saldo.disponible if saldo else 0
+        if self.pk is not None:
+            disponible += DetallePecosa.objects.filter(
+                pk=self.pk, producto_id=self.producto_id
+            ).values_list('cantidad_reservada', flat=True).first() or 0
+        if self.cantidad > disponible:
+            raise ValidationError({'cantidad': f'Stock disponible insuficiente ({disponible}).'})
+
+    def save(self, *args, **kwargs):
+        """
+        Ajusta la reserva de stock de la línea en la misma transacción.
+        Si cambian el producto o la cantidad, se liberan los lotes ya
+        asignados y la línea debe volver a asignarse. Solo las PECOSAs
+        pendientes admiten líneas nuevas o cambios: al aprobarse se
+        contabiliza la SALIDA y al cancelarse se libera la reserva, y
+        reservar de nuevo en esos estados dejaría stock retenido.
+        """
+        from inventario.services import reservar_stock
+        from .services import liberar_asignaciones
+        with transaction.atomic():
+            if not self.pecosa_pendiente(bloquear=True):
+                raise ValidationError('Solo se pueden agregar o modificar líneas de PECOSAs pendientes.')
+            cambios = defaultdict(int)
+            if self.pk is not None:
+                anterior = DetallePecosa.objects.select_for_update().filter(pk=self.pk).values_list(
+                    'producto_id', 'cantidad', 'cantidad_reservada'
+                ).first()
+                if anterior is not None:
+                    cambios[anterior[0]] -= anterior[2]
+                    if (anterior[0], anterior[1]) != (self.producto_id, self.cantidad):
+                        liberar_asignaciones(self.asignaciones_lote.all(), eliminar=True)
+            cambios[self.producto_id] += self.cantidad
+            reservar_stock(cambios)
+            self.cantidad_reservada = self.cantidad
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """Libera la reserva de stock y de lotes de la línea antes de eliminarla."""
+        from inventario.services import reservar_stock
+        from .services import liberar_asignaciones
+        with transaction.atomic():
+            reservada = DetallePecosa.objects.select_for_update().filter(pk=self.pk).values_list(
+                'producto_id', 'cantidad_reservada'
+            ).first()
+            if reservada is not None:
+                reservar_stock({reservada[0]: -reservada[1]})
+            liberar_asignaciones(self.asignaciones_lote.all())
+            return super().delete(*args, **kwargs)
+
+
+class AsignacionLote(models.Model):
+    """
+    Tabla: AsignacionesLote
+    Lotes de los que saldrá cada línea de PECOSA, elegidos por
+    vencimiento (FEFO) con distribucion.services.asignar_lotes.
+    codMovimiento es la SALIDA del lote, registrada al aprobar.
+    """
+    cod_asignacion_lote = models.AutoField(primary_key=True, db_column='codAsignacionLote')
+    detalle_pecosa = models.ForeignKey(
+        DetallePecosa,
+        on_delete=models.CASCADE,
+        db_column='codDetallePecosa',
+        related_name='asignaciones_lote'
+    )
+    lote = models.ForeignKey(
+        Lote,
+        on_delete=models.PROTECT,
+        db_column='codLote',
+        related_name='asignaciones'
+    )
+    cantidad = models.IntegerField(db_column='cantidad')
+    movimiento = models.ForeignKey(
+        Movimiento,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        editable=False,
+        db_column='codMovimiento',
+        related_name='asignaciones_lote'
+    )
+    fecha_registro = models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')
+
+    class Meta:
+        db_table = 'AsignacionesLote'
+        verbose_name = 'Asignación de Lote'
+        verbose_name_plural = 'Asignaciones de Lote'
+        ordering = ['detalle_pecosa', 'lote__fecha_vencimiento']
+
+    def __str__(self):
+        return f'{self.detalle_pecosa} ← {self.lote} x{self.cantidad}'
+
@@ -0,0 +1,177 @@
+from dataclasses import dataclass
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count
+
+from asociaciones.models import Asociacion
+from beneficiarios.models import HistoricoBeneficiario, TipoBeneficio
+from inventario.models import Producto, StockProducto
+from inventario.services import reintentar_interbloqueo
+
+from .models import RondaDistribucion
+from .services import ESTADO_ACTIVO, crear_pecosas, presidentas_vigentes
+
+
+@dataclass
+class Plan:
+    asociaciones: list      # cod_asociacion de cada fila
+    productos: list         # cod_producto de cada columna
+    demanda: np.ndarray     # asociaciones x productos
+    asignado: np.ndarray    # asociaciones x productos
+    stock: np.ndarray       # disponible por producto antes del plan
+
+    @property
+    def faltante(self):
+        return self.demanda - self.asignado
+
+    def cobertura(self):
+        """Fracción de la demanda cubierta por producto ({cod_producto: 0..1})."""
+        demanda = self.demanda.sum(axis=0)
+        asignado = self.asignado.sum(axis=0)
+        return {
+            producto_id: float(asignado[j] / demanda[j]) if demanda[j] else 1.0
+            for j, producto_id in enumerate(self.productos)
+        }
+
+
+def planificar(raciones, asociacion_ids=None):
+    """
+    Calcula el reparto de los productos de `raciones`
+    ({(cod_tipo_beneficio, cod_producto): cantidad por beneficiario})
+    entre las asociaciones activas (o `asociacion_ids`), según sus
+    beneficiarios vigentes de cada tipo y el stock disponible (sin
+    reservas) de cada producto. Lee los datos con unas pocas consultas
+    agrupadas y resuelve con distribuir() sobre matrices de numpy: 500
+    asociaciones x 40 productos se resuelven en milisegundos, de modo
+    que se pueden probar escenarios antes de generar las PECOSAs.
+    """
+    tipos = sorted({tipo_id for tipo_id, _ in raciones})
+    productos = sorted({producto_id for _, producto_id in raciones})
+    asociaciones = Asociacion.objects.filter(estado__abreviatura=ESTADO_ACTIVO)
+    if asociacion_ids is not None:
+        asociaciones = asociaciones.filter(pk__in=asociacion_ids)
+    asociaciones = list(asociaciones.order_by('cod_asociacion').values_list('cod_asociacion', flat=True))
+    fila = {asociacion_id: i for i, asociacion_id in enumerate(asociaciones)}
+    columna_tipo = {tipo_id: k for k, tipo_id in enumerate(tipos)}
+
+    beneficiarios = np.zeros((len(asociaciones), len(tipos)), dtype=np.int64)
+    conteos = (
+        HistoricoBeneficiario.objects.filter(
+            fecha_termino__isnull=True,
+            estado__abreviatura=ESTADO_ACTIVO,
+            tipo_beneficio_id__in=tipos,
+            beneficiario__socio__asociacion_id__in=asociaciones,
+        )
+        .order_by()
+        .values('beneficiario__socio__asociacion_id', 'tipo_beneficio_id')
+        .annotate(numero=Count('beneficiario', distinct=True))
+        .values_list('beneficiario__socio__asociacion_id', 'tipo_beneficio_id', 'numero')
+    )
+    for asociacion_id, tipo_id, numero in conteos:
+        beneficiarios[fila[asociacion_id], columna_tipo[tipo_id]] = numero
+
+    racion = np.zeros((len(tipos), len(productos)), dtype=np.int64)
+    for j, producto_id in enumerate(productos):
+        for tipo_id in tipos:
+            racion[columna_tipo[tipo_id], j] = raciones.get((tipo_id, producto_id), 0)
+
+    disponible = {
+        producto_id: cantidad - reservado
+        for producto_id, cantidad, reservado in StockProducto.objects.filter(producto_id__in=productos)
+        .values_list('producto_id', 'cantidad', 'reservado')
+    }
+    stock = np.array([max(disponible.get(producto_id, 0), 0) for producto_id in productos], dtype=np.int64)
+    prioridades = dict(TipoBeneficio.objects.filter(pk__in=tipos).values_list('cod_tipo_beneficio', 'prioridad'))
+    niveles = np.array([prioridades[tipo_id] for tipo_id in tipos], dtype=np.int64)
+
+    demanda, asignado = distribuir(beneficiarios, racion, niveles, stock)
+    return Plan(asociaciones=asociaciones, productos=productos, demanda=demanda, asignado=asignado, stock=stock)
+
+
+def distribuir(beneficiarios, racion, niveles, stock):
+    """
+    Reparto justo con prioridades sobre arrays:
+
+    - beneficiarios: asociaciones x tipos de beneficio (conteos)
+    - racion: tipos x productos (cantidad por beneficiario)
+    - niveles: prioridad de cada tipo (menor = se atiende antes)
+    - stock: disponible por producto
+
+    Los niveles se atienden en orden; dentro de un nivel, si un producto
+    no alcanza se reparte en proporción a la demanda de cada asociación
+    (cuota entera por división exacta y las unidades restantes a los
+    mayores residuos), sin superar nunca la demanda ni el stock.
+    Devuelve (demanda, asignado), ambos asociaciones x productos.
+    """
+    restante = stock.astype(np.int64).copy()
+    demanda_total = np.zeros((beneficiarios.shape[0], racion.shape[1]), dtype=np.int64)
+    asignado = np.zeros_like(demanda_total)
+    for nivel in np.unique(niveles):
+        en_nivel = niveles == nivel
+        demanda = beneficiarios[:, en_nivel] @ racion[en_nivel, :]
+        demanda_total += demanda
+        asignado_nivel = _prorratear(demanda, restante)
+        asignado += asignado_nivel
+        restante -= asignado_nivel.sum(axis=0)
+    return demanda_total, asignado
+
+
+def _prorratear(demanda, stock):
+    """Método del mayor residuo por columna, con aritmética entera exacta."""
+    total = demanda.sum(axis=0)
+    alcanza = total <= stock
+    divisor = np.where(total > 0, total, 1)
+    producto = demanda * stock[np.newaxis, :]
+    cuota = producto // divisor
+    residuo = producto % divisor
+    sobrante = stock - cuota.sum(axis=0)
+    # Rango de cada residuo dentro de su columna (0 = el mayor); los empates
+    # favorecen a la primera asociación para que el resultado sea estable.
+    orden = np.argsort(-residuo, axis=0, kind='stable')
+    rango = np.empty_like(orden)
+    np.put_along_axis(rango, orden, np.arange(demanda.shape[0])[:, np.newaxis], axis=0)
+    cuota += (rango < sobrante[np.newaxis, :]) & (residuo > 0)
+    return np.where(alcanza[np.newaxis, :], demanda, cuota)
+
+
+@reintentar_interbloqueo
+def crear_borradores(plan, periodo, prioridades=None, fecha_reparto=None, almacen=None):
+    """
+    Genera PECOSAs pendientes para el `plan` en la ronda del período, una
+    por asociación con algo asignado, reservando su stock y con `almacen`
+    como almacén de despacho. `prioridades`
+    ({cod_producto: prioridad}) fija DetallePecosa.prioridad de cada
+    producto (por defecto, el orden de las columnas). Las asociaciones
+    sin presidenta vigente o que ya tienen PECOSA en la ronda se omiten.
+    Devuelve (pecosas, omitidas).
+    """
+    prioridades = prioridades or {}
+    periodo = periodo.replace(day=1)
+    with transaction.atomic():
+        ronda, _ = RondaDistribucion.objects.get_or_create(periodo=periodo)
+        ronda = RondaDistribucion.objects.select_for_update().get(pk=ronda.pk)
+        existentes = set(ronda.pecosas.values_list('asociacion_id', flat=True))
+        presidentas = presidentas_vigentes(plan.asociaciones)
+        asociaciones = Asociacion.objects.in_bulk(plan.asociaciones)
+        productos = Producto.objects.in_bulk(plan.productos)
+
+        borradores = {}
+        omitidas = []
+        filas, columnas = np.nonzero(plan.asignado)
+        por_fila = {}
+        for i, j in zip(filas.tolist(), columnas.tolist()):
+            por_fila.setdefault(i, []).append(j)
+        for i, columnas_fila in por_fila.items():
+            asociacion = asociaciones[plan.asociaciones[i]]
+            if asociacion.pk in existentes:
+                omitidas.append((asociacion, 'ya tiene PECOSA en la ronda'))
+            elif asociacion.pk not in presidentas:
+                omitidas.append((asociacion, 'sin presidenta vigente'))
+            else:
+                borradores[asociacion] = [
+                    (productos[plan.productos[j]], int(plan.asignado[i, j]), prioridades.get(plan.productos[j], j + 1))
+                    for j in columnas_fila
+                ]
+        pecosas = crear_pecosas(ronda, borradores, presidentas, fecha_reparto, almacen)
+    return pecosas, omitidas
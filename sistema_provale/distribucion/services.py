@@ -0,0 +1,678 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, time
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import (
+    CharField, Count, DateTimeField, DecimalField, Exists, ExpressionWrapper, F, Max, OuterRef, Q, Subquery, Sum, Value,
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce, Round
+from django.utils import timezone
+
+from asociaciones.models import Asociacion, Directiva
+from core.models import Estado
+from inventario.models import (
+    Almacen, Lote, Movimiento, PrecioProducto, Producto, StockAlmacen, StockProducto, TipoMovimiento,
+)
+from inventario.precios import precios_vigentes
+from inventario.services import (
+    StockInsuficiente, asignar_fefo, liberar_lotes, registrar_movimientos, reintentar_interbloqueo, reservar_stock,
+)
+from personas.models import Socio
+
+from .models import (
+    AsignacionLote, BloqueNumeracion, DetallePecosa, Pecosa, RondaDistribucion, SeriePecosa, TransicionPecosa,
+)
+
+ESTADO_ACTIVO = 'ACT'
+ESTADO_PENDIENTE = 'PEN'
+ESTADO_APROBADA = 'APR'
+ESTADO_ENTREGADA = 'ENT'
+ESTADO_CANCELADA = 'CAN'
+
+# Estado destino: estados de origen desde los que se permite llegar.
+TRANSICIONES = {
+    ESTADO_APROBADA: {ESTADO_PENDIENTE},
+    ESTADO_ENTREGADA: {ESTADO_APROBADA},
+    # Al aprobar sale el stock: una PECOSA aprobada ya no se cancela.
+    ESTADO_CANCELADA: {ESTADO_PENDIENTE},
+}
+CARGO_PRESIDENTA = 'PRESIDENTA'
+
+# numeroPecosa es CHAR(10): serie AAAA + correlativo de 6 dígitos (hasta
+# 999.999 PECOSAs por año). Los números de 8 caracteres ya emitidos se
+# conservan; la serie continúa desde SeriesPecosa.ultimoNumero.
+DIGITOS_NUMERO = 6
+MAXIMO_NUMERO = 10 ** DIGITOS_NUMERO - 1
+
+
+@reintentar_interbloqueo
+def asignar_lotes(detalles, fecha=None):
+    """
+    Asigna lotes por vencimiento (FEFO) a las líneas de PECOSA cuyos
+    productos se manejan por lotes. Las líneas que ya tienen asignación o
+    cuyo producto no tiene lotes se omiten. Todo ocurre en una
+    transacción: si algún producto no alcanza, no se asigna nada.
+    Devuelve las AsignacionLote creadas.
+    """
+    detalles = list(detalles)
+    with transaction.atomic():
+        con_lotes = set(
+            Lote.objects.filter(producto_id__in={detalle.producto_id for detalle in detalles})
+            .values_list('producto_id', flat=True)
+            .distinct()
+        )
+        asignados = set(
+            AsignacionLote.objects.filter(detalle_pecosa__in=detalles)
+            .values_list('detalle_pecosa_id', flat=True)
+        )
+        nuevas = []
+        # Orden estable por producto para que dos asignaciones concurrentes bloqueen en el mismo orden.
+        for detalle in sorted(detalles, key=lambda d: (d.producto_id, d.pk)):
+            if detalle.producto_id not in con_lotes or detalle.pk in asignados:
+                continue
+            for lote, cantidad in asignar_fefo(detalle.producto_id, detalle.cantidad, fecha):
+                nuevas.append(AsignacionLote(detalle_pecosa=detalle, lote=lote, cantidad=cantidad))
+        AsignacionLote.objects.bulk_create(nuevas)
+    return nuevas
+
+
+def liberar_asignaciones(asignaciones, eliminar=False):
+    """Devuelve a sus lotes lo reservado por `asignaciones` (queryset)."""
+    cantidades = defaultdict(int)
+    for lote_id, cantidad in asignaciones.values_list('lote_id', 'cantidad'):
+        cantidades[lote_id] += cantidad
+    liberar_lotes(cantidades)
+    if eliminar:
+        asignaciones.delete()
+
+
+@dataclass
+class ResultadoRonda:
+    ronda: RondaDistribucion = None
+    creadas: int = 0
+    aprobadas: int = 0
+    omitidas: list = field(default_factory=list)  # [(asociacion, motivo)]
+
+
+@reintentar_interbloqueo
+def generar_ronda(periodo, lineas, fecha_reparto=None, contabilizar=True, almacen=None):
+    """
+    Genera la ronda del mes `periodo` en una sola transacción: una PECOSA
+    por asociación activa, con las `lineas` [(producto, cantidad_por_socio)]
+    multiplicadas por sus socios activos al precio vigente del producto y
+    `almacen` como almacén de despacho. Cabeceras y líneas se insertan
+    con bulk_create, se numeran y reservan su stock; con `contabilizar`
+    las PECOSAs pendientes de la ronda se aprueban, lo que registra sus
+    SALIDAs en bloque (exige almacén de despacho).
+
+    Puede repetirse: las asociaciones que ya tienen PECOSA en la ronda se
+    omiten y solo se aprueban las que siguen pendientes. Si algún
+    producto no alcanza no se genera nada (StockInsuficiente).
+    """
+    periodo = periodo.replace(day=1)
+    lineas = [(producto, cantidad) for producto, cantidad in lineas if cantidad > 0]
+    if not lineas:
+        raise ValidationError('La ronda debe tener al menos una línea con cantidad.')
+    resultado = ResultadoRonda()
+
+    with transaction.atomic():
+        # El bloqueo de la ronda serializa dos generaciones del mismo período.
+        ronda, _ = RondaDistribucion.objects.get_or_create(periodo=periodo)
+        ronda = RondaDistribucion.objects.select_for_update().get(pk=ronda.pk)
+        resultado.ronda = ronda
+
+        asociaciones = list(
+            Asociacion.objects.filter(estado__abreviatura=ESTADO_ACTIVO)
+            .exclude(pecosas__ronda=ronda)
+            .order_by('cod_asociacion')
+        )
+        ids = [asociacion.pk for asociacion in asociaciones]
+        socios = dict(
+            Socio.objects.filter(asociacion_id__in=ids, estado__abreviatura=ESTADO_ACTIVO, fecha_fin__isnull=True)
+            .order_by()
+            .values('asociacion_id')
+            .annotate(numero=Count('cod_socio'))
+            .values_list('asociacion_id', 'numero')
+        )
+        presidentas = presidentas_vigentes(ids)
+
+        borradores = {}
+        for asociacion in asociaciones:
+            if not socios.get(asociacion.pk):
+                resultado.omitidas.append((asociacion, 'sin socios activos'))
+            elif asociacion.pk not in presidentas:
+                resultado.omitidas.append((asociacion, 'sin presidenta vigente'))
+            else:
+                borradores[asociacion] = [
+                    (producto, cantidad * socios[asociacion.pk], prioridad)
+                    for prioridad, (producto, cantidad) in enumerate(lineas, start=1)
+                ]
+        resultado.creadas = len(crear_pecosas(ronda, borradores, presidentas, fecha_reparto, almacen))
+
+        if contabilizar:
+            resultado.aprobadas = cambiar_estado(
+                Pecosa.objects.filter(ronda=ronda, estado__abreviatura=ESTADO_PENDIENTE), ESTADO_APROBADA
+            )
+    return resultado
+
+
+def crear_pecosas(ronda, borradores, presidentas, fecha_reparto=None, almacen=None):
+    """
+    Inserta PECOSAs pendientes de la ronda a partir de `borradores`
+    ({asociacion: [(producto, cantidad, prioridad)]}): cabeceras y líneas
+    con bulk_create, numeradas en la serie del período, con `almacen`
+    como almacén de despacho y con su stock reservado. Cada línea toma el precio vigente a la fecha de reparto
+    (hoy si no se indica) del historial de precios, con su período en
+    fecha_desde/fecha_hasta, o Productos.precioUnitario si el producto
+    no tiene historial. Las líneas sin cantidad se omiten. Lanza
+    StockInsuficiente con todos los faltantes si algún producto no
+    alcanza. Debe llamarse dentro de una transacción.
+    """
+    estado = _estado(ESTADO_PENDIENTE)
+    pecosas = []
+    lineas = []
+    for asociacion, filas in borradores.items():
+        filas = [fila for fila in filas if fila[1] > 0]
+        if filas:
+            pecosas.append(Pecosa(
+                ronda=ronda, asociacion=asociacion, socio_presidenta_id=presidentas[asociacion.pk],
+                fecha_reparto=fecha_reparto, almacen=almacen, estado=estado,
+            ))
+            lineas.append(filas)
+    numerar_pecosas(pecosas, ronda.periodo.year)
+    Pecosa.objects.bulk_create(pecosas, batch_size=500)
+    if pecosas and pecosas[0].pk is None:
+        # El motor no devolvió las PKs insertadas: (ronda, asociación) es única.
+        codigos = dict(Pecosa.objects.filter(ronda=ronda).values_list('asociacion_id', 'cod_pecosa'))
+        for pecosa in pecosas:
+            pecosa.pk = codigos[pecosa.asociacion_id]
+
+    fecha = timezone.localdate(fecha_reparto) if fecha_reparto else timezone.localdate()
+    precios = precios_vigentes({fila[0].pk for filas in lineas for fila in filas}, fecha)
+    detalles = []
+    demanda = defaultdict(int)
+    for pecosa, filas in zip(pecosas, lineas):
+        for producto, cantidad, prioridad in filas:
+            detalle = DetallePecosa(
+                pecosa=pecosa, producto=producto, prioridad=prioridad, cantidad=cantidad,
+                cantidad_reservada=cantidad, precio_unitario=producto.precio_unitario or 0,
+            )
+            vigente = precios.get(producto.pk)
+            if vigente is not None:
+                detalle.precio_unitario = vigente.precio_unitario
+                detalle.fecha_desde = _fecha_hora(vigente.fecha_desde, time.min)
+                detalle.fecha_hasta = vigente.fecha_hasta and _fecha_hora(vigente.fecha_hasta, time.max)
+            detalles.append(detalle)
+            demanda[producto.pk] += cantidad
+    verificar_disponible(demanda)
+    reservar_stock(demanda)
+    DetallePecosa.objects.bulk_create(detalles, batch_size=1000)
+    return pecosas
+
+
+def _fecha_hora(fecha, hora):
+    return timezone.make_aware(datetime.combine(fecha, hora))
+
+
+@reintentar_interbloqueo
+def copiar_ronda(origen, periodo, pecosas=None, factor=1, fecha_reparto=None, almacen=None):
+    """
+    Copia las PECOSAs de la ronda `origen` (o solo `pecosas`, un queryset
+    de ella) a la ronda del mes `periodo` como PECOSAs pendientes, con dos
+    INSERT ... SELECT: uno para las cabeceras y otro para las líneas, que
+    multiplica cada cantidad por `factor` (redondeada; las que quedan en
+    cero se omiten) y toma el precio vigente a la fecha de reparto (hoy si
+    no se indica) de PreciosProducto, o el de Productos si el producto no
+    tiene historial. Ninguna fila se trae a Python; las PECOSAs nuevas se
+    numeran con un UPDATE y su stock se reserva a partir de la suma por
+    producto.
+
+    Cada PECOSA nueva lleva la presidenta vigente de su asociación y
+    `almacen` como almacén de despacho (por defecto, el de la PECOSA
+    copiada). Se
+    omiten, como en crear_pecosas y generar_ronda, las asociaciones
+    inactivas, sin presidenta vigente o que ya tienen PECOSA en la ronda
+    destino, y las PECOSAs sin ninguna línea que quede con cantidad.
+    Si algún producto no alcanza no se copia nada (StockInsuficiente).
+    """
+    periodo = periodo.replace(day=1)
+    if pecosas is None:
+        pecosas = origen.pecosas.all()
+    pecosas = pecosas.filter(ronda=origen).order_by()
+    resultado = ResultadoRonda()
+
+    with transaction.atomic():
+        ronda, _ = RondaDistribucion.objects.get_or_create(periodo=periodo)
+        ronda = RondaDistribucion.objects.select_for_update().get(pk=ronda.pk)
+        resultado.ronda = ronda
+        if ronda.pk == origen.pk:
+            raise ValidationError('La ronda destino debe ser distinta de la de origen.')
+
+        copiables = pecosas.filter(asociacion__estado__abreviatura=ESTADO_ACTIVO).exclude(
+            asociacion__pecosas__ronda=ronda
+        )
+        for asociacion in Asociacion.objects.filter(pecosas__in=pecosas.exclude(pk__in=copiables.values('pk'))):
+            resultado.omitidas.append((asociacion, 'inactiva o ya tiene PECOSA en la ronda'))
+        cantidad_copiada = Round(
+            ExpressionWrapper(F('cantidad') * Value(factor, DecimalField()), output_field=DecimalField())
+        )
+        copiables = copiables.annotate(
+            presidenta=presidenta_vigente(),
+            con_lineas=Exists(
+                DetallePecosa.objects.annotate(copia=cantidad_copiada).filter(pecosa=OuterRef('pk'), copia__gt=0)
+            ),
+        )
+        omitidas = copiables.filter(Q(presidenta__isnull=True) | Q(con_lineas=False))
+        for pecosa in omitidas.select_related('asociacion'):
+            resultado.omitidas.append((
+                pecosa.asociacion,
+                'sin presidenta vigente' if pecosa.presidenta is None else 'sin líneas con cantidad tras aplicar el factor',
+            ))
+        ultimo = Pecosa.objects.aggregate(ultimo=Max('cod_pecosa'))['ultimo'] or 0
+        ahora = timezone.now()
+        estado = _estado(ESTADO_PENDIENTE)
+        # Solo anotaciones, en el orden de las columnas del INSERT.
+        seleccion, parametros = copiables.filter(presidenta__isnull=False, con_lineas=True).values(
+            c_asociacion=F('asociacion_id'),
+            c_ronda=Value(ronda.pk),
+            c_presidenta=F('presidenta'),
+            c_fecha_reparto=Value(fecha_reparto, DateTimeField()),
+            c_fecha_registro=Value(ahora, DateTimeField()),
+            c_estado=Value(estado.pk),
+            c_almacen=Value(almacen.pk) if almacen is not None else F('almacen_id'),
+        ).query.sql_with_params()
+
+        fecha = timezone.localdate(fecha_reparto) if fecha_reparto else timezone.localdate()
+        p, d, pr = Pecosa._meta, DetallePecosa._meta, Producto._meta
+        c = _columnas
+        # Subconsulta correlacionada (TOP 1 / LIMIT 1 según el motor): un
+        # solo precio por línea aunque el producto tenga varios períodos.
+        precio, parametros_precio = (
+            PrecioProducto.objects.filter(
+                producto_id=RawSQL(f'o.{c(d, "producto")}', []),
+                fecha_desde__lte=fecha,
+            )
+            .filter(Q(fecha_hasta__isnull=True) | Q(fecha_hasta__gte=fecha))
+            .order_by('-fecha_desde')
+            .values('precio_unitario')[:1]
+            .query.sql_with_params()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {c(p)} ({c(p, "asociacion", "ronda", "socio_presidenta", "fecha_reparto", "fecha_registro", "estado", "almacen")}) '
+                f'{seleccion}',
+                parametros,
+            )
+            resultado.creadas = cursor.rowcount
+            cantidad = f'CAST(ROUND(o.{c(d, "cantidad")} * %s, 0) AS INTEGER)'
+            cursor.execute(
+                f'INSERT INTO {c(d)} ({c(d, "producto", "pecosa", "prioridad", "cantidad", "precio_unitario", "cantidad_reservada", "fecha_registro", "fecha_modificacion")}) '
+                f'SELECT o.{c(d, "producto")}, n.{c(p, "cod_pecosa")}, o.{c(d, "prioridad")}, {cantidad}, '
+                f'COALESCE(({precio}), pr.{c(pr, "precio_unitario")}, 0), {cantidad}, %s, %s '
+                f'FROM {c(d)} o '
+                f'INNER JOIN {c(p)} a ON a.{c(p, "cod_pecosa")} = o.{c(d, "pecosa")} '
+                f'INNER JOIN {c(p)} n ON n.{c(p, "asociacion")} = a.{c(p, "asociacion")} '
+                f'AND n.{c(p, "ronda")} = %s AND n.{c(p, "cod_pecosa")} > %s '
+                f'INNER JOIN {c(pr)} pr ON pr.{c(pr, "cod_producto")} = o.{c(d, "producto")} '
+                f'WHERE a.{c(p, "ronda")} = %s AND {cantidad} > 0',
+                [factor, *parametros_precio, factor, ahora, ahora, ronda.pk, ultimo, origen.pk, factor],
+            )
+
+        nuevas = Pecosa.objects.filter(ronda=ronda, cod_pecosa__gt=ultimo)
+        _numerar_en_bloque(nuevas, resultado.creadas, ronda.periodo.year)
+        demanda = dict(
+            DetallePecosa.objects.filter(pecosa__in=nuevas)
+            .order_by()
+            .values('producto_id')
+            .annotate(total=Sum('cantidad'))
+            .values_list('producto_id', 'total')
+        )
+        verificar_disponible(demanda)
+        reservar_stock(demanda)
+    return resultado
+
+
+def _columnas(opts, *campos):
+    """Nombre de tabla de `opts` o columnas de sus `campos`, citados para el motor."""
+    if not campos:
+        return connection.ops.quote_name(opts.db_table)
+    return ', '.join(connection.ops.quote_name(opts.get_field(campo).column) for campo in campos)
+
+
+def _numerar_en_bloque(pecosas, cantidad, anio):
+    """
+    Numera `pecosas` (queryset de `cantidad` PECOSAs sin número) en orden
+    de código con un bloque de reservar_numeros y un solo UPDATE: el
+    número AAAA###### se calcula como AAAA * 10^6 + correlativo.
+    """
+    serie = f'{anio:04d}'
+    numeros = reservar_numeros(cantidad, serie)
+    if not numeros:
+        return
+    posicion = (
+        Pecosa.objects.filter(pk__in=pecosas.values('pk'), cod_pecosa__lte=OuterRef('cod_pecosa'))
+        .order_by()
+        .values('ronda')
+        .annotate(posicion=Count('cod_pecosa'))
+        .values('posicion')
+    )
+    base = int(serie) * 10 ** DIGITOS_NUMERO + numeros.start - 1
+    pecosas.update(numero_pecosa=Cast(Value(base) + Subquery(posicion), CharField(max_length=10)))
+
+
+def _estado(abreviatura):
+    estado = Estado.objects.filter(abreviatura=abreviatura).first()
+    if estado is None:
+        raise ValidationError(f'No existe el estado {abreviatura}; ejecute manage.py seed.')
+    return estado
+
+
+def presidenta_vigente(asociacion='asociacion_id'):
+    """
+    Subconsulta con el cod_socio de la presidenta vigente de la
+    asociación `asociacion` de la consulta externa (el mismo criterio que
+    presidentas_vigentes), o NULL si no tiene.
+    """
+    return Subquery(
+        Directiva.objects.filter(
+            reconocimiento__asociacion_id=OuterRef(asociacion),
+            cargo__descripcion__iexact=CARGO_PRESIDENTA,
+            estado__abreviatura=ESTADO_ACTIVO,
+        )
+        .order_by('-fecha_registro')
+        .values('socio_id')[:1]
+    )
+
+
+def presidentas_vigentes(asociacion_ids):
+    """
+    {cod_asociacion: cod_socio} de la presidenta vigente de cada
+    asociación (la directiva activa más reciente), en una sola consulta.
+    """
+    presidentas = {}
+    filas = (
+        Directiva.objects.filter(
+            reconocimiento__asociacion_id__in=asociacion_ids,
+            cargo__descripcion__iexact=CARGO_PRESIDENTA,
+            estado__abreviatura=ESTADO_ACTIVO,
+        )
+        .order_by('reconocimiento__asociacion_id', '-fecha_registro')
+        .values_list('reconocimiento__asociacion_id', 'socio_id')
+    )
+    for asociacion_id, socio_id in filas:
+        presidentas.setdefault(asociacion_id, socio_id)
+    return presidentas
+
+
+def numerar_pecosas(pecosas, anio=None):
+    """
+    Asigna numero_pecosa AAAA###### a las PECOSAs sin número con un solo
+    bloque de reservar_numeros en la serie de `anio` (por defecto el
+    actual). Debe llamarse dentro de la transacción que las guarda.
+    """
+    sin_numero = [pecosa for pecosa in pecosas if not pecosa.numero_pecosa]
+    serie = f'{anio or timezone.localdate().year:04d}'
+    for pecosa, numero in zip(sin_numero, reservar_numeros(len(sin_numero), serie)):
+        pecosa.numero_pecosa = f'{serie}{numero:0{DIGITOS_NUMERO}d}'
+
+
+def reservar_numeros(cantidad, serie):
+    """
+    Reserva `cantidad` números consecutivos de la serie y devuelve su
+    range. Es un solo UPDATE ultimoNumero = ultimoNumero + cantidad sobre
+    la fila de SeriesPecosa: solo bloquea esa fila, nunca la tabla
+    Pecosas, hasta que termina la transacción del llamador; si esta se
+    revierte, los números vuelven a la serie y no quedan huecos. Cada
+    bloque se registra en BloquesNumeracion.
+    Debe llamarse dentro de una transacción.
+    """
+    if cantidad <= 0:
+        return range(0)
+    actualizadas = SeriePecosa.objects.filter(
+        serie=serie, ultimo_numero__lte=MAXIMO_NUMERO - cantidad
+    ).update(ultimo_numero=F('ultimo_numero') + cantidad, fecha_actualizacion=timezone.now())
+    if not actualizadas:
+        if SeriePecosa.objects.filter(serie=serie).exists():
+            raise ValidationError(f'La serie {serie} no tiene {cantidad} números disponibles.')
+        _crear_serie(serie)
+        return reservar_numeros(cantidad, serie)
+
+    cod_serie, ultimo = SeriePecosa.objects.filter(serie=serie).values_list('cod_serie', 'ultimo_numero').get()
+    desde = ultimo - cantidad + 1
+    BloqueNumeracion.objects.create(serie_id=cod_serie, numero_desde=desde, numero_hasta=ultimo)
+    return range(desde, ultimo + 1)
+
+
+def _crear_serie(serie):
+    # Continúa después de los números que ya existan con el prefijo de la serie.
+    ultimo = Pecosa.objects.filter(numero_pecosa__startswith=serie).aggregate(ultimo=Max('numero_pecosa'))['ultimo']
+    sufijo = (ultimo or '')[len(serie):]
+    try:
+        with transaction.atomic():
+            SeriePecosa.objects.create(serie=serie, ultimo_numero=int(sufijo) if sufijo.isdigit() else 0)
+    except IntegrityError:
+        pass  # La creó otra transacción concurrente.
+
+
+@reintentar_interbloqueo
+def contabilizar_salidas(detalles):
+    """
+    Registra las SALIDAs de inventario de las líneas de PECOSA de
+    `detalles` (queryset) que aún no las tienen, todas con un solo
+    registrar_movimientos (bulk_create, precio_total y saldos del lote
+    completo en la misma transacción). Una línea con lotes asignados sale
+    con una SALIDA por lote (AsignacionLote.movimiento); el resto, con
+    una sola. DetallePecosa.movimiento queda apuntando a la (primera)
+    SALIDA de la línea y marca la línea como contabilizada, de modo que
+    puede repetirse sin duplicar salidas.
+
+    Las SALIDAs salen del almacén de despacho de cada PECOSA, que debe
+    estar indicado (ValidationError). Libera la reserva de stock y de
+    lotes de las líneas despachadas y lanza StockInsuficiente si algún
+    producto no alcanza, en total o en su almacén.
+    Devuelve las líneas contabilizadas.
+    """
+    with transaction.atomic():
+        pendientes = list(
+            DetallePecosa.objects.select_for_update()
+            .filter(pk__in=detalles.values('pk'), movimiento__isnull=True)
+            .annotate(almacen_despacho=F('pecosa__almacen_id'))
+            .order_by('cod_detalle_pecosa')
+        )
+        if not pendientes:
+            return []
+        sin_almacen = sorted({detalle.pecosa_id for detalle in pendientes if detalle.almacen_despacho is None})
+        if sin_almacen:
+            resto = f' y {len(sin_almacen) - 10} más' if len(sin_almacen) > 10 else ''
+            raise ValidationError(
+                f'Indique el almacén de despacho de las PECOSAs {", ".join(map(str, sin_almacen[:10]))}{resto}.'
+            )
+        asignaciones = defaultdict(list)
+        for asignacion in AsignacionLote.objects.filter(detalle_pecosa__in=pendientes).order_by('cod_asignacion_lote'):
+            asignaciones[asignacion.detalle_pecosa_id].append(asignacion)
+
+        liberar = defaultdict(int)
+        liberar_lote = defaultdict(int)
+        demanda = defaultdict(int)
+        demanda_almacen = defaultdict(int)
+        for detalle in pendientes:
+            liberar[detalle.producto_id] -= detalle.cantidad_reservada
+            demanda[detalle.producto_id] += detalle.cantidad
+            demanda_almacen[(detalle.almacen_despacho, detalle.producto_id)] += detalle.cantidad
+            detalle.cantidad_reservada = 0
+            for asignacion in asignaciones[detalle.pk]:
+                liberar_lote[asignacion.lote_id] += asignacion.cantidad
+        reservar_stock(liberar)
+        liberar_lotes(liberar_lote)
+        verificar_disponible(demanda)
+        verificar_saldo_almacen(demanda_almacen)
+
+        salida = TipoMovimiento.por_descripcion(TipoMovimiento.SALIDA)
+        movimientos = []
+        origen = []  # (detalle, asignacion) de cada movimiento, en el mismo orden
+        for detalle in pendientes:
+            partes = asignaciones[detalle.pk] or [None]
+            asignado = sum(asignacion.cantidad for asignacion in asignaciones[detalle.pk])
+            if asignado and asignado != detalle.cantidad:
+                raise ValidationError(
+                    f'La línea {detalle.pk} tiene {asignado} asignado en lotes y {detalle.cantidad} solicitado; '
+                    'vuelva a asignar sus lotes.'
+                )
+            for asignacion in partes:
+                movimientos.append(Movimiento(
+                    producto_id=detalle.producto_id, almacen_id=detalle.almacen_despacho, tipo_movimiento=salida,
+                    lote_id=asignacion.lote_id if asignacion else None,
+                    cantidad=asignacion.cantidad if asignacion else detalle.cantidad,
+                    precio_unitario=detalle.precio_unitario,
+                ))
+                origen.append((detalle, asignacion))
+        registrar_movimientos(movimientos)
+
+        con_lote = []
+        ahora = timezone.now()
+        for movimiento, (detalle, asignacion) in zip(movimientos, origen):
+            if detalle.movimiento_id is None:
+                detalle.movimiento = movimiento
+                detalle.fecha_modificacion = ahora  # bulk_update no aplica auto_now
+            if asignacion is not None:
+                asignacion.movimiento = movimiento
+                con_lote.append(asignacion)
+        DetallePecosa.objects.bulk_update(
+            pendientes, ['movimiento', 'cantidad_reservada', 'fecha_modificacion'], batch_size=1000
+        )
+        AsignacionLote.objects.bulk_update(con_lote, ['movimiento'], batch_size=1000)
+    return pendientes
+
+
+def verificar_disponible(demanda):
+    """
+    Bloquea los saldos de los productos de `demanda` ({cod_producto:
+    cantidad}) en orden de código y lanza StockInsuficiente con todos los
+    faltantes si alguno no cubre su cantidad libre de reservas.
+    """
+    filas = (
+        StockProducto.objects.select_for_update()
+        .filter(producto_id__in=demanda)
+        .order_by('producto_id')
+        .values_list('producto_id', 'cantidad', 'reservado')
+    )
+    disponibles = {producto_id: cantidad - reservado for producto_id, cantidad, reservado in filas}
+    faltantes = [
+        producto_id for producto_id in sorted(demanda)
+        if demanda[producto_id] > disponibles.get(producto_id, 0)
+    ]
+    if faltantes:
+        productos = Producto.objects.in_bulk(faltantes)
+        raise StockInsuficiente([
+            f'Stock insuficiente de {productos[producto_id]}: disponible '
+            f'{disponibles.get(producto_id, 0)}, solicitado {demanda[producto_id]}.'
+            for producto_id in faltantes
+        ])
+
+
+def verificar_saldo_almacen(demanda):
+    """
+    Bloquea los saldos por almacén de `demanda` ({(cod_almacen,
+    cod_producto): cantidad}) en orden y lanza StockInsuficiente con
+    todos los faltantes si algún almacén no tiene la cantidad, como
+    inventario.services.transferir.
+    """
+    filas = (
+        StockAlmacen.objects.select_for_update()
+        .filter(almacen_id__in={almacen_id for almacen_id, _ in demanda},
+                producto_id__in={producto_id for _, producto_id in demanda})
+        .order_by('almacen_id', 'producto_id')
+        .values_list('almacen_id', 'producto_id', 'cantidad')
+    )
+    saldos = {(almacen_id, producto_id): cantidad for almacen_id, producto_id, cantidad in filas}
+    faltantes = [clave for clave in sorted(demanda) if demanda[clave] > saldos.get(clave, 0)]
+    if faltantes:
+        almacenes = Almacen.objects.in_bulk({almacen_id for almacen_id, _ in faltantes})
+        productos = Producto.objects.in_bulk({producto_id for _, producto_id in faltantes})
+        raise StockInsuficiente([
+            f'Stock insuficiente de {productos[producto_id]} en {almacenes[almacen_id]}: disponible '
+            f'{saldos.get((almacen_id, producto_id), 0)}, solicitado {demanda[(almacen_id, producto_id)]}.'
+            for almacen_id, producto_id in faltantes
+        ])
+
+
+@reintentar_interbloqueo
+def cambiar_estado(pecosas, destino, usuario=None, observacion=None):
+    """
+    Pasa las PECOSAs `pecosas` (queryset) al estado `destino` (abreviatura)
+    en una sola transacción: valida que cada una esté en un estado de
+    origen permitido (TRANSICIONES), aplica un UPDATE ... WHERE codPecosa
+    IN (...) AND codEstado = <origen> por cada estado de origen presente y
+    registra todas las transiciones con un bulk_create. Si alguna no puede
+    cambiar, o otra transacción la cambió entretanto, no se cambia
+    ninguna (ValidationError). Al aprobar se registran las SALIDAs de
+    sus líneas (contabilizar_salidas), al entregar se completa
+    fechaReparto y al cancelar se liberan las reservas de stock y de lotes.
+    Devuelve el número de PECOSAs cambiadas.
+    """
+    if destino not in TRANSICIONES:
+        raise ValidationError(f'Estado de destino no válido: {destino}.')
+    estado_destino = _estado(destino)
+
+    with transaction.atomic():
+        actuales = list(
+            Pecosa.objects.select_for_update()
+            .filter(pk__in=pecosas.values('pk'))
+            .order_by('cod_pecosa')
+            .values_list('cod_pecosa', 'numero_pecosa', 'estado_id', 'estado__abreviatura')
+        )
+        invalidas = [
+            f'{numero or cod_pecosa} ({abreviatura})'
+            for cod_pecosa, numero, _, abreviatura in actuales
+            if abreviatura not in TRANSICIONES[destino]
+        ]
+        if invalidas:
+            resto = f' y {len(invalidas) - 10} más' if len(invalidas) > 10 else ''
+            raise ValidationError(
+                f'No se puede pasar a {estado_destino.descripcion}: {", ".join(invalidas[:10])}{resto}.'
+            )
+
+        por_origen = defaultdict(list)
+        for cod_pecosa, _, estado_id, _ in actuales:
+            por_origen[estado_id].append(cod_pecosa)
+        cambios = {'estado': estado_destino}
+        if destino == ESTADO_ENTREGADA:
+            cambios['fecha_reparto'] = Coalesce('fecha_reparto', Value(timezone.now()))
+        seleccion = pecosas.values('pk')
+        if destino == ESTADO_APROBADA:
+            contabilizar_salidas(DetallePecosa.objects.filter(pecosa__in=seleccion))
+        elif destino == ESTADO_CANCELADA:
+            # Antes del UPDATE: `pecosas` puede estar filtrado por el estado de origen.
+            liberar_reservas(DetallePecosa.objects.filter(pecosa__in=seleccion))
+        for estado_id, ids in por_origen.items():
+            actualizadas = Pecosa.objects.filter(pk__in=seleccion, estado_id=estado_id).update(**cambios)
+            if actualizadas != len(ids):
+                raise ValidationError('Otra operación cambió el estado de algunas PECOSAs; vuelva a intentarlo.')
+
+        TransicionPecosa.objects.bulk_create(
+            [
+                TransicionPecosa(
+                    pecosa_id=cod_pecosa, estado_origen_id=estado_id, estado_destino=estado_destino,
+                    usuario=usuario, observacion=observacion,
+                )
+                for cod_pecosa, _, estado_id, _ in actuales
+            ],
+            batch_size=1000,
+        )
+    return len(actuales)
+
+
+def liberar_reservas(detalles):
+    """
+    Devuelve al stock lo reservado por las líneas `detalles` (queryset)
+    y a sus lotes lo asignado, en bloque, y deja cantidadReservada en 0.
+    """
+    liberar = defaultdict(int)
+    for producto_id, reservada in detalles.filter(cantidad_reservada__gt=0).values_list('producto_id', 'cantidad_reservada'):
+        liberar[producto_id] -= reservada
+    reservar_stock(liberar)
+    detalles.filter(cantidad_reservada__gt=0).update(cantidad_reservada=0, fecha_modificacion=timezone.now())
+    liberar_asignaciones(AsignacionLote.objects.filter(detalle_pecosa__in=detalles.values('pk')), eliminar=True)
@@ -1,3 +1,64 @@
-from django.test import TestCase
+import threading
 
-# Create your tests here.
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+
+from .models import BloqueNumeracion, Pecosa, SeriePecosa
+from .services import DIGITOS_NUMERO, MAXIMO_NUMERO, numerar_pecosas, reservar_numeros
+
+
+class ReservarNumerosTests(TestCase):
+
+    def test_serie_admite_mas_de_diez_mil_pecosas(self):
+        with transaction.atomic():
+            self.assertEqual(reservar_numeros(12000, '2026'), range(1, 12001))
+            self.assertEqual(reservar_numeros(5, '2026'), range(12001, 12006))
+        self.assertEqual(SeriePecosa.objects.get(serie='2026').ultimo_numero, 12005)
+
+    def test_numero_ocupa_el_ancho_de_la_columna(self):
+        pecosas = [Pecosa(), Pecosa()]
+        with transaction.atomic():
+            reservar_numeros(MAXIMO_NUMERO - 2, '2026')
+            numerar_pecosas(pecosas, 2026)
+        self.assertEqual([p.numero_pecosa for p in pecosas], ['2026999998', '2026999999'])
+        self.assertEqual(len(pecosas[0].numero_pecosa), 4 + DIGITOS_NUMERO)
+        self.assertLessEqual(len(pecosas[0].numero_pecosa), Pecosa._meta.get_field('numero_pecosa').max_length)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ReservarNumerosConcurrenciaTests(TransactionTestCase):
+    """
+    Varios escritores reservan bloques de la misma serie a la vez: los
+    números no se repiten ni dejan huecos y cada bloque queda registrado.
+    """
+    ESCRITORES = 8
+    RESERVAS = 25
+    TAMANIO = 40
+
+    def test_escritores_concurrentes(self):
+        SeriePecosa.objects.create(serie='2026')
+        rangos, errores = [], []
+        inicio = threading.Barrier(self.ESCRITORES)
+
+        def escritor():
+            try:
+                inicio.wait()
+                for _ in range(self.RESERVAS):
+                    with transaction.atomic():
+                        rangos.append(reservar_numeros(self.TAMANIO, '2026'))
+            except Exception as error:  # se informa en el hilo principal
+                errores.append(error)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=escritor) for _ in range(self.ESCRITORES)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        total = self.ESCRITORES * self.RESERVAS * self.TAMANIO
+        numeros = sorted(numero for rango in rangos for numero in rango)
+        self.assertEqual(numeros, list(range(1, total + 1)))
+        self.assertEqual(BloqueNumeracion.objects.count(), self.ESCRITORES * self.RESERVAS)
@@ -1,18 +1,68 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from django.db.models import Prefetch, Q
+
+from core.paginacion import paginar_keyset
+from .models import DetallePecosa, Pecosa
+
+PECOSAS_POR_PAGINA = 20
 
-# Create your views here.
 
 @login_required
 def index(request):
-    """Vista de lista de PECOSAs"""
-    pecosas = [
-        {'id': 1, 'numero_pecosa': 'PEC-2026-0001', 'beneficiario': {'id': 1, 'nombre_completo': 'María González Pérez', 'dni': '12345678'}, 'club': {'id': 1, 'nombre': 'Club San Luis'}, 'fecha_emision': '2026-02-15', 'items': [{'producto': 'Leche Evaporada', 'cantidad': 12, 'precio_unitario': 4.50}, {'producto': 'Fideos', 'cantidad': 6, 'precio_unitario': 2.80}], 'estado': 'pendiente', 'total': 67.80},
-        {'id': 2, 'numero_pecosa': 'PEC-2026-0002', 'beneficiario': {'id': 2, 'nombre_completo': 'Juan Carlos Rodríguez', 'dni': '87654321'}, 'club': {'id': 2, 'nombre': 'Club Primavera'}, 'fecha_emision': '2026-02-14', 'items': [{'producto': 'Azúcar', 'cantidad': 5, 'precio_unitario': 3.20}, {'producto': 'Jabón', 'cantidad': 3, 'precio_unitario': 1.50}], 'estado': 'aprobada', 'total': 21.50},
-        {'id': 3, 'numero_pecosa': 'PEC-2026-0003', 'beneficiario': {'id': 3, 'nombre_completo': 'Ana Lucía Mendoza', 'dni': '45678912'}, 'club': {'id': 1, 'nombre': 'Club San Luis'}, 'fecha_emision': '2026-02-10', 'items': [{'producto': 'Leche Evaporada', 'cantidad': 24, 'precio_unitario': 4.50}], 'estado': 'entregada', 'total': 108.00},
-        {'id': 4, 'numero_pecosa': 'PEC-2026-0004', 'beneficiario': {'id': 4, 'nombre_completo': 'Pedro Antonio Vargas', 'dni': '78912345'}, 'club': {'id': 3, 'nombre': 'Club Esperanza'}, 'fecha_emision': '2026-02-08', 'items': [{'producto': 'Shampoo', 'cantidad': 2, 'precio_unitario': 5.00}, {'producto': 'Paracetamol', 'cantidad': 20, 'precio_unitario': 0.10}], 'estado': 'cancelada', 'total': 12.00},
-        {'id': 5, 'numero_pecosa': 'PEC-2026-0005', 'beneficiario': {'id': 5, 'nombre_completo': 'Carmen Rosa Huamán', 'dni': '32165498'}, 'club': {'id': 2, 'nombre': 'Club Primavera'}, 'fecha_emision': '2026-02-05', 'items': [{'producto': 'Fideos', 'cantidad': 10, 'precio_unitario': 2.80}], 'estado': 'entregada', 'total': 28.00},
-    ]
+    """
+    Vista de lista de PECOSAs.
+    Los totales, la asociación, la presidenta y el estado vienen de
+    Pecosa.objects.with_totals() y las líneas de un solo prefetch, con
+    paginación por keyset sobre (fecha_registro, cod_pecosa): la página
+    se arma con un número fijo de consultas.
+    """
+    filters = {
+        'search': request.GET.get('search', ''),
+        'club_id': request.GET.get('club_id'),
+        'estado': request.GET.get('estado'),
+    }
+
+    queryset = Pecosa.objects.all()
+    if filters['search']:
+        queryset = queryset.filter(
+            Q(numero_pecosa__icontains=filters['search'])
+            | Q(asociacion__nombre_asociacion__icontains=filters['search'])
+            | Q(socio_presidenta__persona__dni=filters['search'])
+        )
+    if filters['club_id'] and filters['club_id'].isdigit():
+        queryset = queryset.filter(asociacion_id=filters['club_id'])
+    if filters['estado']:
+        queryset = queryset.filter(estado__descripcion__iexact=filters['estado'])
+
+    total = queryset.count()
+    pagina, next_cursor = paginar_keyset(
+        queryset.with_totals().prefetch_related(
+            Prefetch('detalles', queryset=DetallePecosa.objects.select_related('producto'))
+        ),
+        ['-fecha_registro', '-cod_pecosa'],
+        cursor=request.GET.get('cursor'),
+        por_pagina=PECOSAS_POR_PAGINA,
+    )
+    pecosas = []
+    for pecosa in pagina:
+        presidenta = pecosa.socio_presidenta.persona
+        pecosas.append({
+            'id': pecosa.cod_pecosa,
+            'numero_pecosa': pecosa.numero_pecosa or '',
+            'beneficiario': {'id': presidenta.cod_persona, 'nombre_completo': presidenta.nombre_completo, 'dni': presidenta.dni},
+            'club': {'id': pecosa.asociacion.cod_asociacion, 'nombre': pecosa.asociacion.nombre_asociacion or pecosa.asociacion.codigo_asociacion},
+            'fecha_emision': (pecosa.fecha_reparto or pecosa.fecha_registro).date().isoformat(),
+            'items': [
+                {'producto': detalle.producto.descripcion, 'cantidad': detalle.cantidad, 'precio_unitario': float(detalle.precio_unitario)}
+                for detalle in pecosa.detalles.all()
+            ],
+            'numero_lineas': pecosa.numero_lineas,
+            'cantidad_items': pecosa.cantidad_items,
+            'estado': pecosa.estado.descripcion.lower(),
+            'total': float(pecosa.monto_total),
+        })
+
     context = {
         'page_data': {
             'user': {
@@ -24,14 +74,12 @@ def index(request):
                 'role': getattr(request.user, 'role', 'usuario'),
             },
             'pecosas': pecosas,
-            'total': 89,
+            'total': total,
             'page': 1,
-            'per_page': 20,
-            'filters': {
-                'search': request.GET.get('search', ''),
-                'club_id': request.GET.get('club_id'),
-                'estado': request.GET.get('estado'),
-            },
+            'per_page': PECOSAS_POR_PAGINA,
+            'cursor': request.GET.get('cursor'),
+            'next_cursor': next_cursor,
+            'filters': filters,
         }
     }
     return render(request, 'distribucion/pecosas_list.html', context)
@@ -1,12 +1,11 @@
 import { useState, useMemo } from 'react';
 import type { BeneficiariosPageData } from '@/types';
 import { Button, Input, Card } from '@/components/common';
-import { formatDate, formatNumber, cn } from '@/utils';
+import { formatDate, formatNumber, cursorUrl } from '@/utils';
 
 export default function BeneficiariosApp(props: BeneficiariosPageData) {
-  const { beneficiarios, total, page, per_page, filters } = props;
+  const { beneficiarios, total, cursor, next_cursor, filters } = props;
   const [searchTerm, setSearchTerm] = useState(filters.search || '');
-  const [currentPage, setCurrentPage] = useState(page);
   const [selectedRows, setSelectedRows] = useState<number[]>([]);
   const [showModal, setShowModal] = useState(false);
   const [showReportModal, setShowReportModal] = useState(false);
@@ -19,8 +18,6 @@ export default function BeneficiariosApp(props: BeneficiariosPageData) {
     );
   }, [beneficiarios, searchTerm]);
 
-  const totalPages = Math.ceil(total / per_page);
-
   const toggleRow = (id: number) => {
     setSelectedRows(prev => 
       prev.includes(id) 
@@ -208,33 +205,16 @@ export default function BeneficiariosApp(props: BeneficiariosPageData) {
             <Button
               variant="outline"
               size="sm"
-              disabled={currentPage === 1}
-              onClick={() => setCurrentPage(p => Math.max(1, p - 1))}
+              disabled={!cursor}
+              onClick={() => { window.location.href = cursorUrl(null); }}
             >
-              Anterior
+              Primera
             </Button>
-            {Array.from({ length: Math.min(5, totalPages) }, (_, i) => {
-              const pageNum = i + 1;
-              return (
-                <button
-                  key={pageNum}
-                  onClick={() => setCurrentPage(pageNum)}
-                  className={cn(
-                    'w-10 h-10 rounded-xl font-bold transition-colors',
-                    currentPage === pageNum
-                      ? 'bg-[var(--leaf)] text-white'
-                      : 'bg-white border-2 border-[var(--wheat)] text-[var(--charcoal)] hover:border-[var(--leaf)]'
-                  )}
-                >
-                  {pageNum}
-                </button>
-              );
-            })}
             <Button
               variant="outline"
               size="sm"
-              disabled={currentPage === totalPages}
-              onClick={() => setCurrentPage(p => Math.min(totalPages, p + 1))}
+              disabled={!next_cursor}
+              onClick={() => { window.location.href = cursorUrl(next_cursor); }}
             >
               Siguiente
             </Button>
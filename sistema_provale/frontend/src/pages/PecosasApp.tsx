@@ -1,12 +1,11 @@
 import { useState, useMemo } from 'react';
 import type { PecosasPageData } from '@/types';
 import { Button, Input, Card } from '@/components/common';
-import { formatDate, formatNumber, cn } from '@/utils';
+import { formatDate, formatNumber, cursorUrl } from '@/utils';
 
 export default function PecosasApp(props: PecosasPageData) {
-  const { pecosas, total, page, per_page, filters } = props;
+  const { pecosas, total, cursor, next_cursor, filters } = props;
   const [searchTerm, setSearchTerm] = useState(filters.search || '');
-  const [currentPage, setCurrentPage] = useState(page);
   const [showModal, setShowModal] = useState(false);
   const [showReportModal, setShowReportModal] = useState(false);
 
@@ -24,8 +23,6 @@ export default function PecosasApp(props: PecosasPageData) {
     return filteredPecosas.filter(p => p.estado === filters.estado);
   }, [filteredPecosas, filters.estado]);
 
-  const totalPages = Math.ceil(total / per_page);
-
   const getEstadoStyle = (estado: string) => {
     switch (estado) {
       case 'pendiente': return { bg: 'var(--sun-light)', color: '#D97706', label: 'Pendiente' };
@@ -180,11 +177,8 @@ export default function PecosasApp(props: PecosasPageData) {
         <div className="flex justify-between items-center mt-6 pt-6 border-t-2 border-[var(--wheat)]">
           <p className="text-sm text-[var(--earth)]">Mostrando <span className="font-bold">{filteredByEstado.length}</span> de <span className="font-bold">{formatNumber(total)}</span> PECOSAS</p>
           <div className="flex gap-2">
-            <Button variant="outline" size="sm" disabled={currentPage === 1} onClick={() => setCurrentPage(p => Math.max(1, p - 1))}>Anterior</Button>
-            {Array.from({ length: Math.min(5, totalPages) }, (_, i) => (
-              <button key={i + 1} onClick={() => setCurrentPage(i + 1)} className={cn('w-10 h-10 rounded-xl font-bold', currentPage === i + 1 ? 'bg-[var(--leaf)] text-white' : 'bg-white border-2 border-[var(--wheat)]')}>{i + 1}</button>
-            ))}
-            <Button variant="outline" size="sm" disabled={currentPage === totalPages} onClick={() => setCurrentPage(p => Math.min(totalPages, p + 1))}>Siguiente</Button>
+            <Button variant="outline" size="sm" disabled={!cursor} onClick={() => { window.location.href = cursorUrl(null); }}>Primera</Button>
+            <Button variant="outline" size="sm" disabled={!next_cursor} onClick={() => { window.location.href = cursorUrl(next_cursor); }}>Siguiente</Button>
           </div>
         </div>
       </Card>
@@ -1,12 +1,11 @@
 import { useState, useMemo } from 'react';
 import type { ProductosPageData } from '@/types';
 import { Button, Input, Card } from '@/components/common';
-import { formatNumber, cn } from '@/utils';
+import { formatNumber, cn, cursorUrl } from '@/utils';
 
 export default function ProductosApp(props: ProductosPageData) {
-  const { productos, total, page, per_page, filters } = props;
+  const { productos, total, cursor, next_cursor, filters } = props;
   const [searchTerm, setSearchTerm] = useState(filters.search || '');
-  const [currentPage, setCurrentPage] = useState(page);
   const [showModal, setShowModal] = useState(false);
   const [showReportModal, setShowReportModal] = useState(false);
   const [selectedRows, setSelectedRows] = useState<number[]>([]);
@@ -29,8 +28,6 @@ export default function ProductosApp(props: ProductosPageData) {
     return filteredByCategoria.filter(p => p.estado === filters.estado);
   }, [filteredByCategoria, filters.estado]);
 
-  const totalPages = Math.ceil(total / per_page);
-
   const toggleRow = (id: number) => {
     setSelectedRows(prev => 
       prev.includes(id) 
@@ -220,11 +217,8 @@ export default function ProductosApp(props: ProductosPageData) {
         <div className="flex justify-between items-center mt-6 pt-6 border-t-2 border-[var(--wheat)]">
           <p className="text-sm text-[var(--earth)]">Mostrando <span className="font-bold">{filteredByEstado.length}</span> de <span className="font-bold">{formatNumber(total)}</span> productos</p>
           <div className="flex gap-2">
-            <Button variant="outline" size="sm" disabled={currentPage === 1} onClick={() => setCurrentPage(p => Math.max(1, p - 1))}>Anterior</Button>
-            {Array.from({ length: Math.min(5, totalPages) }, (_, i) => (
-              <button key={i + 1} onClick={() => setCurrentPage(i + 1)} className={cn('w-10 h-10 rounded-xl font-bold', currentPage === i + 1 ? 'bg-[var(--leaf)] text-white' : 'bg-white border-2 border-[var(--wheat)]')}>{i + 1}</button>
-            ))}
-            <Button variant="outline" size="sm" disabled={currentPage === totalPages} onClick={() => setCurrentPage(p => Math.min(totalPages, p + 1))}>Siguiente</Button>
+            <Button variant="outline" size="sm" disabled={!cursor} onClick={() => { window.location.href = cursorUrl(null); }}>Primera</Button>
+            <Button variant="outline" size="sm" disabled={!next_cursor} onClick={() => { window.location.href = cursorUrl(next_cursor); }}>Siguiente</Button>
           </div>
         </div>
       </Card>
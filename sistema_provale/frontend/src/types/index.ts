@@ -41,6 +41,7 @@ export interface Beneficiario {
     id: number;
     nombre: string;
   };
+  parentesco?: string;
   estado: 'activo' | 'inactivo' | 'pendiente';
   fecha_registro: string;
 }
@@ -76,6 +77,8 @@ export interface BeneficiariosPageData {
   total: number;
   page: number;
   per_page: number;
+  cursor?: string | null;
+  next_cursor?: string | null;
   filters: {
     search?: string;
     club_id?: number;
@@ -202,6 +205,8 @@ export interface Pecosa {
     cantidad: number;
     precio_unitario: number;
   }[];
+  numero_lineas: number;
+  cantidad_items: number;
   estado: 'pendiente' | 'aprobada' | 'entregada' | 'cancelada';
   total: number;
 }
@@ -250,6 +255,8 @@ export interface ProductosPageData {
   total: number;
   page: number;
   per_page: number;
+  cursor?: string | null;
+  next_cursor?: string | null;
   filters: {
     search?: string;
     categoria?: string;
@@ -277,6 +284,8 @@ export interface PecosasPageData {
   total: number;
   page: number;
   per_page: number;
+  cursor?: string | null;
+  next_cursor?: string | null;
   filters: {
     search?: string;
     estado?: string;
@@ -71,3 +71,15 @@ export function formatNumber(num: number): string {
 export function cn(...classes: (string | boolean | undefined | null)[]): string {
   return classes.filter(Boolean).join(' ');
 }
+
+/** URL de la página actual con el cursor de paginación (keyset) indicado; sin cursor, la primera página. */
+export function cursorUrl(cursor?: string | null): string {
+  const params = new URLSearchParams(window.location.search);
+  if (cursor) {
+    params.set('cursor', cursor);
+  } else {
+    params.delete('cursor');
+  }
+  const query = params.toString();
+  return window.location.pathname + (query ? `?${query}` : '');
+}
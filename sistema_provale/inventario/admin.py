@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import UnidadMedida, Producto, TipoMovimiento, Movimiento
+from .models import UnidadMedida, Producto, PrecioProducto, TipoMovimiento, Movimiento, StockProducto, CierrePeriodo, StockCierre, Almacen, StockAlmacen, Lote, MovimientoDiario
+from .precios import registrar_precio
 
 
 @admin.register(UnidadMedida)
@@ -17,6 +18,25 @@ class ProductoAdmin(admin.ModelAdmin):
     ordering = ('descripcion',)
 
 
+@admin.register(PrecioProducto)
+class PrecioProductoAdmin(admin.ModelAdmin):
+    list_display = ('producto', 'precio_unitario', 'fecha_desde', 'fecha_hasta', 'fecha_registro')
+    search_fields = ('producto__descripcion',)
+    list_filter = ('producto',)
+    ordering = ('producto', '-fecha_desde')
+    readonly_fields = ('fecha_hasta', 'fecha_registro')
+
+    def get_readonly_fields(self, request, obj=None):
+        # Mover el inicio de un período dejaría el anterior recortado: se registra un precio nuevo.
+        if obj is not None:
+            return self.readonly_fields + ('producto', 'fecha_desde')
+        return self.readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        # Los períodos vecinos se ajustan en registrar_precio.
+        obj.pk = registrar_precio(obj.producto, obj.precio_unitario, obj.fecha_desde).pk
+
+
 @admin.register(TipoMovimiento)
 class TipoMovimientoAdmin(admin.ModelAdmin):
     list_display = ('cod_tipo_movimiento', 'descripcion')
@@ -24,10 +44,72 @@ class TipoMovimientoAdmin(admin.ModelAdmin):
     ordering = ('descripcion',)
 
 
+@admin.register(Almacen)
+class AlmacenAdmin(admin.ModelAdmin):
+    list_display = ('cod_almacen', 'descripcion', 'sector_zona', 'estado', 'fecha_registro')
+    search_fields = ('descripcion',)
+    list_filter = ('estado',)
+    ordering = ('descripcion',)
+
+
+@admin.register(Lote)
+class LoteAdmin(admin.ModelAdmin):
+    list_display = ('cod_lote', 'producto', 'codigo_lote', 'fecha_vencimiento', 'cantidad', 'reservado')
+    search_fields = ('codigo_lote', 'producto__descripcion')
+    list_filter = ('producto',)
+    ordering = ('fecha_vencimiento',)
+    readonly_fields = ('cantidad', 'reservado')
+
+
 @admin.register(Movimiento)
 class MovimientoAdmin(admin.ModelAdmin):
-    list_display = ('cod_movimiento', 'producto', 'tipo_movimiento', 'cantidad', 'precio_unitario', 'precio_total', 'fecha_movimiento')
+    list_display = ('cod_movimiento', 'producto', 'tipo_movimiento', 'almacen', 'lote', 'cantidad', 'precio_unitario', 'precio_total', 'costo_unitario', 'fecha_movimiento')
     search_fields = ('producto__descripcion',)
-    list_filter = ('tipo_movimiento', 'producto')
+    list_filter = ('tipo_movimiento', 'almacen', 'producto')
     ordering = ('-fecha_movimiento',)
-    readonly_fields = ('precio_total',)
\ No newline at end of file
+    readonly_fields = ('precio_total', 'costo_unitario')
+
+@admin.register(StockProducto)
+class StockProductoAdmin(admin.ModelAdmin):
+    list_display = ('producto', 'cantidad', 'reservado', 'disponible', 'costo_promedio', 'valor', 'costo_distribuido', 'fecha_actualizacion')
+    search_fields = ('producto__descripcion',)
+    ordering = ('producto__descripcion',)
+    readonly_fields = ('producto', 'cantidad', 'reservado', 'valor', 'costo_promedio', 'costo_distribuido', 'fecha_actualizacion')
+
+
+@admin.register(StockAlmacen)
+class StockAlmacenAdmin(admin.ModelAdmin):
+    list_display = ('almacen', 'producto', 'cantidad', 'fecha_actualizacion')
+    search_fields = ('producto__descripcion', 'almacen__descripcion')
+    list_filter = ('almacen',)
+    ordering = ('almacen', 'producto')
+    readonly_fields = ('almacen', 'producto', 'cantidad', 'fecha_actualizacion')
+
+
+@admin.register(MovimientoDiario)
+class MovimientoDiarioAdmin(admin.ModelAdmin):
+    list_display = ('fecha', 'producto', 'tipo_movimiento', 'numero_movimientos', 'cantidad', 'precio_total')
+    list_filter = ('tipo_movimiento', 'producto')
+    date_hierarchy = 'fecha'
+    ordering = ('-fecha',)
+    readonly_fields = ('fecha', 'producto', 'tipo_movimiento', 'numero_movimientos', 'cantidad', 'precio_total')
+
+
+class StockCierreInline(admin.TabularInline):
+    model = StockCierre
+    extra = 0
+    fields = ('producto', 'cantidad', 'valor')
+    readonly_fields = ('producto', 'cantidad', 'valor')
+    can_delete = False
+
+
+@admin.register(CierrePeriodo)
+class CierrePeriodoAdmin(admin.ModelAdmin):
+    list_display = ('periodo', 'fecha_cierre')
+    ordering = ('-periodo',)
+    readonly_fields = ('periodo', 'fecha_cierre')
+    inlines = [StockCierreInline]
+
+    def has_add_permission(self, request):
+        # Los períodos se cierran con `manage.py cerrar_periodo`.
+        return False
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario.services import cerrar_periodo
+
+
+class Command(BaseCommand):
+    help = "Cierra un mes de inventario y guarda el stock de cada producto al cierre"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "periodo",
+            help="Mes a cerrar, en formato AAAA-MM",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            periodo = datetime.strptime(options["periodo"], "%Y-%m").date()
+        except ValueError:
+            raise CommandError("El periodo debe tener el formato AAAA-MM")
+
+        self.stdout.write(f"Cerrando periodo {periodo:%Y-%m}...")
+        try:
+            cierre = cerrar_periodo(periodo)
+        except ValidationError as error:
+            raise CommandError(" ".join(error.messages))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Periodo {cierre} cerrado ({cierre.saldos.count()} productos)"
+        ))
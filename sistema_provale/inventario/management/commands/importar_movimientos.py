@@ -0,0 +1,66 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario.services import importar_movimientos
+
+
+class Command(BaseCommand):
+    help = "Importa movimientos de inventario desde un CSV (producto, tipo, cantidad, precio_unitario[, almacen])"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "archivo",
+            help="Ruta del archivo CSV con cabecera",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=1000,
+            help="Numero de filas insertadas por transaccion",
+        )
+        parser.add_argument(
+            "--delimitador",
+            default=",",
+            help="Separador de columnas del CSV",
+        )
+        parser.add_argument(
+            "--rechazados",
+            help="Ruta de un CSV donde escribir las filas rechazadas",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            archivo = open(options["archivo"], newline="", encoding="utf-8-sig")
+        except OSError as error:
+            raise CommandError(f"No se pudo abrir el archivo: {error}")
+
+        with archivo:
+            lector = csv.DictReader(archivo, delimiter=options["delimitador"])
+            faltantes = {"producto", "tipo", "cantidad", "precio_unitario"} - set(lector.fieldnames or [])
+            if faltantes:
+                raise CommandError(f"Faltan columnas en el CSV: {', '.join(sorted(faltantes))}")
+
+            self.stdout.write(f"Importando movimientos desde {options['archivo']}...")
+            # La línea 1 es la cabecera.
+            resultado = importar_movimientos(
+                ((lector.line_num, fila) for fila in lector),
+                tamano_lote=options["lote"],
+            )
+
+        for linea, fila, motivo in resultado.rechazados:
+            self.stdout.write(self.style.WARNING(f"Linea {linea}: {motivo}"))
+
+        if options["rechazados"] and resultado.rechazados:
+            with open(options["rechazados"], "w", newline="", encoding="utf-8") as salida:
+                escritor = csv.writer(salida)
+                escritor.writerow(["linea", "producto", "tipo", "cantidad", "precio_unitario", "motivo"])
+                for linea, fila, motivo in resultado.rechazados:
+                    escritor.writerow([
+                        linea, fila.get("producto"), fila.get("tipo"),
+                        fila.get("cantidad"), fila.get("precio_unitario"), motivo,
+                    ])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado.insertados} movimientos importados, {len(resultado.rechazados)} rechazados"
+        ))
@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inventario.models import Lote
+
+
+class Command(BaseCommand):
+    help = "Lista los lotes con saldo que vencen en los proximos dias"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias",
+            type=int,
+            default=30,
+            help="Horizonte en dias desde hoy",
+        )
+        parser.add_argument(
+            "--incluir-vencidos",
+            action="store_true",
+            help="Incluir tambien los lotes ya vencidos con saldo",
+        )
+
+    def handle(self, *args, **options):
+        hoy = timezone.localdate()
+        lotes = Lote.objects.filter(
+            cantidad__gt=0,
+            fecha_vencimiento__lte=hoy + timedelta(days=options["dias"]),
+        )
+        if not options["incluir_vencidos"]:
+            lotes = lotes.filter(fecha_vencimiento__gte=hoy)
+
+        total = 0
+        for lote in lotes.select_related("producto").order_by("fecha_vencimiento", "cod_lote").iterator(chunk_size=500):
+            dias = (lote.fecha_vencimiento - hoy).days
+            self.stdout.write(
+                f"{lote.fecha_vencimiento}  ({dias:>4} dias)  {lote.producto.descripcion}  "
+                f"Lote {lote.codigo_lote}: {lote.cantidad} (reservado {lote.reservado})"
+            )
+            total += 1
+
+        estilo = self.style.WARNING if total else self.style.SUCCESS
+        self.stdout.write(estilo(f"{total} lotes por vencer en {options['dias']} dias"))
@@ -0,0 +1,158 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from inventario.models import Lote, Movimiento, Producto, StockAlmacen, StockProducto, TipoMovimiento, cantidad_firmada
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye o verifica StockProductos, StockAlmacenes y el saldo de Lotes a partir de Movimientos, "
+        "por lotes de productos"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verificar",
+            action="store_true",
+            help="Solo informa las diferencias, sin corregir los saldos",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=500,
+            help="Numero de productos procesados por transaccion",
+        )
+
+    def handle(self, *args, **options):
+        verificar = options["verificar"]
+        lote = options["lote"]
+        ids_entrada = TipoMovimiento.ids_entrada()
+
+        ultimo = 0
+        revisados = 0
+        diferencias = 0
+        while True:
+            ids = list(
+                Producto.objects.filter(cod_producto__gt=ultimo)
+                .order_by("cod_producto")
+                .values_list("cod_producto", flat=True)[:lote]
+            )
+            if not ids:
+                break
+            ultimo = ids[-1]
+
+            with transaction.atomic():
+                # Bloquear los saldos antes de sumar: los movimientos que se
+                # confirmen mientras tanto aplicarán su delta sobre el valor nuevo.
+                saldos = {
+                    s.producto_id: s
+                    for s in StockProducto.objects.select_for_update().filter(producto_id__in=ids)
+                }
+                calculados = dict(
+                    Movimiento.objects.filter(producto_id__in=ids)
+                    .order_by()
+                    .values("producto_id")
+                    .annotate(saldo=Sum(cantidad_firmada(ids_entrada)))
+                    .values_list("producto_id", "saldo")
+                )
+
+                ahora = timezone.now()
+                por_actualizar = []
+                por_crear = []
+                for producto_id in ids:
+                    esperado = calculados.get(producto_id) or 0
+                    saldo = saldos.get(producto_id)
+                    if saldo is None:
+                        por_crear.append(StockProducto(producto_id=producto_id, cantidad=esperado))
+                    elif saldo.cantidad != esperado:
+                        self.stdout.write(
+                            f"Producto {producto_id}: saldo {saldo.cantidad}, movimientos {esperado}"
+                        )
+                        saldo.cantidad = esperado
+                        saldo.fecha_actualizacion = ahora
+                        por_actualizar.append(saldo)
+
+                diferencias += len(por_actualizar) + len(por_crear)
+                if por_crear:
+                    self.stdout.write(f"{len(por_crear)} productos sin saldo registrado")
+                if not verificar:
+                    StockProducto.objects.bulk_update(por_actualizar, ["cantidad", "fecha_actualizacion"])
+                    StockProducto.objects.bulk_create(por_crear)
+
+                diferencias += self.revisar_almacenes(ids, ids_entrada, verificar, ahora)
+                diferencias += self.revisar_lotes(ids, ids_entrada, verificar)
+
+            revisados += len(ids)
+            self.stdout.write(f"{revisados} productos revisados...")
+
+        if verificar and diferencias:
+            self.stdout.write(self.style.WARNING(f"{diferencias} saldos no coinciden con Movimientos"))
+        elif verificar:
+            self.stdout.write(self.style.SUCCESS("Todos los saldos coinciden con Movimientos"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Saldos recalculados ({diferencias} corregidos)"))
+
+    def revisar_almacenes(self, ids, ids_entrada, verificar, ahora):
+        """Compara (y corrige) los saldos por almacén de los productos `ids`."""
+        saldos = {
+            (s.almacen_id, s.producto_id): s
+            for s in StockAlmacen.objects.select_for_update().filter(producto_id__in=ids)
+        }
+        calculados = {
+            (almacen_id, producto_id): saldo
+            for almacen_id, producto_id, saldo in (
+                Movimiento.objects.filter(producto_id__in=ids, almacen__isnull=False)
+                .order_by()
+                .values("almacen_id", "producto_id")
+                .annotate(saldo=Sum(cantidad_firmada(ids_entrada)))
+                .values_list("almacen_id", "producto_id", "saldo")
+            )
+        }
+
+        por_actualizar = []
+        por_crear = []
+        for clave in saldos.keys() | calculados.keys():
+            esperado = calculados.get(clave) or 0
+            saldo = saldos.get(clave)
+            if saldo is None:
+                por_crear.append(StockAlmacen(almacen_id=clave[0], producto_id=clave[1], cantidad=esperado))
+            elif saldo.cantidad != esperado:
+                self.stdout.write(
+                    f"Almacen {clave[0]}, producto {clave[1]}: saldo {saldo.cantidad}, movimientos {esperado}"
+                )
+                saldo.cantidad = esperado
+                saldo.fecha_actualizacion = ahora
+                por_actualizar.append(saldo)
+
+        if por_crear:
+            self.stdout.write(f"{len(por_crear)} saldos por almacen sin registrar")
+        if not verificar:
+            StockAlmacen.objects.bulk_update(por_actualizar, ["cantidad", "fecha_actualizacion"])
+            StockAlmacen.objects.bulk_create(por_crear)
+        return len(por_actualizar) + len(por_crear)
+
+
+    def revisar_lotes(self, ids, ids_entrada, verificar):
+        """Compara (y corrige) Lotes.cantidad de los productos `ids`."""
+        lotes = list(Lote.objects.select_for_update().filter(producto_id__in=ids).order_by("cod_lote"))
+        calculados = dict(
+            Movimiento.objects.filter(producto_id__in=ids, lote__isnull=False)
+            .order_by()
+            .values("lote_id")
+            .annotate(saldo=Sum(cantidad_firmada(ids_entrada)))
+            .values_list("lote_id", "saldo")
+        )
+
+        por_actualizar = []
+        for lote in lotes:
+            esperado = calculados.get(lote.pk) or 0
+            if lote.cantidad != esperado:
+                self.stdout.write(f"Lote {lote.pk} ({lote.codigo_lote}): saldo {lote.cantidad}, movimientos {esperado}")
+                lote.cantidad = esperado
+                por_actualizar.append(lote)
+
+        if not verificar:
+            Lote.objects.bulk_update(por_actualizar, ["cantidad"], batch_size=1000)
+        return len(por_actualizar)
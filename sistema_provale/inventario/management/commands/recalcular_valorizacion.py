@@ -0,0 +1,125 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from inventario.models import Movimiento, Producto, StockProducto, TipoMovimiento
+from inventario.services import CUATRO_DECIMALES, DOS_DECIMALES
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el costo promedio ponderado movil reproduciendo Movimientos en orden "
+        "cronologico: costo unitario de cada salida y valorizacion de StockProductos"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verificar",
+            action="store_true",
+            help="Solo informa las diferencias, sin corregir costos ni saldos",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=200,
+            help="Numero de productos procesados por transaccion",
+        )
+
+    def handle(self, *args, **options):
+        verificar = options["verificar"]
+        lote = options["lote"]
+        ids_entrada = set(TipoMovimiento.ids_entrada())
+
+        ultimo = 0
+        revisados = 0
+        movimientos_corregidos = 0
+        saldos_corregidos = 0
+        while True:
+            ids = list(
+                Producto.objects.filter(cod_producto__gt=ultimo)
+                .order_by("cod_producto")
+                .values_list("cod_producto", flat=True)[:lote]
+            )
+            if not ids:
+                break
+            ultimo = ids[-1]
+
+            with transaction.atomic():
+                # Igual que valorizar(): los saldos bloqueados impiden que se
+                # inserten movimientos de estos productos durante el recalculo.
+                saldos = {
+                    s.producto_id: s
+                    for s in StockProducto.objects.select_for_update().filter(producto_id__in=ids).order_by("producto_id")
+                }
+                calculados = {}
+                por_actualizar = []
+                movimientos = (
+                    Movimiento.objects.filter(producto_id__in=ids)
+                    .order_by("producto_id", "fecha_movimiento", "cod_movimiento")
+                    .only("producto_id", "tipo_movimiento_id", "cantidad", "precio_unitario", "costo_unitario", "transferencia")
+                )
+                for movimiento in movimientos.iterator(chunk_size=2000):
+                    cantidad, valor, distribuido = calculados.setdefault(
+                        movimiento.producto_id, [0, Decimal("0"), Decimal("0")]
+                    )
+                    if movimiento.tipo_movimiento_id in ids_entrada:
+                        costo = movimiento.precio_unitario
+                    elif cantidad > 0:
+                        costo = (valor / cantidad).quantize(CUATRO_DECIMALES)
+                    else:
+                        costo = movimiento.precio_unitario
+                    importe = (movimiento.cantidad * costo).quantize(DOS_DECIMALES)
+                    if movimiento.tipo_movimiento_id in ids_entrada:
+                        cantidad += movimiento.cantidad
+                        valor += importe
+                    else:
+                        cantidad -= movimiento.cantidad
+                        valor -= importe
+                        if not movimiento.transferencia:
+                            distribuido += importe
+                    calculados[movimiento.producto_id] = [cantidad, valor, distribuido]
+
+                    if movimiento.costo_unitario != costo:
+                        movimiento.costo_unitario = costo
+                        por_actualizar.append(movimiento)
+
+                movimientos_corregidos += len(por_actualizar)
+                saldos_por_actualizar = []
+                ahora = timezone.now()
+                for producto_id, (cantidad, valor, distribuido) in calculados.items():
+                    saldo = saldos.get(producto_id)
+                    if saldo is None:
+                        # Sin saldo registrado: lo crea recalcular_stock.
+                        continue
+                    costo_promedio = (valor / cantidad).quantize(CUATRO_DECIMALES) if cantidad > 0 else saldo.costo_promedio
+                    if (saldo.valor, saldo.costo_distribuido, saldo.costo_promedio) != (valor, distribuido, costo_promedio):
+                        self.stdout.write(
+                            f"Producto {producto_id}: valor {saldo.valor}, calculado {valor}; "
+                            f"distribuido {saldo.costo_distribuido}, calculado {distribuido}"
+                        )
+                        saldo.valor = valor
+                        saldo.costo_distribuido = distribuido
+                        saldo.costo_promedio = costo_promedio
+                        saldo.fecha_actualizacion = ahora
+                        saldos_por_actualizar.append(saldo)
+
+                saldos_corregidos += len(saldos_por_actualizar)
+                if not verificar:
+                    Movimiento.objects.bulk_update(por_actualizar, ["costo_unitario"], batch_size=1000)
+                    StockProducto.objects.bulk_update(
+                        saldos_por_actualizar,
+                        ["valor", "costo_distribuido", "costo_promedio", "fecha_actualizacion"],
+                    )
+
+            revisados += len(ids)
+            self.stdout.write(f"{revisados} productos revisados...")
+
+        resumen = f"{movimientos_corregidos} costos de movimiento y {saldos_corregidos} valorizaciones"
+        if verificar and (movimientos_corregidos or saldos_corregidos):
+            self.stdout.write(self.style.WARNING(f"{resumen} no coinciden con el historial"))
+        elif verificar:
+            self.stdout.write(self.style.SUCCESS("La valorizacion coincide con el historial"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Valorizacion recalculada ({resumen} corregidos)"))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from inventario.models import Movimiento
+from inventario.services import reconstruir_resumen_diario
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el resumen diario de movimientos (MovimientosDiarios) para un rango de fechas"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--desde",
+            help="Fecha inicial AAAA-MM-DD (por defecto, el primer movimiento)",
+        )
+        parser.add_argument(
+            "--hasta",
+            help="Fecha final AAAA-MM-DD (por defecto, hoy)",
+        )
+
+    def handle(self, *args, **options):
+        desde = self.leer_fecha(options["desde"])
+        hasta = self.leer_fecha(options["hasta"]) or timezone.localdate()
+        if desde is None:
+            primero = Movimiento.objects.order_by("fecha_movimiento").values_list("fecha_movimiento", flat=True).first()
+            if primero is None:
+                self.stdout.write(self.style.SUCCESS("No hay movimientos que resumir"))
+                return
+            desde = timezone.localtime(primero).date()
+        if desde > hasta:
+            raise CommandError("--desde debe ser anterior o igual a --hasta")
+
+        self.stdout.write(f"Reconstruyendo resumen diario del {desde} al {hasta}...")
+        filas = reconstruir_resumen_diario(desde, hasta)
+        self.stdout.write(self.style.SUCCESS(f"Resumen diario reconstruido ({filas} filas)"))
+
+    def leer_fecha(self, valor):
+        if not valor:
+            return None
+        try:
+            fecha = parse_date(valor)
+        except ValueError:
+            fecha = None
+        if fecha is None:
+            raise CommandError(f"Fecha invalida: {valor}")
+        return fecha
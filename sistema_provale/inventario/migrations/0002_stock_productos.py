@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def poblar_saldos(apps, schema_editor):
+    """Calcula el saldo inicial de cada producto desde Movimientos."""
+    Producto = apps.get_model('inventario', 'Producto')
+    Movimiento = apps.get_model('inventario', 'Movimiento')
+    TipoMovimiento = apps.get_model('inventario', 'TipoMovimiento')
+    StockProducto = apps.get_model('inventario', 'StockProducto')
+
+    ids_entrada = list(
+        TipoMovimiento.objects.filter(descripcion__iexact='ENTRADA')
+        .values_list('cod_tipo_movimiento', flat=True)
+    )
+    saldos = dict(
+        Movimiento.objects.order_by()
+        .values('producto_id')
+        .annotate(saldo=models.Sum(models.Case(
+            models.When(tipo_movimiento_id__in=ids_entrada, then=models.F('cantidad')),
+            default=models.Value(0) - models.F('cantidad'),
+            output_field=models.IntegerField()
+        )))
+        .values_list('producto_id', 'saldo')
+    )
+    StockProducto.objects.bulk_create(
+        [
+            StockProducto(producto_id=cod, cantidad=saldos.get(cod) or 0)
+            for cod in Producto.objects.values_list('cod_producto', flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockProducto',
+            fields=[
+                ('producto', models.OneToOneField(db_column='codProducto', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='saldo', serialize=False, to='inventario.producto')),
+                ('cantidad', models.IntegerField(db_column='cantidad', default=0)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, db_column='fechaActualizacion')),
+            ],
+            options={
+                'verbose_name': 'Stock de Producto',
+                'verbose_name_plural': 'Stock de Productos',
+                'db_table': 'StockProductos',
+            },
+        ),
+        migrations.RunPython(poblar_saldos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0002_stock_productos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimiento',
+            index=models.Index(fields=['producto', 'fecha_movimiento'], name='IX_Movimientos_producto_fecha'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0003_indice_movimientos_producto_fecha'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CierrePeriodo',
+            fields=[
+                ('cod_cierre_periodo', models.AutoField(db_column='codCierrePeriodo', primary_key=True, serialize=False)),
+                ('periodo', models.DateField(db_column='periodo', unique=True)),
+                ('fecha_cierre', models.DateTimeField(auto_now_add=True, db_column='fechaCierre')),
+            ],
+            options={
+                'verbose_name': 'Cierre de Período',
+                'verbose_name_plural': 'Cierres de Período',
+                'db_table': 'CierresPeriodo',
+                'ordering': ['-periodo'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockCierre',
+            fields=[
+                ('cod_stock_cierre', models.AutoField(db_column='codStockCierre', primary_key=True, serialize=False)),
+                ('cantidad', models.IntegerField(db_column='cantidad')),
+                ('valor', models.DecimalField(db_column='valor', decimal_places=2, max_digits=14)),
+                ('cierre', models.ForeignKey(db_column='codCierrePeriodo', on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='inventario.cierreperiodo')),
+                ('producto', models.ForeignKey(db_column='codProducto', on_delete=django.db.models.deletion.PROTECT, related_name='cierres', to='inventario.producto')),
+            ],
+            options={
+                'verbose_name': 'Stock al Cierre',
+                'verbose_name_plural': 'Stock al Cierre',
+                'db_table': 'StockCierres',
+                'constraints': [models.UniqueConstraint(fields=('cierre', 'producto'), name='UQ_StockCierres_cierre_producto')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0004_cierres_periodo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockproducto',
+            name='reservado',
+            field=models.IntegerField(db_column='reservado', default=0),
+        ),
+    ]
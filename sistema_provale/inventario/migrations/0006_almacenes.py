@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('geografico', '0001_initial'),
+        ('inventario', '0005_reservas_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Almacen',
+            fields=[
+                ('cod_almacen', models.AutoField(db_column='codAlmacen', primary_key=True, serialize=False)),
+                ('descripcion', models.CharField(db_column='descripcion', max_length=100, unique=True)),
+                ('direccion', models.CharField(blank=True, db_column='direccion', max_length=200, null=True)),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')),
+                ('estado', models.ForeignKey(db_column='codEstado', on_delete=django.db.models.deletion.PROTECT, related_name='almacenes', to='core.estado')),
+                ('sector_zona', models.ForeignKey(blank=True, db_column='codSectorZona', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='almacenes', to='geografico.sectorzona')),
+            ],
+            options={
+                'verbose_name': 'Almacén',
+                'verbose_name_plural': 'Almacenes',
+                'db_table': 'Almacenes',
+                'ordering': ['descripcion'],
+            },
+        ),
+        migrations.AddField(
+            model_name='movimiento',
+            name='almacen',
+            field=models.ForeignKey(blank=True, db_column='codAlmacen', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='movimientos', to='inventario.almacen'),
+        ),
+        migrations.CreateModel(
+            name='StockAlmacen',
+            fields=[
+                ('cod_stock_almacen', models.AutoField(db_column='codStockAlmacen', primary_key=True, serialize=False)),
+                ('cantidad', models.IntegerField(db_column='cantidad', default=0)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, db_column='fechaActualizacion')),
+                ('almacen', models.ForeignKey(db_column='codAlmacen', on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='inventario.almacen')),
+                ('producto', models.ForeignKey(db_column='codProducto', on_delete=django.db.models.deletion.CASCADE, related_name='saldos_almacen', to='inventario.producto')),
+            ],
+            options={
+                'verbose_name': 'Stock por Almacén',
+                'verbose_name_plural': 'Stock por Almacén',
+                'db_table': 'StockAlmacenes',
+                'ordering': ['almacen', 'producto'],
+                'constraints': [models.UniqueConstraint(fields=('almacen', 'producto'), name='UQ_StockAlmacenes_almacen_prod')],
+            },
+        ),
+    ]
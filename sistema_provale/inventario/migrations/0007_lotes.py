@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0006_almacenes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Lote',
+            fields=[
+                ('cod_lote', models.AutoField(db_column='codLote', primary_key=True, serialize=False)),
+                ('codigo_lote', models.CharField(db_column='codigoLote', max_length=50)),
+                ('fecha_vencimiento', models.DateField(db_column='fechaVencimiento')),
+                ('cantidad', models.IntegerField(db_column='cantidad', default=0)),
+                ('reservado', models.IntegerField(db_column='reservado', default=0)),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')),
+                ('producto', models.ForeignKey(db_column='codProducto', on_delete=django.db.models.deletion.PROTECT, related_name='lotes', to='inventario.producto')),
+            ],
+            options={
+                'verbose_name': 'Lote',
+                'verbose_name_plural': 'Lotes',
+                'db_table': 'Lotes',
+                'ordering': ['fecha_vencimiento'],
+            },
+        ),
+        migrations.AddField(
+            model_name='movimiento',
+            name='lote',
+            field=models.ForeignKey(blank=True, db_column='codLote', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='movimientos', to='inventario.lote'),
+        ),
+        migrations.AddIndex(
+            model_name='lote',
+            index=models.Index(condition=models.Q(('cantidad__gt', 0)), fields=['producto', 'fecha_vencimiento', 'cod_lote'], name='IX_Lotes_fefo'),
+        ),
+        migrations.AddIndex(
+            model_name='lote',
+            index=models.Index(condition=models.Q(('cantidad__gt', 0)), fields=['fecha_vencimiento'], name='IX_Lotes_vencimiento'),
+        ),
+        migrations.AddConstraint(
+            model_name='lote',
+            constraint=models.UniqueConstraint(fields=('producto', 'codigo_lote'), name='UQ_Lotes_producto_codigo'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def poblar_resumen(apps, schema_editor):
+    """
+    Resume el historial de Movimientos por día, producto y tipo, como
+    inventario.services.reconstruir_resumen_diario.
+    """
+    Movimiento = apps.get_model('inventario', 'Movimiento')
+    MovimientoDiario = apps.get_model('inventario', 'MovimientoDiario')
+
+    filas = (
+        Movimiento.objects
+        .annotate(fecha=TruncDate('fecha_movimiento', tzinfo=timezone.get_current_timezone()))
+        .order_by()
+        .values('fecha', 'producto_id', 'tipo_movimiento_id')
+        .annotate(
+            numero=models.Count('cod_movimiento'),
+            total_cantidad=models.Sum('cantidad'),
+            total_precio=models.Sum('precio_total'),
+        )
+    )
+    MovimientoDiario.objects.bulk_create(
+        [
+            MovimientoDiario(
+                fecha=fila['fecha'],
+                producto_id=fila['producto_id'],
+                tipo_movimiento_id=fila['tipo_movimiento_id'],
+                numero_movimientos=fila['numero'],
+                cantidad=fila['total_cantidad'],
+                precio_total=fila['total_precio'],
+            )
+            for fila in filas
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0007_lotes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoDiario',
+            fields=[
+                ('cod_movimiento_diario', models.AutoField(db_column='codMovimientoDiario', primary_key=True, serialize=False)),
+                ('fecha', models.DateField(db_column='fecha')),
+                ('numero_movimientos', models.IntegerField(db_column='numeroMovimientos', default=0)),
+                ('cantidad', models.IntegerField(db_column='cantidad', default=0)),
+                ('precio_total', models.DecimalField(db_column='precioTotal', decimal_places=2, default=0, max_digits=14)),
+                ('producto', models.ForeignKey(db_column='codProducto', on_delete=django.db.models.deletion.CASCADE, related_name='resumen_diario', to='inventario.producto')),
+                ('tipo_movimiento', models.ForeignKey(db_column='codTipoMovimiento', on_delete=django.db.models.deletion.CASCADE, related_name='resumen_diario', to='inventario.tipomovimiento')),
+            ],
+            options={
+                'verbose_name': 'Movimiento Diario',
+                'verbose_name_plural': 'Movimientos Diarios',
+                'db_table': 'MovimientosDiarios',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['fecha'], name='IX_MovimientosDiarios_fecha')],
+                'constraints': [models.UniqueConstraint(fields=('producto', 'fecha', 'tipo_movimiento'), name='UQ_MovimientosDiarios_clave')],
+            },
+        ),
+        migrations.RunPython(poblar_resumen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:30
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+DOS_DECIMALES = Decimal('0.01')
+CUATRO_DECIMALES = Decimal('0.0001')
+
+
+def valorizar_historial(apps, schema_editor):
+    """
+    Reproduce Movimientos en orden cronológico, igual que el comando
+    recalcular_valorizacion: costo unitario de cada movimiento y valor,
+    costo promedio y costo distribuido de StockProductos.
+    """
+    Producto = apps.get_model('inventario', 'Producto')
+    Movimiento = apps.get_model('inventario', 'Movimiento')
+    TipoMovimiento = apps.get_model('inventario', 'TipoMovimiento')
+    StockProducto = apps.get_model('inventario', 'StockProducto')
+
+    ids_entrada = set(
+        TipoMovimiento.objects.filter(descripcion__iexact='ENTRADA')
+        .values_list('cod_tipo_movimiento', flat=True)
+    )
+    ultimo = 0
+    while True:
+        ids = list(
+            Producto.objects.filter(cod_producto__gt=ultimo)
+            .order_by('cod_producto')
+            .values_list('cod_producto', flat=True)[:200]
+        )
+        if not ids:
+            break
+        ultimo = ids[-1]
+
+        calculados = {}
+        costos = []
+        movimientos = (
+            Movimiento.objects.filter(producto_id__in=ids)
+            .order_by('producto_id', 'fecha_movimiento', 'cod_movimiento')
+            .values_list('cod_movimiento', 'producto_id', 'tipo_movimiento_id', 'cantidad', 'precio_unitario')
+        )
+        for cod, producto_id, tipo_id, cantidad_movimiento, precio in list(movimientos):
+            cantidad, valor, distribuido = calculados.get(producto_id, (0, Decimal('0'), Decimal('0')))
+            if tipo_id in ids_entrada or cantidad <= 0:
+                costo = precio
+            else:
+                costo = (valor / cantidad).quantize(CUATRO_DECIMALES)
+            importe = (cantidad_movimiento * costo).quantize(DOS_DECIMALES)
+            if tipo_id in ids_entrada:
+                cantidad += cantidad_movimiento
+                valor += importe
+            else:
+                # Aún no se distinguen las transferencias (esTransferencia).
+                cantidad -= cantidad_movimiento
+                valor -= importe
+                distribuido += importe
+            calculados[producto_id] = (cantidad, valor, distribuido)
+            costos.append(Movimiento(cod_movimiento=cod, costo_unitario=costo))
+        Movimiento.objects.bulk_update(costos, ['costo_unitario'], batch_size=1000)
+        con_saldo = set(StockProducto.objects.filter(producto_id__in=ids).values_list('producto_id', flat=True))
+        StockProducto.objects.bulk_update(
+            [
+                StockProducto(
+                    producto_id=producto_id,
+                    valor=valor,
+                    costo_distribuido=distribuido,
+                    costo_promedio=(valor / cantidad).quantize(CUATRO_DECIMALES) if cantidad > 0 else Decimal('0'),
+                )
+                for producto_id, (cantidad, valor, distribuido) in calculados.items()
+                if producto_id in con_saldo
+            ],
+            ['valor', 'costo_distribuido', 'costo_promedio'],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0008_movimientos_diarios'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movimiento',
+            name='costo_unitario',
+            field=models.DecimalField(blank=True, db_column='costoUnitario', decimal_places=4, editable=False, max_digits=13, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockproducto',
+            name='costo_distribuido',
+            field=models.DecimalField(db_column='costoDistribuido', decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='stockproducto',
+            name='costo_promedio',
+            field=models.DecimalField(db_column='costoPromedio', decimal_places=4, default=0, max_digits=13),
+        ),
+        migrations.AddField(
+            model_name='stockproducto',
+            name='valor',
+            field=models.DecimalField(db_column='valor', decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.RunPython(valorizar_historial, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def poblar_precios(apps, schema_editor):
+    """El precio actual de cada producto rige desde su fecha de registro."""
+    Producto = apps.get_model('inventario', 'Producto')
+    PrecioProducto = apps.get_model('inventario', 'PrecioProducto')
+    PrecioProducto.objects.bulk_create(
+        [
+            PrecioProducto(
+                producto_id=cod,
+                precio_unitario=precio,
+                fecha_desde=timezone.localdate(fecha_registro) if fecha_registro else timezone.localdate(),
+            )
+            for cod, precio, fecha_registro in Producto.objects.filter(precio_unitario__isnull=False)
+            .values_list('cod_producto', 'precio_unitario', 'fecha_registro')
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0009_valorizacion_costo_promedio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrecioProducto',
+            fields=[
+                ('cod_precio_producto', models.AutoField(db_column='codPrecioProducto', primary_key=True, serialize=False)),
+                ('precio_unitario', models.DecimalField(db_column='precioUnitario', decimal_places=2, max_digits=9)),
+                ('fecha_desde', models.DateField(db_column='fechaDesde')),
+                ('fecha_hasta', models.DateField(blank=True, db_column='fechaHasta', null=True)),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, db_column='fechaModificacion')),
+                ('producto', models.ForeignKey(db_column='codProducto', on_delete=django.db.models.deletion.CASCADE, related_name='precios', to='inventario.producto')),
+            ],
+            options={
+                'verbose_name': 'Precio de Producto',
+                'verbose_name_plural': 'Precios de Producto',
+                'db_table': 'PreciosProducto',
+                'ordering': ['producto', '-fecha_desde'],
+                'constraints': [models.UniqueConstraint(fields=('producto', 'fecha_desde'), name='UQ_PreciosProducto_producto_desde')],
+            },
+        ),
+        migrations.RunPython(poblar_precios, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0010_historial_precios'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movimiento',
+            name='transferencia',
+            field=models.BooleanField(db_column='esTransferencia', default=False, editable=False),
+        ),
+    ]
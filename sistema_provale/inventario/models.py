@@ -1,5 +1,44 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from core.models import Estado
+from geografico.models import SectorZona
+
+
+def cantidad_firmada(ids_entrada, prefijo=''):
+    """
+    Expresión SQL de la cantidad con signo de un movimiento: positiva
+    para los tipos de ENTRADA y negativa para el resto. Se compara por
+    codTipoMovimiento (ids_entrada) en lugar de unir TipoMovimiento por
+    su descripción. `prefijo` permite usarla desde otra tabla
+    (p. ej. 'movimientos__').
+    """
+    return _firmado(ids_entrada, prefijo, 'cantidad', models.IntegerField())
+
+
+def valor_firmado(ids_entrada, prefijo=''):
+    """
+    Igual que cantidad_firmada, pero sobre el valor al costo
+    (cantidad * costo_unitario; precio_unitario si el movimiento no
+    está valorizado).
+    """
+    campo = models.DecimalField(max_digits=14, decimal_places=2)
+    valor = models.ExpressionWrapper(
+        models.F(f'{prefijo}cantidad')
+        * Coalesce(f'{prefijo}costo_unitario', f'{prefijo}precio_unitario'),
+        output_field=campo
+    )
+    return _firmado(ids_entrada, prefijo, valor, campo)
+
+
+def _firmado(ids_entrada, prefijo, campo, output_field):
+    valor = models.F(f'{prefijo}{campo}') if isinstance(campo, str) else campo
+    return models.Case(
+        models.When(**{f'{prefijo}tipo_movimiento_id__in': ids_entrada}, then=valor),
+        default=models.Value(0) - valor,
+        output_field=output_field
+    )
 
 
 class UnidadMedida(models.Model):
@@ -21,6 +60,23 @@ class UnidadMedida(models.Model):
         return self.descripcion
 
 
+class ProductoQuerySet(models.QuerySet):
+
+    def with_stock(self):
+        """
+        Anota `stock_actual` de cada producto con una sola consulta
+        agrupada sobre Movimientos (LEFT JOIN + GROUP BY), comparando el
+        tipo de movimiento por su código. Se combina con filtros,
+        select_related y paginación sin consultas adicionales por fila.
+        """
+        return self.annotate(
+            stock_actual=Coalesce(
+                models.Sum(cantidad_firmada(TipoMovimiento.ids_entrada(), 'movimientos__')),
+                models.Value(0)
+            )
+        )
+
+
 class Producto(models.Model):
     """
     Tabla: Productos
@@ -51,6 +107,8 @@ class Producto(models.Model):
         related_name='productos'
     )
 
+    objects = ProductoQuerySet.as_manager()
+
     class Meta:
         db_table = 'Productos'
         verbose_name = 'Producto'
@@ -62,21 +120,63 @@ class Producto(models.Model):
 
     def stock_real(self):
         """
-        Calcula el stock actual sumando entradas y restando salidas
-        desde la tabla Movimientos. Usar este método en lugar del
-        campo stock cuando se necesite el valor actualizado.
+        Stock actual del producto, leído del saldo mantenido en
+        StockProductos (una lectura por PK, sin recorrer Movimientos).
+        Usar este método en lugar del campo stock cuando se necesite
+        el valor actualizado.
         """
-        from django.db.models import Sum, Case, When, IntegerField
-        resultado = self.movimientos.aggregate(
-            total=Sum(
-                Case(
-                    When(tipo_movimiento__descripcion='ENTRADA', then='cantidad'),
-                    default=models.Value(0) - models.F('cantidad'),
-                    output_field=IntegerField()
-                )
-            )
-        )
-        return resultado['total'] or 0
+        cantidad = StockProducto.objects.filter(producto_id=self.pk).values_list('cantidad', flat=True).first()
+        return cantidad or 0
+
+    def save(self, *args, **kwargs):
+        """
+        Un cambio de precio_unitario se registra en PreciosProducto como
+        precio vigente desde hoy (inventario.precios.registrar_precio).
+        """
+        from .precios import registrar_precio
+        with transaction.atomic():
+            anterior = None
+            if self.pk:
+                anterior = Producto.objects.filter(pk=self.pk).values_list('precio_unitario', flat=True).first()
+            super().save(*args, **kwargs)
+            if self.precio_unitario is not None and self.precio_unitario != anterior:
+                registrar_precio(self, self.precio_unitario)
+
+
+class PrecioProducto(models.Model):
+    """
+    Tabla: PreciosProducto
+    Historial de precios de cada producto: el precio rige desde
+    fechaDesde hasta fechaHasta inclusive (NULL = sin fin). Los períodos
+    de un producto no se superponen; los mantiene
+    inventario.precios.registrar_precio. Productos.precioUnitario
+    conserva el precio vigente a la fecha de registro.
+    """
+    cod_precio_producto = models.AutoField(primary_key=True, db_column='codPrecioProducto')
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        db_column='codProducto',
+        related_name='precios'
+    )
+    precio_unitario = models.DecimalField(max_digits=9, decimal_places=2, db_column='precioUnitario')
+    fecha_desde = models.DateField(db_column='fechaDesde')
+    fecha_hasta = models.DateField(null=True, blank=True, db_column='fechaHasta')
+    fecha_registro = models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')
+    # Marca de cambios para la caché de precios; update() debe fijarla a mano.
+    fecha_modificacion = models.DateTimeField(auto_now=True, db_column='fechaModificacion')
+
+    class Meta:
+        db_table = 'PreciosProducto'
+        verbose_name = 'Precio de Producto'
+        verbose_name_plural = 'Precios de Producto'
+        ordering = ['producto', '-fecha_desde']
+        constraints = [
+            models.UniqueConstraint(fields=['producto', 'fecha_desde'], name='UQ_PreciosProducto_producto_desde'),
+        ]
+
+    def __str__(self):
+        return f'{self.producto}: {self.precio_unitario} desde {self.fecha_desde}'
 
 
 class TipoMovimiento(models.Model):
@@ -84,6 +184,9 @@ class TipoMovimiento(models.Model):
     Tabla: TipoMovimiento
     Clasificación del movimiento de inventario (ENTRADA / SALIDA).
     """
+    ENTRADA = 'ENTRADA'
+    SALIDA = 'SALIDA'
+
     cod_tipo_movimiento = models.AutoField(primary_key=True, db_column='codTipoMovimiento')
     descripcion = models.CharField(max_length=100, db_column='descripcion')
 
@@ -96,12 +199,114 @@ class TipoMovimiento(models.Model):
     def __str__(self):
         return self.descripcion
 
+    @classmethod
+    def por_descripcion(cls, descripcion):
+        return cls.objects.get(descripcion__iexact=descripcion)
+
+    @classmethod
+    def ids_entrada(cls):
+        """Códigos de los tipos de movimiento que suman al stock."""
+        return list(
+            cls.objects.filter(descripcion__iexact=cls.ENTRADA)
+            .values_list('cod_tipo_movimiento', flat=True)
+        )
+
+
+class Almacen(models.Model):
+    """
+    Tabla: Almacenes
+    Almacenes y depósitos regionales donde se guarda el stock.
+    """
+    cod_almacen = models.AutoField(primary_key=True, db_column='codAlmacen')
+    descripcion = models.CharField(max_length=100, unique=True, db_column='descripcion')
+    sector_zona = models.ForeignKey(
+        SectorZona,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_column='codSectorZona',
+        related_name='almacenes'
+    )
+    direccion = models.CharField(max_length=200, null=True, blank=True, db_column='direccion')
+    fecha_registro = models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')
+    estado = models.ForeignKey(
+        Estado,
+        on_delete=models.PROTECT,
+        db_column='codEstado',
+        related_name='almacenes'
+    )
+
+    class Meta:
+        db_table = 'Almacenes'
+        verbose_name = 'Almacén'
+        verbose_name_plural = 'Almacenes'
+        ordering = ['descripcion']
+
+    def __str__(self):
+        return self.descripcion
+
+
+class Lote(models.Model):
+    """
+    Tabla: Lotes
+    Lote de un producto perecible con su fecha de vencimiento.
+    cantidad es el saldo del lote (mantenido desde los Movimientos con
+    lote) y reservado lo ya asignado a líneas de PECOSA pendientes.
+    """
+    cod_lote = models.AutoField(primary_key=True, db_column='codLote')
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.PROTECT,
+        db_column='codProducto',
+        related_name='lotes'
+    )
+    codigo_lote = models.CharField(max_length=50, db_column='codigoLote')
+    fecha_vencimiento = models.DateField(db_column='fechaVencimiento')
+    cantidad = models.IntegerField(default=0, db_column='cantidad')
+    reservado = models.IntegerField(default=0, db_column='reservado')
+    fecha_registro = models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')
+
+    class Meta:
+        db_table = 'Lotes'
+        verbose_name = 'Lote'
+        verbose_name_plural = 'Lotes'
+        ordering = ['fecha_vencimiento']
+        constraints = [
+            models.UniqueConstraint(fields=['producto', 'codigo_lote'], name='UQ_Lotes_producto_codigo'),
+        ]
+        indexes = [
+            # Índice filtrado para la asignación FEFO: solo lotes con saldo.
+            models.Index(
+                fields=['producto', 'fecha_vencimiento', 'cod_lote'],
+                name='IX_Lotes_fefo',
+                condition=models.Q(cantidad__gt=0),
+            ),
+            models.Index(
+                fields=['fecha_vencimiento'],
+                name='IX_Lotes_vencimiento',
+                condition=models.Q(cantidad__gt=0),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.producto} | Lote {self.codigo_lote} (vence {self.fecha_vencimiento})'
+
+    @property
+    def disponible(self):
+        return self.cantidad - self.reservado
+
 
 class Movimiento(models.Model):
     """
     Tabla: Movimientos
     Registro de cada entrada o salida de producto del inventario.
     precioTotal debe ser consistente con cantidad * precioUnitario.
+
+    Cada alta, cambio o baja hecha con save()/delete() actualiza en la
+    misma transacción el saldo de StockProductos y, si tiene almacén o
+    lote, el de StockAlmacenes y Lotes. Las operaciones masivas
+    (QuerySet.update/delete, bulk_create) deben pasar por
+    inventario.services para no desalinear los saldos.
     """
     cod_movimiento = models.AutoField(primary_key=True, db_column='codMovimiento')
     producto = models.ForeignKey(
@@ -116,21 +321,264 @@ class Movimiento(models.Model):
         db_column='codTipoMovimiento',
         related_name='movimientos'
     )
+    almacen = models.ForeignKey(
+        Almacen,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_column='codAlmacen',
+        related_name='movimientos'
+    )
+    lote = models.ForeignKey(
+        Lote,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        db_column='codLote',
+        related_name='movimientos'
+    )
     fecha_movimiento = models.DateTimeField(auto_now_add=True, db_column='fechaMovimiento')
     cantidad = models.IntegerField(db_column='cantidad')
     precio_unitario = models.DecimalField(max_digits=9, decimal_places=2, db_column='precioUnitario')
     precio_total = models.DecimalField(max_digits=9, decimal_places=2, db_column='precioTotal')
+    costo_unitario = models.DecimalField(
+        max_digits=13,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        editable=False,
+        db_column='costoUnitario'
+    )
+    # SALIDA/ENTRADA entre almacenes (inventario.services.transferir): no es distribución.
+    transferencia = models.BooleanField(default=False, editable=False, db_column='esTransferencia')
 
     class Meta:
         db_table = 'Movimientos'
         verbose_name = 'Movimiento'
         verbose_name_plural = 'Movimientos'
         ordering = ['-fecha_movimiento']
+        indexes = [
+            models.Index(fields=['producto', 'fecha_movimiento'], name='IX_Movimientos_producto_fecha'),
+        ]
 
     def __str__(self):
         return f'{self.tipo_movimiento} | {self.producto} x{self.cantidad} ({self.fecha_movimiento:%Y-%m-%d})'
 
+    def clean(self):
+        if self.lote_id is not None and self.producto_id is not None and self.lote.producto_id != self.producto_id:
+            raise ValidationError({'lote': 'El lote no corresponde al producto del movimiento.'})
+
     def save(self, *args, **kwargs):
-        """Calcula precio_total automáticamente antes de guardar."""
+        """
+        Calcula precio_total automáticamente antes de guardar y
+        actualiza el saldo del producto en la misma transacción.
+        El costo_unitario se fija al costo promedio vigente una vez
+        revertido el efecto de la versión anterior, si la hay. Al cambiar
+        una SALIDA de PECOSA se marcan como modificadas sus líneas, para
+        que la conciliación incremental de entregas las vuelva a revisar.
+        """
+        from distribucion.models import DetallePecosa
+        from .services import registrar_efectos, valorizar
         self.precio_total = self.cantidad * self.precio_unitario
-        super().save(*args, **kwargs)
\ No newline at end of file
+        with transaction.atomic():
+            anterior = None
+            if self.pk is not None:
+                anterior = Movimiento.objects.select_for_update().filter(pk=self.pk).first()
+                if anterior is not None:
+                    registrar_efectos([anterior], signo=-1)
+            valorizar([self])
+            super().save(*args, **kwargs)
+            registrar_efectos([self])
+            if anterior is not None:
+                DetallePecosa.objects.filter(
+                    models.Q(movimiento=self) | models.Q(asignaciones_lote__movimiento=self)
+                ).update(fecha_modificacion=timezone.now())
+
+    def delete(self, *args, **kwargs):
+        """Revierte el efecto del movimiento sobre el saldo antes de eliminarlo."""
+        from .services import registrar_efectos
+        with transaction.atomic():
+            actual = Movimiento.objects.select_for_update().filter(pk=self.pk).first()
+            if actual is not None:
+                registrar_efectos([actual], signo=-1)
+            return super().delete(*args, **kwargs)
+
+
+class StockProducto(models.Model):
+    """
+    Tabla: StockProductos
+    Saldo vigente de cada producto (modelo de lectura de Movimientos).
+    Se mantiene de forma incremental desde Movimiento.save()/delete()
+    e inventario.services; `manage.py recalcular_stock` lo reconstruye
+    o verifica contra el historial.
+
+    reservado es la cantidad comprometida por líneas de PECOSA aún no
+    despachadas (inventario.services.reservar_stock).
+
+    valor y costo_promedio son la valorización al costo promedio
+    ponderado móvil (inventario.services.valorizar) y costo_distribuido
+    el costo acumulado de las salidas que no son transferencias; `manage.py
+    recalcular_valorizacion` los reconstruye desde el historial.
+    """
+    producto = models.OneToOneField(
+        Producto,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        db_column='codProducto',
+        related_name='saldo'
+    )
+    cantidad = models.IntegerField(default=0, db_column='cantidad')
+    reservado = models.IntegerField(default=0, db_column='reservado')
+    valor = models.DecimalField(max_digits=14, decimal_places=2, default=0, db_column='valor')
+    costo_promedio = models.DecimalField(max_digits=13, decimal_places=4, default=0, db_column='costoPromedio')
+    costo_distribuido = models.DecimalField(max_digits=14, decimal_places=2, default=0, db_column='costoDistribuido')
+    fecha_actualizacion = models.DateTimeField(auto_now=True, db_column='fechaActualizacion')
+
+    class Meta:
+        db_table = 'StockProductos'
+        verbose_name = 'Stock de Producto'
+        verbose_name_plural = 'Stock de Productos'
+
+    def __str__(self):
+        return f'{self.producto}: {self.cantidad}'
+
+    @property
+    def disponible(self):
+        return self.cantidad - self.reservado
+
+
+class StockAlmacen(models.Model):
+    """
+    Tabla: StockAlmacenes
+    Saldo de cada producto por almacén, mantenido igual que
+    StockProductos a partir de los movimientos con almacén.
+    """
+    cod_stock_almacen = models.AutoField(primary_key=True, db_column='codStockAlmacen')
+    almacen = models.ForeignKey(
+        Almacen,
+        on_delete=models.CASCADE,
+        db_column='codAlmacen',
+        related_name='saldos'
+    )
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        db_column='codProducto',
+        related_name='saldos_almacen'
+    )
+    cantidad = models.IntegerField(default=0, db_column='cantidad')
+    fecha_actualizacion = models.DateTimeField(auto_now=True, db_column='fechaActualizacion')
+
+    class Meta:
+        db_table = 'StockAlmacenes'
+        verbose_name = 'Stock por Almacén'
+        verbose_name_plural = 'Stock por Almacén'
+        ordering = ['almacen', 'producto']
+        constraints = [
+            models.UniqueConstraint(fields=['almacen', 'producto'], name='UQ_StockAlmacenes_almacen_prod'),
+        ]
+
+    def __str__(self):
+        return f'{self.almacen} | {self.producto}: {self.cantidad}'
+
+
+class MovimientoDiario(models.Model):
+    """
+    Tabla: MovimientosDiarios
+    Resumen diario de Movimientos por producto y tipo (número de
+    movimientos, cantidad y precio_total). Se mantiene junto con los
+    saldos y se reconstruye con `manage.py reconstruir_resumen_diario`;
+    los gráficos y reportes leen esta tabla en lugar del historial.
+    """
+    cod_movimiento_diario = models.AutoField(primary_key=True, db_column='codMovimientoDiario')
+    fecha = models.DateField(db_column='fecha')
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        db_column='codProducto',
+        related_name='resumen_diario'
+    )
+    tipo_movimiento = models.ForeignKey(
+        TipoMovimiento,
+        on_delete=models.CASCADE,
+        db_column='codTipoMovimiento',
+        related_name='resumen_diario'
+    )
+    numero_movimientos = models.IntegerField(default=0, db_column='numeroMovimientos')
+    cantidad = models.IntegerField(default=0, db_column='cantidad')
+    precio_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, db_column='precioTotal')
+
+    class Meta:
+        db_table = 'MovimientosDiarios'
+        verbose_name = 'Movimiento Diario'
+        verbose_name_plural = 'Movimientos Diarios'
+        ordering = ['-fecha']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['producto', 'fecha', 'tipo_movimiento'],
+                name='UQ_MovimientosDiarios_clave'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['fecha'], name='IX_MovimientosDiarios_fecha'),
+        ]
+
+    def __str__(self):
+        return f'{self.fecha} | {self.producto} | {self.tipo_movimiento}: {self.cantidad}'
+
+
+class CierrePeriodo(models.Model):
+    """
+    Tabla: CierresPeriodo
+    Mes de inventario cerrado. Los períodos se cierran en orden y, una
+    vez cerrados, sus Movimientos ya no pueden modificarse ni eliminarse.
+    periodo es siempre el primer día del mes.
+    """
+    cod_cierre_periodo = models.AutoField(primary_key=True, db_column='codCierrePeriodo')
+    periodo = models.DateField(unique=True, db_column='periodo')
+    fecha_cierre = models.DateTimeField(auto_now_add=True, db_column='fechaCierre')
+
+    class Meta:
+        db_table = 'CierresPeriodo'
+        verbose_name = 'Cierre de Período'
+        verbose_name_plural = 'Cierres de Período'
+        ordering = ['-periodo']
+
+    def __str__(self):
+        return f'{self.periodo:%Y-%m}'
+
+
+class StockCierre(models.Model):
+    """
+    Tabla: StockCierres
+    Foto de cantidad y valor de cada producto al cierre de un período.
+    El stock a una fecha se obtiene del cierre anterior más los
+    movimientos posteriores (inventario.services.saldos_a_fecha).
+    """
+    cod_stock_cierre = models.AutoField(primary_key=True, db_column='codStockCierre')
+    cierre = models.ForeignKey(
+        CierrePeriodo,
+        on_delete=models.CASCADE,
+        db_column='codCierrePeriodo',
+        related_name='saldos'
+    )
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.PROTECT,
+        db_column='codProducto',
+        related_name='cierres'
+    )
+    cantidad = models.IntegerField(db_column='cantidad')
+    valor = models.DecimalField(max_digits=14, decimal_places=2, db_column='valor')
+
+    class Meta:
+        db_table = 'StockCierres'
+        verbose_name = 'Stock al Cierre'
+        verbose_name_plural = 'Stock al Cierre'
+        constraints = [
+            models.UniqueConstraint(fields=['cierre', 'producto'], name='UQ_StockCierres_cierre_producto'),
+        ]
+
+    def __str__(self):
+        return f'{self.cierre} | {self.producto}: {self.cantidad}'
+
@@ -0,0 +1,99 @@
+import threading
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import PrecioProducto, Producto
+
+PrecioVigente = namedtuple('PrecioVigente', 'precio_unitario fecha_desde fecha_hasta')
+
+# Historial por producto: {cod_producto: ([fecha_desde...], [PrecioVigente...])}.
+# Se descarta completo cuando cambia la marca de PreciosProducto.
+_cache = {'marca': None, 'historial': {}}
+_bloqueo = threading.Lock()
+
+
+def precios_vigentes(producto_ids, fecha=None):
+    """
+    {cod_producto: PrecioVigente} a la `fecha` (por defecto hoy) para los
+    productos con historial de precios; los que no tienen historial o no
+    tienen precio a esa fecha no aparecen.
+
+    El historial de cada producto se guarda en una caché del proceso y la
+    vigencia se busca por bisección, así que valorizar miles de líneas
+    cuesta una consulta de control por llamada (la marca: número de
+    precios y última modificación, que detecta cambios hechos por otros
+    procesos) más una consulta por los productos que aún no están en la
+    caché.
+    """
+    fecha = fecha or timezone.localdate()
+    marca = tuple(PrecioProducto.objects.aggregate(numero=Count('pk'), ultima=Max('fecha_modificacion')).values())
+    with _bloqueo:
+        if _cache['marca'] != marca:
+            _cache['marca'], _cache['historial'] = marca, {}
+        historial = _cache['historial']
+        faltantes = set(producto_ids) - set(historial)
+        if faltantes:
+            for producto_id in faltantes:
+                historial[producto_id] = ([], [])
+            filas = (
+                PrecioProducto.objects.filter(producto_id__in=faltantes)
+                .order_by('producto_id', 'fecha_desde')
+                .values_list('producto_id', 'precio_unitario', 'fecha_desde', 'fecha_hasta')
+            )
+            for producto_id, precio, desde, hasta in filas:
+                fechas, precios = historial[producto_id]
+                fechas.append(desde)
+                precios.append(PrecioVigente(precio, desde, hasta))
+
+        vigentes = {}
+        for producto_id in producto_ids:
+            fechas, precios = historial[producto_id]
+            i = bisect_right(fechas, fecha) - 1
+            if i >= 0 and (precios[i].fecha_hasta is None or precios[i].fecha_hasta >= fecha):
+                vigentes[producto_id] = precios[i]
+    return vigentes
+
+
+def limpiar_cache_precios():
+    with _bloqueo:
+        _cache['marca'], _cache['historial'] = None, {}
+
+
+def registrar_precio(producto, precio_unitario, fecha_desde=None):
+    """
+    Registra que `producto` cuesta `precio_unitario` desde `fecha_desde`
+    (por defecto hoy): recorta el período anterior para que termine el día
+    previo y hace terminar el nuevo antes del siguiente precio ya
+    registrado, si lo hay. Si el precio rige hoy, también actualiza
+    Productos.precioUnitario. Devuelve el PrecioProducto.
+    """
+    fecha_desde = fecha_desde or timezone.localdate()
+    with transaction.atomic():
+        # Serializa los cambios de precio del producto.
+        Producto.objects.select_for_update().filter(pk=producto.pk).values_list('pk', flat=True).get()
+        precios = PrecioProducto.objects.filter(producto_id=producto.pk)
+        siguiente = precios.filter(fecha_desde__gt=fecha_desde).order_by('fecha_desde').values_list(
+            'fecha_desde', flat=True
+        ).first()
+        ahora = timezone.now()
+        precios.filter(fecha_desde__lt=fecha_desde).exclude(fecha_hasta__lt=fecha_desde).update(
+            fecha_hasta=fecha_desde - timedelta(days=1), fecha_modificacion=ahora
+        )
+        precio, _ = PrecioProducto.objects.update_or_create(
+            producto_id=producto.pk,
+            fecha_desde=fecha_desde,
+            defaults={
+                'precio_unitario': precio_unitario,
+                'fecha_hasta': siguiente - timedelta(days=1) if siguiente else None,
+            },
+        )
+        hoy = timezone.localdate()
+        if fecha_desde <= hoy and (precio.fecha_hasta is None or precio.fecha_hasta >= hoy):
+            Producto.objects.filter(pk=producto.pk).update(precio_unitario=precio_unitario)
+            producto.precio_unitario = precio_unitario
+    return precio
@@ -0,0 +1,589 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+from functools import wraps
+from itertools import islice
+from time import sleep
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Count, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    Almacen, CierrePeriodo, Lote, Movimiento, MovimientoDiario, Producto, StockAlmacen, StockCierre, StockProducto, TipoMovimiento,
+    cantidad_firmada, valor_firmado,
+)
+
+# Movimientos.precioUnitario/precioTotal son DECIMAL(9, 2).
+LIMITE_PRECIO = Decimal('10000000')
+DOS_DECIMALES = Decimal('0.01')
+CUATRO_DECIMALES = Decimal('0.0001')
+
+# Reintentos ante interbloqueos (SQL Server error 1205 / SQLSTATE 40001).
+ERROR_INTERBLOQUEO = 1205
+SQLSTATE_INTERBLOQUEO = '40001'
+REINTENTOS_INTERBLOQUEO = 3
+ESPERA_INTERBLOQUEO = 0.05  # segundos, se duplica en cada reintento
+
+
+class StockInsuficiente(ValidationError):
+    """No hay stock disponible (cantidad - reservado) para una reserva."""
+
+
+def registrar_movimientos(movimientos):
+    """
+    Inserta una lista de movimientos con un solo bulk_create y aplica
+    sus efectos sobre los saldos en la misma transacción. Calcula
+    precio_total y costo_unitario igual que Movimiento.save().
+    """
+    movimientos = list(movimientos)
+    for movimiento in movimientos:
+        movimiento.precio_total = movimiento.cantidad * movimiento.precio_unitario
+    with transaction.atomic():
+        valorizar(movimientos)
+        Movimiento.objects.bulk_create(movimientos)
+        registrar_efectos(movimientos)
+    return movimientos
+
+
+def valorizar(movimientos):
+    """
+    Asigna costo_unitario a movimientos nuevos (aún sin guardar) según
+    el costo promedio ponderado móvil de cada producto: una ENTRADA
+    entra a su precio_unitario y una SALIDA sale al costo promedio
+    vigente. Bloquea los saldos de los productos involucrados (en orden
+    de código) y recorre el lote en orden, de modo que varias entradas y
+    salidas del mismo producto en un lote se valorizan en secuencia.
+    Debe llamarse dentro de la transacción que insertará los movimientos.
+    """
+    ids_entrada = set(TipoMovimiento.ids_entrada())
+    productos = sorted({movimiento.producto_id for movimiento in movimientos})
+    estado = {
+        saldo.producto_id: [saldo.cantidad, saldo.valor]
+        for saldo in StockProducto.objects.select_for_update().filter(producto_id__in=productos).order_by('producto_id')
+    }
+    for movimiento in movimientos:
+        cantidad, valor = estado.setdefault(movimiento.producto_id, [0, Decimal('0')])
+        if movimiento.tipo_movimiento_id in ids_entrada:
+            movimiento.costo_unitario = Decimal(movimiento.precio_unitario)
+            cantidad += movimiento.cantidad
+        else:
+            # Sin existencias no hay promedio: la salida se valoriza a su precio.
+            costo = valor / cantidad if cantidad > 0 else movimiento.precio_unitario
+            movimiento.costo_unitario = Decimal(costo).quantize(CUATRO_DECIMALES)
+            cantidad -= movimiento.cantidad
+        valor += _valor_movimiento(movimiento, ids_entrada)
+        estado[movimiento.producto_id] = [cantidad, valor]
+
+
+def _valor_movimiento(movimiento, ids_entrada):
+    costo = movimiento.costo_unitario if movimiento.costo_unitario is not None else movimiento.precio_unitario
+    valor = (movimiento.cantidad * Decimal(costo)).quantize(DOS_DECIMALES)
+    return valor if movimiento.tipo_movimiento_id in ids_entrada else -valor
+
+
+def registrar_efectos(movimientos, signo=1):
+    """
+    Aplica (signo=1) o revierte (signo=-1) el efecto de una lista de
+    movimientos sobre los saldos y la valorización de StockProductos,
+    sobre StockAlmacenes y Lotes y sobre el resumen de MovimientosDiarios.
+    Debe llamarse dentro de la transacción que inserta, modifica o
+    elimina los movimientos; los movimientos nuevos deben venir ya
+    valorizados (valorizar()).
+    """
+    movimientos = list(movimientos)
+    if not movimientos:
+        return
+    verificar_periodo_abierto(movimientos)
+    ids_entrada = set(TipoMovimiento.ids_entrada())
+    deltas = defaultdict(lambda: [0, Decimal('0'), Decimal('0')])
+    deltas_almacen = defaultdict(int)
+    deltas_lote = defaultdict(int)
+    deltas_diarios = defaultdict(lambda: [0, 0, Decimal('0')])
+    for movimiento in movimientos:
+        entrada = movimiento.tipo_movimiento_id in ids_entrada
+        cantidad = movimiento.cantidad if entrada else -movimiento.cantidad
+        valor = _valor_movimiento(movimiento, ids_entrada)
+        saldo = deltas[movimiento.producto_id]
+        saldo[0] += signo * cantidad
+        saldo[1] += signo * valor
+        if not entrada and not movimiento.transferencia:
+            saldo[2] -= signo * valor
+        if movimiento.almacen_id is not None:
+            deltas_almacen[(movimiento.almacen_id, movimiento.producto_id)] += signo * cantidad
+        if movimiento.lote_id is not None:
+            deltas_lote[movimiento.lote_id] += signo * cantidad
+        diario = deltas_diarios[(
+            timezone.localtime(movimiento.fecha_movimiento).date(),
+            movimiento.producto_id,
+            movimiento.tipo_movimiento_id,
+        )]
+        diario[0] += signo
+        diario[1] += signo * movimiento.cantidad
+        diario[2] += signo * movimiento.precio_total
+
+    ahora = timezone.now()
+    for producto_id in sorted(deltas):
+        cantidad, valor, distribuido = deltas[producto_id]
+        _acumular(
+            StockProducto,
+            {'producto_id': producto_id},
+            {'cantidad': cantidad, 'valor': valor, 'costo_distribuido': distribuido},
+            fecha_actualizacion=ahora,
+        )
+    StockProducto.objects.filter(producto_id__in=deltas.keys(), cantidad__gt=0).update(
+        costo_promedio=ExpressionWrapper(F('valor') / F('cantidad'), output_field=StockProducto._meta.get_field('costo_promedio'))
+    )
+    aplicar_deltas_almacen(deltas_almacen)
+    for (fecha, producto_id, tipo_id), (numero, cantidad, precio_total) in sorted(deltas_diarios.items()):
+        _acumular(
+            MovimientoDiario,
+            {'fecha': fecha, 'producto_id': producto_id, 'tipo_movimiento_id': tipo_id},
+            {'numero_movimientos': numero, 'cantidad': cantidad, 'precio_total': precio_total},
+        )
+    for lote_id in sorted(deltas_lote):
+        if deltas_lote[lote_id]:
+            Lote.objects.filter(pk=lote_id).update(cantidad=F('cantidad') + deltas_lote[lote_id])
+
+
+def aplicar_deltas_almacen(deltas):
+    """Suma a cada saldo por almacén su delta ({(cod_almacen, cod_producto): cantidad})."""
+    ahora = timezone.now()
+    for (almacen_id, producto_id), delta in sorted(deltas.items()):
+        _acumular(
+            StockAlmacen,
+            {'almacen_id': almacen_id, 'producto_id': producto_id},
+            {'cantidad': delta},
+            fecha_actualizacion=ahora,
+        )
+
+
+def _acumular(modelo, clave, incrementos, **extra):
+    """
+    Suma `incrementos` ({campo: valor}) a la fila `clave` de `modelo` con
+    un UPDATE atómico, o la crea si aún no existe.
+    """
+    if not any(incrementos.values()):
+        return
+    cambios = {campo: F(campo) + valor for campo, valor in incrementos.items()}
+    if modelo.objects.filter(**clave).update(**cambios, **extra):
+        return
+    try:
+        with transaction.atomic():
+            modelo.objects.create(**clave, **incrementos)
+    except IntegrityError:
+        # Otra transacción creó la fila entre el UPDATE y el INSERT.
+        modelo.objects.filter(**clave).update(**cambios, **extra)
+
+
+def transferir(producto, origen, destino, cantidad, precio_unitario=None):
+    """
+    Transfiere stock entre almacenes registrando, en una sola
+    transacción, una SALIDA en el origen y una ENTRADA en el destino.
+    El stock global del producto no cambia y, al quedar marcados como
+    transferencia, los movimientos no suman a costo_distribuido. Lanza
+    StockInsuficiente si el almacén de origen no tiene la cantidad.
+    """
+    if origen.pk == destino.pk:
+        raise ValidationError('El almacén de origen y el de destino deben ser distintos.')
+    if cantidad <= 0:
+        raise ValidationError('La cantidad a transferir debe ser mayor que cero.')
+
+    with transaction.atomic():
+        saldo = (
+            StockAlmacen.objects.select_for_update()
+            .filter(almacen=origen, producto=producto)
+            .values_list('cantidad', flat=True)
+            .first()
+        ) or 0
+        if saldo < cantidad:
+            raise StockInsuficiente(
+                f'Stock insuficiente de {producto} en {origen}: disponible {saldo}, solicitado {cantidad}.'
+            )
+        if precio_unitario is None:
+            # Al costo promedio, para que la transferencia no altere la valorización.
+            costo = StockProducto.objects.filter(producto=producto).values_list('costo_promedio', flat=True).first()
+            precio_unitario = (costo or producto.precio_unitario or Decimal('0')).quantize(DOS_DECIMALES)
+        return registrar_movimientos([
+            Movimiento(
+                producto=producto, almacen=origen, cantidad=cantidad, precio_unitario=precio_unitario,
+                tipo_movimiento=TipoMovimiento.por_descripcion(TipoMovimiento.SALIDA), transferencia=True,
+            ),
+            Movimiento(
+                producto=producto, almacen=destino, cantidad=cantidad, precio_unitario=precio_unitario,
+                tipo_movimiento=TipoMovimiento.por_descripcion(TipoMovimiento.ENTRADA), transferencia=True,
+            ),
+        ])
+
+
+def reintentar_interbloqueo(funcion):
+    """
+    Ejecuta `funcion` en su propia transacción y, si el motor la elige
+    como víctima de un interbloqueo, la repite completa hasta
+    REINTENTOS_INTERBLOQUEO veces. Solo reintenta cuando es la
+    transacción más externa: dentro de otra, el motor ya revirtió la
+    transacción completa y el error se propaga hasta el punto de entrada
+    (servicio, comando o admin) que la abrió.
+    """
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if transaction.get_connection().in_atomic_block:
+            return funcion(*args, **kwargs)
+        for intento in range(REINTENTOS_INTERBLOQUEO + 1):
+            try:
+                with transaction.atomic():
+                    return funcion(*args, **kwargs)
+            except DatabaseError as error:
+                if not _es_interbloqueo(error) or intento == REINTENTOS_INTERBLOQUEO:
+                    raise
+                sleep(ESPERA_INTERBLOQUEO * 2 ** intento)
+    return envoltura
+
+
+@reintentar_interbloqueo
+def reservar_stock(cantidades):
+    """
+    Reserva stock por producto ({cod_producto: cantidad}); las cantidades
+    negativas liberan reservas. Cada reserva es un UPDATE condicionado
+    (cantidad >= reservado + n) sobre la fila de StockProductos del
+    producto: solo bloquea esa fila, nunca el inventario completo, y dos
+    operadores no pueden comprometer el mismo saldo. Las filas se tocan
+    en orden de código para reducir interbloqueos, que se reintentan en
+    la transacción más externa (reintentar_interbloqueo).
+    Lanza StockInsuficiente sin aplicar ninguna reserva del lote.
+    """
+    cantidades = {producto_id: cantidad for producto_id, cantidad in cantidades.items() if cantidad}
+    if cantidades:
+        _reservar(cantidades)
+
+
+def _reservar(cantidades):
+    ahora = timezone.now()
+    with transaction.atomic():
+        for producto_id in sorted(cantidades):
+            cantidad = cantidades[producto_id]
+            saldo = StockProducto.objects.filter(producto_id=producto_id)
+            if cantidad > 0:
+                saldo = saldo.filter(cantidad__gte=F('reservado') + cantidad)
+            actualizados = saldo.update(reservado=F('reservado') + cantidad, fecha_actualizacion=ahora)
+            if not actualizados and cantidad > 0:
+                disponible = (
+                    StockProducto.objects.filter(producto_id=producto_id)
+                    .values_list('cantidad', 'reservado').first()
+                )
+                disponible = disponible[0] - disponible[1] if disponible else 0
+                producto = Producto.objects.filter(pk=producto_id).first()
+                raise StockInsuficiente(
+                    f'Stock insuficiente de {producto}: disponible {disponible}, solicitado {cantidad}.'
+                )
+
+
+def asignar_fefo(producto_id, cantidad, fecha=None):
+    """
+    Reserva `cantidad` del producto en sus lotes vigentes, primero los
+    que vencen antes (FEFO). Recorre el índice filtrado IX_Lotes_fefo en
+    orden de vencimiento, omite los lotes ya reservados por completo y
+    bloquea solo los que tienen saldo libre; se detiene al cubrir la
+    cantidad: el costo no depende de cuántos lotes haya abiertos. Devuelve [(lote, cantidad)] o lanza StockInsuficiente.
+    Debe llamarse dentro de una transacción.
+    """
+    fecha = fecha or timezone.localdate()
+    asignaciones = []
+    pendiente = cantidad
+    lotes = (
+        Lote.objects.select_for_update()
+        # cantidad > 0 coincide con el filtro del índice; cantidad > reservado descarta los agotados.
+        .filter(producto_id=producto_id, cantidad__gt=0, fecha_vencimiento__gte=fecha)
+        .filter(cantidad__gt=F('reservado'))
+        .order_by('fecha_vencimiento', 'cod_lote')
+    )
+    for lote in lotes.iterator(chunk_size=50):
+        tomar = min(lote.disponible, pendiente)
+        if tomar <= 0:
+            continue
+        Lote.objects.filter(pk=lote.pk).update(reservado=F('reservado') + tomar)
+        lote.reservado += tomar
+        asignaciones.append((lote, tomar))
+        pendiente -= tomar
+        if not pendiente:
+            return asignaciones
+    producto = Producto.objects.filter(pk=producto_id).first()
+    raise StockInsuficiente(
+        f'Lotes vigentes insuficientes de {producto}: faltan {pendiente} de {cantidad}.'
+    )
+
+
+def liberar_lotes(cantidades):
+    """Libera reservas de lotes ({cod_lote: cantidad})."""
+    for lote_id in sorted(cantidades):
+        if cantidades[lote_id]:
+            Lote.objects.filter(pk=lote_id).update(reservado=F('reservado') - cantidades[lote_id])
+
+
+def _es_interbloqueo(error):
+    """
+    Si `error` es un interbloqueo según el código del driver (no el texto
+    del mensaje): pyodbc informa el SQLSTATE 40001 en args[0] para el
+    error 1205 de SQL Server.
+    """
+    if isinstance(error, IntegrityError):
+        return False
+    causa = error.__cause__
+    if causa is None:
+        return False
+    sqlstate = getattr(causa, 'sqlstate', None) or next(iter(getattr(causa, 'args', ())), None)
+    return sqlstate == SQLSTATE_INTERBLOQUEO or getattr(causa, 'number', None) == ERROR_INTERBLOQUEO
+
+
+def inicio_del_dia(fecha):
+    """Instante (aware) en que empieza `fecha` en la zona horaria local."""
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def mes_siguiente(periodo):
+    """Primer día del mes siguiente a `periodo`."""
+    return (periodo.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def verificar_periodo_abierto(movimientos):
+    """
+    Lanza ValidationError si algún movimiento pertenece a un período
+    cerrado. Como los cierres son correlativos, basta con comparar contra
+    el último mes cerrado.
+    """
+    ultimo = CierrePeriodo.objects.order_by('-periodo').values_list('periodo', flat=True).first()
+    if ultimo is None:
+        return
+    limite = inicio_del_dia(mes_siguiente(ultimo))
+    for movimiento in movimientos:
+        if movimiento.fecha_movimiento is not None and movimiento.fecha_movimiento < limite:
+            raise ValidationError(
+                f'El período {timezone.localtime(movimiento.fecha_movimiento):%Y-%m} está cerrado; '
+                'no se pueden registrar ni modificar sus movimientos.'
+            )
+
+
+def cerrar_periodo(periodo):
+    """
+    Cierra el mes `periodo` y guarda la foto de cantidad y valor de
+    cada producto: cierre anterior + movimientos del mes, en una sola
+    consulta agrupada. Los meses deben cerrarse en orden y solo cuando
+    ya terminaron.
+    """
+    periodo = periodo.replace(day=1)
+    if mes_siguiente(periodo) > timezone.localdate():
+        raise ValidationError(f'El período {periodo:%Y-%m} aún no termina.')
+
+    with transaction.atomic():
+        # Bloquea el último cierre para que dos cierres no se crucen.
+        anterior = CierrePeriodo.objects.select_for_update().order_by('-periodo').first()
+        if anterior is not None and anterior.periodo >= periodo:
+            raise ValidationError(f'El período {periodo:%Y-%m} ya está cerrado.')
+        if anterior is not None and mes_siguiente(anterior.periodo) != periodo:
+            raise ValidationError(f'Debe cerrarse primero el período {mes_siguiente(anterior.periodo):%Y-%m}.')
+
+        cierre = CierrePeriodo.objects.create(periodo=periodo)
+        saldos = {}
+        if anterior is not None:
+            saldos = {
+                producto_id: (cantidad, valor)
+                for producto_id, cantidad, valor in anterior.saldos.values_list('producto_id', 'cantidad', 'valor')
+            }
+        # El primer cierre arrastra todo el historial anterior al mes.
+        movimientos = Movimiento.objects.filter(fecha_movimiento__lt=inicio_del_dia(mes_siguiente(periodo)))
+        if anterior is not None:
+            movimientos = movimientos.filter(fecha_movimiento__gte=inicio_del_dia(periodo))
+        for producto_id, cantidad, valor in _sumar_por_producto(movimientos):
+            previa, valor_previo = saldos.get(producto_id, (0, Decimal('0')))
+            saldos[producto_id] = (previa + cantidad, valor_previo + valor)
+
+        StockCierre.objects.bulk_create(
+            [
+                StockCierre(cierre=cierre, producto_id=producto_id, cantidad=cantidad, valor=valor)
+                for producto_id, (cantidad, valor) in saldos.items()
+            ],
+            batch_size=1000,
+        )
+    return cierre
+
+
+def saldos_a_fecha(fecha, producto_ids=None):
+    """
+    Cantidad y valor de cada producto al final del día `fecha`:
+    {cod_producto: (cantidad, valor)}. Parte del último cierre anterior
+    a la fecha y suma solo los movimientos posteriores a ese cierre, en
+    lugar de recorrer todo el historial.
+    """
+    limite = inicio_del_dia(fecha + timedelta(days=1))
+    cierre = (
+        CierrePeriodo.objects.filter(periodo__lt=timezone.localtime(limite).date().replace(day=1))
+        .order_by('-periodo')
+        .first()
+    )
+
+    saldos = defaultdict(lambda: (0, Decimal('0')))
+    movimientos = Movimiento.objects.filter(fecha_movimiento__lt=limite)
+    if cierre is not None:
+        fotos = cierre.saldos.all()
+        if producto_ids is not None:
+            fotos = fotos.filter(producto_id__in=producto_ids)
+        for producto_id, cantidad, valor in fotos.values_list('producto_id', 'cantidad', 'valor'):
+            saldos[producto_id] = (cantidad, valor)
+        movimientos = movimientos.filter(fecha_movimiento__gte=inicio_del_dia(mes_siguiente(cierre.periodo)))
+    if producto_ids is not None:
+        movimientos = movimientos.filter(producto_id__in=producto_ids)
+
+    for producto_id, cantidad, valor in _sumar_por_producto(movimientos):
+        previa, valor_previo = saldos[producto_id]
+        saldos[producto_id] = (previa + cantidad, valor_previo + valor)
+    return dict(saldos)
+
+
+def reconstruir_resumen_diario(desde, hasta):
+    """
+    Recalcula MovimientosDiarios para los días desde..hasta (inclusive)
+    a partir de Movimientos, un mes por transacción. Devuelve el número
+    de filas de resumen escritas.
+    """
+    escritas = 0
+    inicio = desde
+    while inicio <= hasta:
+        fin = min(hasta, mes_siguiente(inicio) - timedelta(days=1))
+        with transaction.atomic():
+            MovimientoDiario.objects.filter(fecha__gte=inicio, fecha__lte=fin).delete()
+            filas = (
+                Movimiento.objects.filter(
+                    fecha_movimiento__gte=inicio_del_dia(inicio),
+                    fecha_movimiento__lt=inicio_del_dia(fin + timedelta(days=1)),
+                )
+                .annotate(fecha=TruncDate('fecha_movimiento', tzinfo=timezone.get_current_timezone()))
+                .order_by()
+                .values('fecha', 'producto_id', 'tipo_movimiento_id')
+                .annotate(numero=Count('cod_movimiento'), total_cantidad=Sum('cantidad'), total_precio=Sum('precio_total'))
+            )
+            resumen = MovimientoDiario.objects.bulk_create(
+                [
+                    MovimientoDiario(
+                        fecha=fila['fecha'],
+                        producto_id=fila['producto_id'],
+                        tipo_movimiento_id=fila['tipo_movimiento_id'],
+                        numero_movimientos=fila['numero'],
+                        cantidad=fila['total_cantidad'],
+                        precio_total=fila['total_precio'],
+                    )
+                    for fila in filas
+                ],
+                batch_size=1000,
+            )
+        escritas += len(resumen)
+        inicio = fin + timedelta(days=1)
+    return escritas
+
+
+def _sumar_por_producto(movimientos):
+    ids_entrada = TipoMovimiento.ids_entrada()
+    return (
+        movimientos.order_by()
+        .values('producto_id')
+        # Alias distintos de los campos: F('cantidad') dentro de valor_firmado
+        # resolvería a la anotación en lugar de la columna.
+        .annotate(saldo=Sum(cantidad_firmada(ids_entrada)), saldo_valor=Sum(valor_firmado(ids_entrada)))
+        .values_list('producto_id', 'saldo', 'saldo_valor')
+    )
+
+
+@dataclass
+class ResultadoImportacion:
+    insertados: int = 0
+    rechazados: list = field(default_factory=list)  # [(linea, fila, motivo)]
+
+
+def importar_movimientos(filas, tamano_lote=1000):
+    """
+    Importa movimientos masivos (p. ej. lotes de proveedores).
+
+    `filas` es un iterable de (numero_linea, dict) con las claves
+    producto (código, descripción o abreviatura), tipo, cantidad,
+    precio_unitario y, opcionalmente, almacen (código o descripción). Cada fila se valida y se le calcula precio_total
+    como haría Movimiento.save(); las válidas se insertan con bulk_create
+    en transacciones de `tamano_lote` filas que actualizan los saldos en
+    la misma transacción. Las filas inválidas se devuelven en
+    ResultadoImportacion.rechazados sin detener la carga.
+    """
+    productos = {}
+    for cod, descripcion, abreviatura in Producto.objects.values_list('cod_producto', 'descripcion', 'abreviatura'):
+        productos[str(cod)] = cod
+        productos[descripcion.upper()] = cod
+        if abreviatura:
+            productos.setdefault(abreviatura.upper(), cod)
+    tipos = {
+        descripcion.upper(): cod
+        for cod, descripcion in TipoMovimiento.objects.values_list('cod_tipo_movimiento', 'descripcion')
+    }
+
+    almacenes = {}
+    for cod, descripcion in Almacen.objects.values_list('cod_almacen', 'descripcion'):
+        almacenes[str(cod)] = cod
+        almacenes[descripcion.upper()] = cod
+
+    resultado = ResultadoImportacion()
+    filas = iter(filas)
+    while True:
+        lote = list(islice(filas, tamano_lote))
+        if not lote:
+            break
+        movimientos = []
+        for linea, fila in lote:
+            try:
+                movimientos.append(_preparar_movimiento(fila, productos, tipos, almacenes))
+            except ValueError as error:
+                resultado.rechazados.append((linea, fila, str(error)))
+        if not movimientos:
+            continue
+        registrar_movimientos(movimientos)
+        resultado.insertados += len(movimientos)
+    return resultado
+
+
+def _preparar_movimiento(fila, productos, tipos, almacenes):
+    producto_id = productos.get(str(fila.get('producto') or '').strip().upper())
+    if producto_id is None:
+        raise ValueError(f"Producto desconocido: {fila.get('producto')!r}")
+    tipo_id = tipos.get(str(fila.get('tipo') or '').strip().upper())
+    if tipo_id is None:
+        raise ValueError(f"Tipo de movimiento desconocido: {fila.get('tipo')!r}")
+    try:
+        cantidad = int(str(fila.get('cantidad')).strip())
+    except ValueError:
+        raise ValueError(f"Cantidad inválida: {fila.get('cantidad')!r}")
+    if cantidad <= 0:
+        raise ValueError('La cantidad debe ser mayor que cero')
+    try:
+        precio_unitario = Decimal(str(fila.get('precio_unitario')).strip()).quantize(Decimal('0.01'))
+        if not precio_unitario.is_finite():  # 'NaN' pasa por quantize
+            raise ValueError(f"Precio unitario inválido: {fila.get('precio_unitario')!r}")
+    except InvalidOperation:
+        raise ValueError(f"Precio unitario inválido: {fila.get('precio_unitario')!r}")
+    if precio_unitario < 0:
+        raise ValueError('El precio unitario no puede ser negativo')
+
+    precio_total = cantidad * precio_unitario
+    if precio_unitario >= LIMITE_PRECIO or precio_total >= LIMITE_PRECIO:
+        raise ValueError('El precio excede el máximo permitido (9 dígitos)')
+    almacen_id = None
+    if fila.get('almacen'):
+        almacen_id = almacenes.get(str(fila['almacen']).strip().upper())
+        if almacen_id is None:
+            raise ValueError(f"Almacén desconocido: {fila['almacen']!r}")
+    return Movimiento(
+        producto_id=producto_id,
+        tipo_movimiento_id=tipo_id,
+        almacen_id=almacen_id,
+        cantidad=cantidad,
+        precio_unitario=precio_unitario,
+        precio_total=precio_total,
+    )
+
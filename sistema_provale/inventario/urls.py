@@ -5,5 +5,6 @@ app_name = 'inventario'
 
 urlpatterns = [
     path('productos/', views.productos_index, name='productos_index'),
+    path('productos/<int:id>/kardex/', views.kardex, name='kardex'),
     path('movimientos/', views.movimientos_index, name='movimientos_index'),
 ]
@@ -1,28 +1,71 @@
+import csv
+from datetime import timedelta
+
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import render
+from django.db.models import F, Q, Sum, Window
+from django.db.models.expressions import RowRange
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.utils.dateparse import parse_date
+
+from core.paginacion import paginar_keyset
+from .models import Movimiento, Producto, TipoMovimiento, cantidad_firmada
+from .services import inicio_del_dia, saldos_a_fecha
+
+PRODUCTOS_POR_PAGINA = 20
+KARDEX_FILAS_POR_LOTE = 2000
 
 
 @login_required
 def productos_index(request):
-    """Vista de lista de productos"""
+    """
+    Vista de lista de productos.
+    Filtra en SQL, anota el stock con Producto.objects.with_stock() y
+    pagina por keyset sobre (descripcion, cod_producto): la página se
+    arma con un número fijo de consultas sin importar el tamaño del
+    catálogo ni del historial de movimientos.
+    """
+    filters = {'search': request.GET.get('search', ''), 'categoria': request.GET.get('categoria'), 'estado': request.GET.get('estado')}
+
+    queryset = Producto.objects.select_related('unidad_medida', 'estado')
+    if filters['search']:
+        queryset = queryset.filter(Q(descripcion__icontains=filters['search']) | Q(abreviatura__icontains=filters['search']))
+    if filters['estado']:
+        queryset = queryset.filter(estado__descripcion__iexact=filters['estado'])
+    # Producto no tiene columna de categoría: el filtro se conserva para el frontend.
+
+    total = queryset.count()
+    pagina, next_cursor = paginar_keyset(
+        queryset.with_stock(),
+        ['descripcion', 'cod_producto'],
+        cursor=request.GET.get('cursor'),
+        por_pagina=PRODUCTOS_POR_PAGINA,
+    )
     productos = [
-        {'id': 1, 'nombre': 'Leche Evaporada', 'descripcion': 'Leche evaporada descremada en lata', 'categoria': 'alimentos', 'unidad_medida': 'Lata', 'stock_actual': 150, 'stock_minimo': 50, 'precio_unitario': 4.50, 'estado': 'activo'},
-        {'id': 2, 'nombre': 'Azúcar', 'descripcion': 'Azúcar rubia refinada', 'categoria': 'alimentos', 'unidad_medida': 'Kg', 'stock_actual': 30, 'stock_minimo': 40, 'precio_unitario': 3.20, 'estado': 'activo'},
-        {'id': 3, 'nombre': 'Fideos', 'descripcion': 'Fideos largos tipo spaghetti', 'categoria': 'alimentos', 'unidad_medida': 'Paquete', 'stock_actual': 200, 'stock_minimo': 30, 'precio_unitario': 2.80, 'estado': 'activo'},
-        {'id': 4, 'nombre': 'Jabón de Tocador', 'descripcion': 'Jabón antibacterial', 'categoria': 'higiene', 'unidad_medida': 'Unidad', 'stock_actual': 0, 'stock_minimo': 25, 'precio_unitario': 1.50, 'estado': 'activo'},
-        {'id': 5, 'nombre': 'Shampoo', 'descripcion': 'Shampoo para adultos', 'categoria': 'higiene', 'unidad_medida': 'Unidad', 'stock_actual': 45, 'stock_minimo': 20, 'precio_unitario': 5.00, 'estado': 'activo'},
-        {'id': 6, 'nombre': 'Paracetamol', 'descripcion': 'Tabletas de 500mg', 'categoria': 'medicamentos', 'unidad_medida': 'Tableta', 'stock_actual': 500, 'stock_minimo': 100, 'precio_unitario': 0.10, 'estado': 'activo'},
-        {'id': 7, 'nombre': 'Cuadernos', 'descripcion': 'Cuaderno universitario 100 hojas', 'categoria': 'utiles', 'unidad_medida': 'Unidad', 'stock_actual': 15, 'stock_minimo': 30, 'precio_unitario': 8.00, 'estado': 'inactivo'},
+        {
+            'id': producto.cod_producto,
+            'nombre': producto.descripcion,
+            'descripcion': producto.abreviatura or '',
+            'categoria': 'otro',
+            'unidad_medida': producto.unidad_medida.descripcion,
+            'stock_actual': producto.stock_actual,
+            'stock_minimo': 0,
+            'precio_unitario': float(producto.precio_unitario or 0),
+            'estado': producto.estado.descripcion.lower(),
+        }
+        for producto in pagina
     ]
-    
+
     context = {
         'page_data': {
             'user': {'id': request.user.id, 'username': request.user.username, 'email': request.user.email, 'first_name': request.user.first_name, 'last_name': request.user.last_name, 'role': getattr(request.user, 'role', 'usuario')},
             'productos': productos,
-            'total': 45,
+            'total': total,
             'page': 1,
-            'per_page': 20,
-            'filters': {'search': request.GET.get('search', ''), 'categoria': request.GET.get('categoria'), 'estado': request.GET.get('estado')},
+            'per_page': PRODUCTOS_POR_PAGINA,
+            'cursor': request.GET.get('cursor'),
+            'next_cursor': next_cursor,
+            'filters': filters,
         }
     }
     return render(request, 'inventario/productos_list.html', context)
@@ -50,3 +93,60 @@ def movimientos_index(request):
         }
     }
     return render(request, 'inventario/movimientos_list.html', context)
+
+
+class _Eco:
+    """Pseudo-buffer para csv.writer: devuelve cada línea en lugar de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+@login_required
+def kardex(request, id):
+    """
+    Kardex de un producto en CSV: cada movimiento del rango
+    fecha_inicio/fecha_fin con su cantidad con signo, precio_total y
+    saldo acumulado. El saldo se calcula en SQL con una función de
+    ventana sobre (fecha_movimiento, cod_movimiento) y las filas se leen
+    y envían por lotes, sin cargar el historial completo en memoria.
+    """
+    producto = get_object_or_404(Producto, pk=id)
+    fecha_inicio = parse_date(request.GET.get('fecha_inicio') or '')
+    fecha_fin = parse_date(request.GET.get('fecha_fin') or '')
+
+    firmada = cantidad_firmada(TipoMovimiento.ids_entrada())
+    movimientos = Movimiento.objects.filter(producto=producto)
+    saldo_inicial = 0
+    if fecha_inicio:
+        # Saldo de apertura desde el último cierre de período, no desde el inicio del historial.
+        saldo_inicial = saldos_a_fecha(fecha_inicio - timedelta(days=1), [producto.pk]).get(producto.pk, (0, 0))[0]
+        movimientos = movimientos.filter(fecha_movimiento__gte=inicio_del_dia(fecha_inicio))
+    if fecha_fin:
+        movimientos = movimientos.filter(fecha_movimiento__lt=inicio_del_dia(fecha_fin + timedelta(days=1)))
+
+    orden = [F('fecha_movimiento').asc(), F('cod_movimiento').asc()]
+    filas = (
+        movimientos
+        .annotate(
+            cantidad_signo=firmada,
+            saldo=Window(Sum(firmada), order_by=orden, frame=RowRange(start=None, end=0)),
+        )
+        .order_by(*orden)
+        .values_list(
+            'cod_movimiento', 'fecha_movimiento', 'tipo_movimiento__descripcion',
+            'cantidad_signo', 'precio_unitario', 'precio_total', 'saldo',
+        )
+    )
+
+    def generar():
+        writer = csv.writer(_Eco())
+        yield writer.writerow(['Codigo', 'Fecha', 'Tipo', 'Cantidad', 'Precio unitario', 'Precio total', 'Saldo'])
+        yield writer.writerow(['', fecha_inicio or '', 'SALDO INICIAL', '', '', '', saldo_inicial])
+        for cod, fecha, tipo, cantidad, precio_unitario, precio_total, saldo in filas.iterator(chunk_size=KARDEX_FILAS_POR_LOTE):
+            yield writer.writerow([cod, fecha.isoformat(), tipo, cantidad, precio_unitario, precio_total, saldo_inicial + saldo])
+
+    response = StreamingHttpResponse(generar(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="kardex_{producto.cod_producto}.csv"'
+    return response
+
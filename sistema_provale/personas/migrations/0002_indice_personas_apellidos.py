@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geografico', '0001_initial'),
+        ('personas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='persona',
+            index=models.Index(fields=['apellido_paterno', 'apellido_materno', 'nombres', 'cod_persona'], name='IX_Personas_apellidos'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geografico', '0001_initial'),
+        ('personas', '0002_indice_personas_apellidos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='persona',
+            index=models.Index(fields=['fecha_nacimiento'], name='IX_Personas_fecha_nacimiento'),
+        ),
+    ]
@@ -1,10 +1,106 @@
+import calendar
+from datetime import date
+
 from django.db import models
+from django.db.models.functions import ExtractDay, ExtractMonth, ExtractYear
 from django.utils import timezone
 from core.models import Estado
 from geografico.models import SectorZona
 from asociaciones.models import Asociacion
 
 
+def calcular_edad(fecha_nacimiento, hoy=None):
+    """
+    Edad a la fecha `hoy` (por defecto la actual) como (años completos,
+    meses cumplidos del año en curso 0-11, días cumplidos del mes en
+    curso). expresiones_edad() calcula lo mismo en SQL.
+    """
+    hoy = hoy or timezone.now().date()
+    anios = hoy.year - fecha_nacimiento.year
+    if (hoy.month, hoy.day) < (fecha_nacimiento.month, fecha_nacimiento.day):
+        anios -= 1
+    meses = (hoy.year - fecha_nacimiento.year) * 12 + (hoy.month - fecha_nacimiento.month)
+    if hoy.day < fecha_nacimiento.day:
+        meses -= 1
+    if hoy.day >= fecha_nacimiento.day:
+        dias = hoy.day - fecha_nacimiento.day
+    else:
+        dias = _ultimo_dia_mes_anterior(hoy) - fecha_nacimiento.day + hoy.day
+    return anios, meses - anios * 12, dias
+
+
+def _ultimo_dia_mes_anterior(hoy):
+    return calendar.monthrange(hoy.year if hoy.month > 1 else hoy.year - 1, hoy.month - 1 if hoy.month > 1 else 12)[1]
+
+
+def expresiones_edad(hoy=None, campo='fecha_nacimiento'):
+    """
+    {'edad_anios', 'edad_meses', 'edad_dias'}: expresiones SQL con las
+    mismas reglas que calcular_edad() sobre `campo` (p. ej.
+    'persona__fecha_nacimiento'). Usan solo extracciones de año, mes y
+    día y aritmética entera, que Django traduce en cada motor (DATEPART
+    en SQL Server), y la fecha de referencia va como parámetro.
+    """
+    hoy = hoy or timezone.now().date()
+    anio, mes, dia = ExtractYear(campo), ExtractMonth(campo), ExtractDay(campo)
+    entero = models.IntegerField()
+    antes_del_dia = models.Q(**{f'{campo}__day__gt': hoy.day})
+    antes_del_cumple = models.Q(**{f'{campo}__month__gt': hoy.month}) | models.Q(
+        **{f'{campo}__month': hoy.month, f'{campo}__day__gt': hoy.day}
+    )
+    anios = models.ExpressionWrapper(
+        models.Value(hoy.year) - anio
+        - models.Case(models.When(antes_del_cumple, then=models.Value(1)), default=models.Value(0)),
+        output_field=entero,
+    )
+    meses = models.ExpressionWrapper(
+        (models.Value(hoy.year) - anio) * 12 + models.Value(hoy.month) - mes
+        - models.Case(models.When(antes_del_dia, then=models.Value(1)), default=models.Value(0))
+        - anios * 12,
+        output_field=entero,
+    )
+    dias = models.Case(
+        models.When(antes_del_dia, then=models.Value(_ultimo_dia_mes_anterior(hoy) + hoy.day) - dia),
+        default=models.Value(hoy.day) - dia,
+        output_field=entero,
+    )
+    return {'edad_anios': anios, 'edad_meses': meses, 'edad_dias': dias}
+
+
+def filtro_edad(minimo=None, maximo=None, hoy=None, campo='fecha_nacimiento'):
+    """
+    Q de las personas con entre `minimo` y `maximo` años completos
+    (ambos inclusive, cualquiera opcional) como rango sobre `campo`, de
+    modo que el motor puede usar el índice de fechaNacimiento.
+    """
+    hoy = hoy or timezone.now().date()
+    condicion = models.Q()
+    if minimo is not None:
+        condicion &= models.Q(**{f'{campo}__lte': _restar_anios(hoy, minimo)})
+    if maximo is not None:
+        condicion &= models.Q(**{f'{campo}__gt': _restar_anios(hoy, maximo + 1)})
+    return condicion
+
+
+def _restar_anios(fecha, anios):
+    # Quien cumple años el 29 de febrero cumple en un año no bisiesto el 1 de marzo.
+    try:
+        return fecha.replace(year=fecha.year - anios)
+    except ValueError:
+        return date(fecha.year - anios, 2, 28)
+
+
+class PersonaQuerySet(models.QuerySet):
+
+    def con_edad(self, hoy=None):
+        """Anota edad_anios, edad_meses y edad_dias (ver expresiones_edad)."""
+        return self.annotate(**expresiones_edad(hoy))
+
+    def edad_entre(self, minimo=None, maximo=None, hoy=None):
+        """Personas con entre `minimo` y `maximo` años completos (ver filtro_edad)."""
+        return self.filter(filtro_edad(minimo, maximo, hoy))
+
+
 class Persona(models.Model):
     """
     Tabla: Personas
@@ -15,6 +111,8 @@ class Persona(models.Model):
     del SQL son columnas computadas del motor. En Django se implementan
     como propiedades de Python para mantener portabilidad, ya que Django
     ORM no soporta columnas AS calculadas de forma nativa sin SQL raw.
+    Para filtrar u ordenar por edad en la base de datos están
+    Persona.objects.con_edad() y edad_entre().
     """
     SEXO_CHOICES = [
         ('M', 'Masculino'),
@@ -40,11 +138,21 @@ class Persona(models.Model):
     numero_finca = models.IntegerField(null=True, blank=True, db_column='numeroFinca')
     fecha_registro = models.DateTimeField(auto_now_add=True, db_column='fechaRegistro')
 
+    objects = PersonaQuerySet.as_manager()
+
     class Meta:
         db_table = 'Personas'
         verbose_name = 'Persona'
         verbose_name_plural = 'Personas'
         ordering = ['apellido_paterno', 'apellido_materno', 'nombres']
+        indexes = [
+            # Orden alfabético de los listados y búsqueda por prefijo de apellido.
+            models.Index(
+                fields=['apellido_paterno', 'apellido_materno', 'nombres', 'cod_persona'],
+                name='IX_Personas_apellidos',
+            ),
+            models.Index(fields=['fecha_nacimiento'], name='IX_Personas_fecha_nacimiento'),
+        ]
 
     def __str__(self):
         return f'{self.apellido_paterno} {self.apellido_materno}, {self.nombres}'
@@ -56,30 +164,17 @@ class Persona(models.Model):
     @property
     def anios_nacido(self):
         """Edad en años completos."""
-        hoy = timezone.now().date()
-        edad = hoy.year - self.fecha_nacimiento.year
-        if (hoy.month, hoy.day) < (self.fecha_nacimiento.month, self.fecha_nacimiento.day):
-            edad -= 1
-        return edad
+        return calcular_edad(self.fecha_nacimiento)[0]
 
     @property
     def meses_nacido(self):
         """Meses cumplidos del año en curso (0-11)."""
-        hoy = timezone.now().date()
-        meses = (hoy.year - self.fecha_nacimiento.year) * 12 + (hoy.month - self.fecha_nacimiento.month)
-        if hoy.day < self.fecha_nacimiento.day:
-            meses -= 1
-        return meses % 12
+        return calcular_edad(self.fecha_nacimiento)[1]
 
     @property
     def dias_nacido(self):
         """Días cumplidos del mes en curso."""
-        hoy = timezone.now().date()
-        if hoy.day >= self.fecha_nacimiento.day:
-            return hoy.day - self.fecha_nacimiento.day
-        import calendar
-        ultimo_dia_mes_anterior = calendar.monthrange(hoy.year, hoy.month - 1 if hoy.month > 1 else 12)[1]
-        return ultimo_dia_mes_anterior - self.fecha_nacimiento.day + hoy.day
+        return calcular_edad(self.fecha_nacimiento)[2]
 
 
 class Socio(models.Model):
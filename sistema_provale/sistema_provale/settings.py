@@ -79,6 +79,9 @@ DATABASES = {
         'PORT': '1433',
         'OPTIONS': {
             'driver': 'ODBC Driver 17 for SQL Server',
+            # bulk_create devuelve las PKs generadas (OUTPUT INSERTED); los
+            # servicios de inventario y distribución enlazan filas con ellas.
+            'return_rows_bulk_insert': True,
         },
     }
 }
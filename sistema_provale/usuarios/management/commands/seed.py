@@ -24,6 +24,10 @@ class Command(BaseCommand):
             {"abreviatura": "ACT", "descripcion": "Activo"},
             {"abreviatura": "INA", "descripcion": "Inactivo"},
             {"abreviatura": "SUS", "descripcion": "Suspendido"},
+            {"abreviatura": "PEN", "descripcion": "Pendiente"},
+            {"abreviatura": "APR", "descripcion": "Aprobada"},
+            {"abreviatura": "ENT", "descripcion": "Entregada"},
+            {"abreviatura": "CAN", "descripcion": "Cancelada"},
         ]
         for estado_data in estados_data:
             Estado.objects.get_or_create(